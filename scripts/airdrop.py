@@ -1,16 +1,190 @@
+import sys
+
+from scriptd import delegate
+
+# Hand the command to a running scriptd daemon before the slow imports below.
+if __name__ == "__main__":
+    delegate("airdrop", sys.argv[1:])
+
 import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 
 from common import (
+    AIRDROP_CONFIRM_TIMEOUT_SEC,
+    ConfirmationTracker,
+    TokenBucket,
+    TrackedSignature,
+    get_balances,
     get_client,
     lamports_from_sol,
     parse_pubkey,
-    wait_for_confirmation,
+    report_confirmation,
+    track_airdrop,
 )
+from rpc_profile import add_profile_arguments, configure_profiling, count_retry
+from solana.exceptions import SolanaRpcException
+from solana.rpc.api import Client
+from solana.rpc.core import RPCException
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+
+# Devnet's faucet caps a single request at 5 SOL; the local test validator has no cap.
+DEFAULT_CAP_SOL = "5"
+DEFAULT_RATE = 10.0
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RETRIES = 5
+_RATE_LIMIT_MARKERS = ("429", "too many requests", "rate limit", "airdrop request failed")
+
+
+@dataclass
+class AirdropTarget:
+    pubkey: Pubkey
+    lamports: int
+    signatures: List[TrackedSignature] = field(default_factory=list)
+    failed: int = 0
+    balance_before: int = 0
+    balance_after: int = 0
+
+    @property
+    def received(self) -> int:
+        return self.balance_after - self.balance_before
+
+
+def split_amount(lamports: int, cap: Optional[int]) -> List[int]:
+    """Split ``lamports`` into per-request amounts of at most ``cap``.
+
+    The faucet builds identical transactions for identical (recipient, amount)
+    requests under the same blockhash, so every part is kept distinct.
+    """
+    if cap is None or lamports <= cap:
+        return [lamports]
+    count = -(-lamports // cap)
+    while count <= cap:
+        # Descending parts b, b-1, ..., with the tail trimmed by one lamport each to hit the total.
+        spread = count * (count - 1) // 2
+        base = -(-(lamports + spread) // count)
+        excess = count * base - spread - lamports
+        parts = [base - i - (1 if i >= count - excess else 0) for i in range(count)]
+        if base <= cap and parts[-1] > 0:
+            return parts
+        count += 1
+    raise ValueError(f"Cannot split {lamports} lamports into distinct requests of at most {cap}")
+
+
+def read_address_list(path: str, default_lamports: int) -> List[Tuple[Pubkey, int]]:
+    """Read ``address[,sol]`` lines; blank lines and ``#`` comments are skipped."""
+    targets: List[Tuple[Pubkey, int]] = []
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            address, _, amount = line.partition(",")
+            lamports = lamports_from_sol(amount.strip()) if amount.strip() else default_lamports
+            targets.append((parse_pubkey(address.strip()), lamports))
+    return targets
+
+
+def _is_rate_limited(exc: Exception) -> bool:
+    text = f"{exc} {exc.__cause__ or ''}".lower()
+    return any(marker in text for marker in _RATE_LIMIT_MARKERS)
 
 
-def main():
+def request_airdrop_with_retry(
+        client: Client,
+        bucket: TokenBucket,
+        pubkey: Pubkey,
+        lamports: int,
+        retries: int = DEFAULT_RETRIES,
+) -> Optional[Signature]:
+    """Return the airdrop signature; back off and retry while the faucet rate-limits us."""
+    for attempt in range(retries):
+        bucket.acquire()
+        try:
+            return client.request_airdrop(pubkey, lamports).value
+        except (RPCException, SolanaRpcException) as e:
+            if not _is_rate_limited(e) or attempt == retries - 1:
+                print(f"Ошибка airdrop для {pubkey} ({lamports} лампортов): {e}")
+                return None
+            count_retry("requestAirdrop")
+            time.sleep(min(8.0, 0.5 * 2 ** attempt) * (0.5 + random.random()))
+    return None
+
+
+def fan_out(
+        client: Client,
+        targets: List[AirdropTarget],
+        cap: Optional[int],
+        rate: float,
+        concurrency: int,
+        retries: int = DEFAULT_RETRIES,
+        ws_url: Optional[str] = None,
+) -> None:
+    jobs = [(target, part) for target in targets for part in split_amount(target.lamports, cap)]
+    pubkeys = [target.pubkey for target in targets]
+    for target, balance in zip(targets, get_balances(client, pubkeys)):
+        target.balance_before = balance
+    print(f"Запросов airdrop: {len(jobs)} на {len(targets)} адресов (до {rate:g} запросов/с, параллельно {concurrency}).")
+
+    bucket = TokenBucket(rate)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(request_airdrop_with_retry, client, bucket, target.pubkey, part, retries)
+            for target, part in jobs
+        ]
+        results = [future.result() for future in futures]
+
+    tracker = ConfirmationTracker(client)
+    for (target, _part), result in zip(jobs, results):
+        if result is None:
+            target.failed += 1
+        else:
+            target.signatures.append(track_airdrop(tracker, result))
+    tracker.confirm(ws_url=ws_url, timeout_sec=AIRDROP_CONFIRM_TIMEOUT_SEC)
+
+    for target, balance in zip(targets, get_balances(client, pubkeys)):
+        target.balance_after = balance
+
+
+def print_fan_out_summary(targets: List[AirdropTarget]) -> int:
+    print(f"{'Адрес':<46}{'Запрошено':>16}{'Получено':>16}  Статус")
+    short = 0
+    for target in targets:
+        confirmed = sum(1 for tracked in target.signatures if tracked.status == "confirmed")
+        ok = target.received >= target.lamports
+        short += not ok
+        status = "ok" if ok else f"недополучено ({confirmed}/{len(target.signatures) + target.failed} подтверждено)"
+        print(f"{str(target.pubkey):<46}{target.lamports:>16}{target.received:>16}  {status}")
+    print(f"Пополнено полностью: {len(targets) - short}/{len(targets)} адресов.")
+    return short
+
+
+def run_fan_out(args, client: Client, lamports: int) -> None:
+    pairs = [(parse_pubkey(addr), lamports) for addr in args.to or []]
+    if args.to_file:
+        pairs.extend(read_address_list(args.to_file, lamports))
+    merged: Dict[Pubkey, int] = {}
+    for pubkey, amount in pairs:
+        merged[pubkey] = merged.get(pubkey, 0) + amount
+    targets = [AirdropTarget(pubkey=pubkey, lamports=amount) for pubkey, amount in merged.items()]
+    if not targets:
+        print("Список адресов пуст.")
+        return
+
+    cap = None if args.cap_sol == "0" else lamports_from_sol(args.cap_sol)
+    fan_out(client, targets, cap, args.rate, args.concurrency, retries=args.retries, ws_url=args.ws_url)
+    print_fan_out_summary(targets)
+
+
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Airdrop SOL на адрес")
-    parser.add_argument("--to", required=True, help="Адрес получателя (Pubkey)")
+    dest = parser.add_mutually_exclusive_group(required=True)
+    dest.add_argument("--to", nargs="+", help="Адрес получателя (Pubkey); несколько адресов включают режим fan-out")
+    dest.add_argument("--to-file", help="Файл со строками адрес[,SOL] для массового airdrop")
     amt = parser.add_mutually_exclusive_group()
     amt.add_argument("--sol", help="Сколько SOL закинуть (десятичное число). По умолчанию 1 SOL", default="1")
     amt.add_argument("--lamports", type=int, help="Сколько лампортов закинуть (целое)")
@@ -18,19 +192,34 @@ def main():
         "--rpc",
         help="RPC URL (по умолчанию берётся из SOLANA_RPC_URL или solana-validator:8899)"
     )
-    args = parser.parse_args()
+    parser.add_argument("--ws-url", help="Websocket URL: ждать подтверждения через signatureSubscribe")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Fan-out: запросов airdrop в секунду")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Fan-out: параллельных запросов")
+    parser.add_argument(
+        "--cap-sol", default=DEFAULT_CAP_SOL, help="Fan-out: лимит faucet на один запрос в SOL (0 - без лимита)"
+    )
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="Fan-out: попыток при rate limit")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    configure_profiling(args)
 
     client = get_client(args.rpc)
-    to_pub = parse_pubkey(args.to)
     lamports = args.lamports if args.lamports is not None else lamports_from_sol(args.sol)
 
+    if args.to_file or len(args.to) > 1:
+        run_fan_out(args, client, lamports)
+        return
+
+    to_pub = parse_pubkey(args.to[0])
     print(f"Запрашиваю airdrop {lamports} лампортов на {to_pub} ...")
     resp = client.request_airdrop(to_pub, lamports)
     sig = resp.value
 
     print(f"Signature: {sig}")
-    ok = wait_for_confirmation(client, sig)
-    print("Статус:", "✅ подтверждено" if ok else "⏳ не дождались подтверждения (проверь позже)")
+    tracker = ConfirmationTracker(client)
+    tracked = track_airdrop(tracker, sig)
+    tracker.confirm(ws_url=args.ws_url, timeout_sec=AIRDROP_CONFIRM_TIMEOUT_SEC)
+    report_confirmation(tracked)
 
     bal = client.get_balance(to_pub).value
     print(f"Баланс адреса {to_pub}: {bal} лампортов")
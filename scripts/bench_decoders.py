@@ -0,0 +1,100 @@
+"""Micro-benchmarks for the Pyth account decoders.
+
+Compares the original ``price_report`` parsers with the zero-copy decoders in
+``pyth_decode`` on recorded account blobs (see ``pyth_fixtures.py``), or on
+synthetic blobs when no recording is given.
+
+Usage example:
+  python bench_decoders.py --fixtures fixtures/pyth-devnet.json --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Tuple
+
+from price_report import (
+    PYTH_ACCOUNT_PRODUCT,
+    decode_account,
+    parse_header,
+    parse_mapping_account,
+    parse_product_account,
+)
+from pyth_decode import MappingView, decode_account_view, key_to_str, parse_header_view, product_symbol
+from pyth_fixtures import load_or_synthesize
+
+
+def _best_per_call(fn: Callable[[], object], number: int, repeat: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+def build_cases(mapping_key: str, accounts: Dict[str, bytes]) -> List[Tuple[str, Callable[[], object], Callable[[], object]]]:
+    mapping_blob = accounts[mapping_key]
+    mapping_data = mapping_blob[:parse_header(mapping_blob)[2]]
+    products = [blob for blob in accounts.values() if parse_header(blob)[1] == PYTH_ACCOUNT_PRODUCT]
+    values = [SimpleNamespace(data=blob) for blob in accounts.values()]
+
+    def legacy_products():
+        for blob in products:
+            parse_product_account(blob)[1].get("symbol")
+
+    def view_products():
+        for blob in products:
+            product_symbol(blob)
+
+    def legacy_decode():
+        for value in values:
+            decode_account(value, "bench")
+
+    def view_decode():
+        for value in values:
+            decode_account_view(value, "bench")
+
+    return [
+        ("mapping -> product keys", lambda: parse_mapping_account(mapping_data), lambda: MappingView(mapping_data).product_keys()),
+        ("mapping -> pubkeys", lambda: parse_mapping_account(mapping_data), lambda: list(MappingView(mapping_data).pubkeys())),
+        ("mapping -> raw keys", lambda: parse_mapping_account(mapping_data), lambda: list(MappingView(mapping_data).raw_keys())),
+        ("product -> symbol", legacy_products, view_products),
+        ("account header + trim", legacy_decode, view_decode),
+        ("mapping -> key array", lambda: parse_mapping_account(mapping_data), lambda: MappingView(mapping_data).keys_array()),
+    ]
+
+
+def check_equivalence(mapping_key: str, accounts: Dict[str, bytes]) -> None:
+    mapping_blob = accounts[mapping_key]
+    legacy_keys, legacy_next = parse_mapping_account(mapping_blob)
+    view = MappingView(parse_header_view(mapping_blob)[0])
+    if view.product_keys() != legacy_keys or view.next_key != legacy_next:
+        raise AssertionError("MappingView disagrees with parse_mapping_account")
+    for blob in accounts.values():
+        if parse_header(blob)[1] != PYTH_ACCOUNT_PRODUCT:
+            continue
+        legacy_price, attrs = parse_product_account(blob)
+        price_raw, symbol = product_symbol(blob)
+        if symbol != attrs.get("symbol") or key_to_str(price_raw) != legacy_price:
+            raise AssertionError("product_symbol disagrees with parse_product_account")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Pyth account decoders")
+    parser.add_argument("--fixtures", type=Path, help="Recorded accounts from pyth_fixtures.py (default: synthetic)")
+    parser.add_argument("--number", type=int, default=20, help="Calls per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs per case (best is reported)")
+    args = parser.parse_args(argv)
+
+    mapping_key, accounts = load_or_synthesize(args.fixtures)
+    check_equivalence(mapping_key, accounts)
+
+    print(f"{'case':<26}{'legacy, us':>14}{'view, us':>14}{'speedup':>10}")
+    for name, legacy, view in build_cases(mapping_key, accounts):
+        legacy_time = _best_per_call(legacy, args.number, args.repeat)
+        view_time = _best_per_call(view, args.number, args.repeat)
+        print(f"{name:<26}{legacy_time * 1e6:>14.1f}{view_time * 1e6:>14.1f}{legacy_time / view_time:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,194 @@
+"""Offline benchmarks for the script hot paths against the local JSON-RPC stand-in.
+
+Each case reports wall time, the RPC calls it made (per method, as counted
+by ``rpc_mock``) and the memory it allocated (tracemalloc peak and net).
+Results are written to JSON so runs can be compared over time.
+
+Usage example:
+  python bench_scripts.py --latency-ms 20 --out bench-results.json
+  python bench_scripts.py --latency-ms 20 --compare bench-results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from solders.keypair import Keypair
+
+from common import get_client, send_transfer_transaction, wait_for_confirmation
+from price_report import (
+    PYTH_ACCOUNT_PRICE,
+    PYTH_ACCOUNT_PRODUCT,
+    PYTH_MAPPING_DEVNET,
+    PYTH_SYMBOL_MAP,
+    fetch_pyth_prices,
+    parse_header,
+    parse_mapping_account,
+    parse_price_account,
+    parse_product_account,
+    read_pool_snapshot,
+)
+from rpc_mock import PYTH_PROGRAM, MockRpcServer, default_fixtures
+
+
+@dataclass
+class BenchCase:
+    name: str
+    run: Callable[[], object]
+    # Runs before every timed call and is excluded from the measurements.
+    setup: Optional[Callable[[], None]] = None
+
+
+def _pyth_accounts(fixtures, account_type: int) -> List[Tuple[bytes, int]]:
+    """``(data, version)`` of every fixture Pyth account of ``account_type``."""
+    blobs = []
+    for data, owner in fixtures.accounts.values():
+        if owner != PYTH_PROGRAM:
+            continue
+        version, found_type, _size = parse_header(data)
+        if found_type == account_type:
+            blobs.append((data, version))
+    return blobs
+
+
+def build_cases(server: MockRpcServer, workdir: Path) -> List[BenchCase]:
+    client = get_client(server.url)
+    fixtures = server.fixtures
+    desired = list(PYTH_SYMBOL_MAP.values())
+    mapping_data = fixtures.accounts[PYTH_MAPPING_DEVNET][0]
+    products = [data for data, _version in _pyth_accounts(fixtures, PYTH_ACCOUNT_PRODUCT)]
+    prices = _pyth_accounts(fixtures, PYTH_ACCOUNT_PRICE)
+    index_path = workdir / "pyth-index.json"
+
+    payer = Keypair()
+    recipient = Keypair().pubkey()
+    pending: Dict[str, Any] = {}
+
+    def send_for_confirmation() -> None:
+        pending["sig"] = send_transfer_transaction(client, payer, recipient, 1)
+
+    def warm_index() -> None:
+        if not index_path.exists():
+            fetch_pyth_prices(client, desired, index_path=index_path)
+
+    return [
+        BenchCase("fetch_pyth_prices (mapping walk)", lambda: fetch_pyth_prices(client, desired, index_path=None)),
+        BenchCase(
+            "fetch_pyth_prices (cached index)",
+            lambda: fetch_pyth_prices(client, desired, index_path=index_path),
+            setup=warm_index,
+        ),
+        BenchCase("parse_mapping_account", lambda: parse_mapping_account(mapping_data)),
+        BenchCase("parse_product_account (all)", lambda: [parse_product_account(data) for data in products]),
+        BenchCase(
+            "parse_price_account (all)", lambda: [parse_price_account(data, version) for data, version in prices]
+        ),
+        BenchCase("read_pool_snapshot", lambda: read_pool_snapshot(client, fixtures.swap_info)),
+        BenchCase("send_transfer_transaction", lambda: send_transfer_transaction(client, payer, recipient, 1)),
+        BenchCase(
+            "wait_for_confirmation",
+            lambda: wait_for_confirmation(client, pending["sig"]),
+            setup=send_for_confirmation,
+        ),
+    ]
+
+
+def measure(case: BenchCase, server: MockRpcServer, repeat: int) -> Dict[str, Any]:
+    timings: List[float] = []
+    for _ in range(repeat):
+        if case.setup:
+            case.setup()
+        start = time.perf_counter()
+        case.run()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    if case.setup:
+        case.setup()
+    server.reset_call_counts()
+    case.run()
+    counts = server.call_counts()
+
+    if case.setup:
+        case.setup()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    case.run()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "wall_ms": {
+            "min": round(min(timings), 3),
+            "median": round(statistics.median(timings), 3),
+            "mean": round(statistics.fmean(timings), 3),
+        },
+        "rpc_calls": sum(counts["calls"].values()),
+        "http_requests": counts["http_requests"],
+        "rpc_methods": counts["calls"],
+        "alloc_peak_bytes": peak - before,
+        "alloc_net_bytes": after - before,
+    }
+
+
+def print_results(results: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Any]] = None) -> None:
+    header = f"{'case':<36}{'median ms':>11}{'min ms':>10}{'rpc':>6}{'http':>6}{'peak KiB':>10}"
+    print(header + ("  vs baseline" if baseline else ""))
+    for name, result in results.items():
+        line = (
+            f"{name:<36}{result['wall_ms']['median']:>11.2f}{result['wall_ms']['min']:>10.2f}"
+            f"{result['rpc_calls']:>6}{result['http_requests']:>6}{result['alloc_peak_bytes'] / 1024:>10.1f}"
+        )
+        old = (baseline or {}).get(name)
+        if old:
+            ratio = old["wall_ms"]["median"] / result["wall_ms"]["median"] if result["wall_ms"]["median"] else 0
+            line += f"  {ratio:5.2f}x, rpc {old['rpc_calls']}->{result['rpc_calls']}"
+        print(line)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark script hot paths against a local mock RPC")
+    parser.add_argument("--fixtures", type=Path, help="Recorded Pyth accounts from pyth_fixtures.py (default: synthetic)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency injected into every RPC round trip")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra random latency, uniform in [0, jitter]")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--only", action="append", help="Run only cases whose name contains this text")
+    parser.add_argument("--out", type=Path, help="Write results as JSON")
+    parser.add_argument("--compare", type=Path, help="Earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    fixtures = default_fixtures(args.fixtures)
+    results: Dict[str, Dict[str, Any]] = {}
+    with MockRpcServer(fixtures, latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000) as server:
+        with tempfile.TemporaryDirectory() as workdir:
+            for case in build_cases(server, Path(workdir)):
+                if args.only and not any(text in case.name for text in args.only):
+                    continue
+                results[case.name] = measure(case, server, args.repeat)
+
+    baseline = json.loads(args.compare.read_text())["cases"] if args.compare else None
+    print_results(results, baseline)
+    if args.out:
+        payload = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "repeat": args.repeat,
+            "cases": results,
+        }
+        args.out.write_text(json.dumps(payload, indent=2))
+        print(f"Results written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -9,45 +9,232 @@ Usage example:
     --keypair ~/.config/solana/id.json \
     --recipient 86pmdaDr55XJHXdQvCX1KWQoAVDc49HT6K8mrJWs8EBa \
     --url https://api.devnet.solana.com
+
+Bulk mode closes every empty (or WSOL) token account owned by the keypair,
+for both the Token and Token-2022 programs, packing as many closes as fit
+into each transaction:
+  python3 close_token_account.py --all --keypair ~/.config/solana/id.json --no-confirm
 """
 
 import argparse
 import asyncio
-import json
-import os
 import sys
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
 
 from solana.rpc.async_api import AsyncClient
+from solana.rpc.types import TokenAccountOpts
+from solders.address_lookup_table_account import AddressLookupTable, AddressLookupTableAccount
+from solders.hash import Hash
+from solders.instruction import Instruction
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey
+from solders.signature import Signature
 from solders.transaction import VersionedTransaction
 from solders.message import MessageV0
 from spl.token.instructions import close_account, CloseAccountParams
-from spl.token.constants import TOKEN_PROGRAM_ID
-
-def load_keypair(path: str) -> Keypair:
-    path = os.path.expanduser(path)
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Keypair not found: {path}")
-    data = json.load(open(path, "r"))
-    if isinstance(data, list):
-        b = bytes(data)
-        if len(b) == 64:
-            return Keypair.from_bytes(b)
-        if len(b) == 32:
-            return Keypair.from_seed(b)
-        raise ValueError(f"Unexpected key file length: {len(b)} (expected 32 or 64 ints)")
-    # if someone passed base58 or other format, try bytes decode
-    raise ValueError("Unsupported keypair file format. Expected JSON array of ints (solana CLI format).")
+from spl.token.constants import TOKEN_2022_PROGRAM_ID, TOKEN_PROGRAM_ID, WRAPPED_SOL_MINT
+
+from common import PACKET_DATA_SIZE, load_keypair
+from compute_budget import (
+    ComputeBudgetTuner,
+    add_compute_budget_arguments,
+    placeholder_budget_instructions,
+    tuner_from_args,
+)
+from rpc_profile import add_profile_arguments, configure_profiling, instrument, span
+
+# A transaction may lock at most this many accounts, lookup tables included.
+MAX_TX_ACCOUNT_LOCKS = 64
+TOKEN_PROGRAMS = (TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID)
+
+
+@dataclass
+class ClosableAccount:
+    pubkey: Pubkey
+    program_id: Pubkey
+    mint: str
+    lamports: int
+
+
+def is_closable(info: dict, owner: Pubkey) -> bool:
+    """Empty accounts and WSOL accounts (closing those unwraps the SOL) the owner is allowed to close."""
+    if info.get("state") != "initialized":
+        return False
+    close_authority = info.get("closeAuthority")
+    if close_authority is not None and close_authority != str(owner):
+        return False
+    for extension in info.get("extensions", ()):
+        if extension.get("extension") == "transferFeeAmount" and int(extension["state"]["withheldAmount"]):
+            return False
+    return info["mint"] == str(WRAPPED_SOL_MINT) or int(info["tokenAmount"]["amount"]) == 0
+
+
+async def list_closable_accounts(rpc: AsyncClient, owner: Pubkey) -> List[ClosableAccount]:
+    responses = await asyncio.gather(
+        *(rpc.get_token_accounts_by_owner_json_parsed(owner, TokenAccountOpts(program_id=program)) for program in TOKEN_PROGRAMS)
+    )
+    closable: List[ClosableAccount] = []
+    for program, resp in zip(TOKEN_PROGRAMS, responses):
+        for keyed in resp.value:
+            info = keyed.account.data.parsed["info"]
+            if is_closable(info, owner):
+                closable.append(
+                    ClosableAccount(pubkey=keyed.pubkey, program_id=program, mint=info["mint"], lamports=keyed.account.lamports)
+                )
+    return closable
+
+
+async def load_lookup_table(rpc: AsyncClient, address: Pubkey) -> AddressLookupTableAccount:
+    info = await rpc.get_account_info(address)
+    if info.value is None:
+        raise ValueError(f"Address lookup table not found: {address}")
+    table = AddressLookupTable.deserialize(bytes(info.value.data))
+    return AddressLookupTableAccount(key=address, addresses=list(table.addresses))
+
+
+def close_instruction(account: ClosableAccount, recipient: Pubkey, owner: Pubkey):
+    return close_account(
+        CloseAccountParams(program_id=account.program_id, account=account.pubkey, dest=recipient, owner=owner)
+    )
+
+
+def compile_close_message(
+    accounts: Sequence[ClosableAccount],
+    owner: Pubkey,
+    recipient: Pubkey,
+    blockhash,
+    lookup_tables: Sequence[AddressLookupTableAccount] = (),
+    budget: Sequence[Instruction] = (),
+) -> MessageV0:
+    """``budget`` holds compute-budget instructions to put in front of the closes."""
+    return MessageV0.try_compile(
+        payer=owner,
+        instructions=[*budget, *(close_instruction(account, recipient, owner) for account in accounts)],
+        address_lookup_table_accounts=list(lookup_tables),
+        recent_blockhash=blockhash,
+    )
+
+
+def _fits(message: MessageV0) -> bool:
+    locked = len(message.account_keys) + sum(
+        len(lookup.writable_indexes) + len(lookup.readonly_indexes) for lookup in message.address_table_lookups
+    )
+    if locked > MAX_TX_ACCOUNT_LOCKS:
+        return False
+    signatures = [Signature.default()] * message.header.num_required_signatures
+    return len(bytes(VersionedTransaction.populate(message, signatures))) <= PACKET_DATA_SIZE
+
+
+def pack_close_batches(
+    accounts: Sequence[ClosableAccount],
+    owner: Pubkey,
+    recipient: Pubkey,
+    lookup_tables: Sequence[AddressLookupTableAccount] = (),
+    reserve_compute_budget: bool = False,
+) -> List[List[ClosableAccount]]:
+    """Greedily pack close instructions into messages that fit one transaction."""
+    batches: List[List[ClosableAccount]] = []
+    current: List[ClosableAccount] = []
+    placeholder = Hash.default()
+    budget = placeholder_budget_instructions() if reserve_compute_budget else []
+    for account in accounts:
+        candidate = current + [account]
+        if _fits(compile_close_message(candidate, owner, recipient, placeholder, lookup_tables, budget)):
+            current = candidate
+            continue
+        if not current:
+            raise ValueError(f"Closing {account.pubkey} does not fit in a single transaction")
+        batches.append(current)
+        current = [account]
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def send_close_batch(
+    rpc: AsyncClient,
+    owner_kp: Keypair,
+    recipient: Pubkey,
+    batch: Sequence[ClosableAccount],
+    lookup_tables: Sequence[AddressLookupTableAccount],
+    semaphore: asyncio.Semaphore,
+    tuner: Optional[ComputeBudgetTuner] = None,
+) -> Optional[Signature]:
+    async with semaphore:
+        try:
+            budget: List[Instruction] = []
+            if tuner is not None:
+                closes = [close_instruction(account, recipient, owner_kp.pubkey()) for account in batch]
+                budget = (await tuner.budget_async(closes, owner_kp.pubkey(), lookup_tables)).instructions()
+            latest = (await rpc.get_latest_blockhash()).value
+            with span("sign"):
+                message = compile_close_message(
+                    batch, owner_kp.pubkey(), recipient, latest.blockhash, lookup_tables, budget
+                )
+                tx = VersionedTransaction(message, [owner_kp])
+            sig = (await rpc.send_transaction(tx)).value
+            resp = await rpc.confirm_transaction(
+                sig, commitment="confirmed", last_valid_block_height=latest.last_valid_block_height
+            )
+        except Exception as e:
+            print(f" - batch of {len(batch)} failed: {e}")
+            return None
+        status = resp.value[0]
+        if status is None or status.err is not None:
+            print(f" - {sig}: failed ({None if status is None else status.err})")
+            return None
+        print(f" - {sig}: closed {len(batch)} accounts")
+        return sig
+
+
+async def close_all(args, owner_kp: Keypair, recipient: Pubkey) -> None:
+    owner = owner_kp.pubkey()
+    async with instrument(AsyncClient(args.url)) as rpc:
+        accounts = await list_closable_accounts(rpc, owner)
+        if not accounts:
+            print("No empty or WSOL token accounts to close.")
+            return
+        lookup_tables = [await load_lookup_table(rpc, Pubkey.from_string(args.lookup_table))] if args.lookup_table else []
+        tuner = tuner_from_args(rpc, args)
+        batches = pack_close_batches(accounts, owner, recipient, lookup_tables, reserve_compute_budget=tuner is not None)
+        rent = sum(account.lamports for account in accounts)
+        print(
+            f"Closable token accounts: {len(accounts)} "
+            f"({sum(1 for a in accounts if a.mint == str(WRAPPED_SOL_MINT))} WSOL), "
+            f"{len(batches)} transactions, {rent / 1e9:.9f} SOL to reclaim"
+        )
+
+        if not args.no_confirm:
+            ans = input("Proceed to close these token accounts? (y/N) > ").strip().lower()
+            if ans != "y":
+                print("Aborted by user.")
+                return
+
+        semaphore = asyncio.Semaphore(args.max_in_flight)
+        sigs = await asyncio.gather(
+            *(send_close_batch(rpc, owner_kp, recipient, batch, lookup_tables, semaphore, tuner) for batch in batches)
+        )
+        closed = [account for batch, sig in zip(batches, sigs) if sig is not None for account in batch]
+        reclaimed = sum(account.lamports for account in closed)
+        print(f"Closed {len(closed)}/{len(accounts)} accounts, reclaimed {reclaimed / 1e9:.9f} SOL to {recipient}")
+
 
 async def main():
     p = argparse.ArgumentParser()
-    p.add_argument("--account", required=True, help="Token account pubkey to close (e.g. Ek5q...)")
+    target = p.add_mutually_exclusive_group(required=True)
+    target.add_argument("--account", help="Token account pubkey to close (e.g. Ek5q...)")
+    target.add_argument("--all", action="store_true", help="Close every empty or WSOL token account owned by the keypair")
     p.add_argument("--recipient", required=False, help="Where to send recovered SOL (defaults to keypair pubkey)")
     p.add_argument("--keypair", required=False, default="~/.config/solana/id.json", help="Path to signer keypair (default ~/.config/solana/id.json)")
     p.add_argument("--url", required=False, default="https://api.devnet.solana.com", help="RPC URL (default devnet)")
     p.add_argument("--no-confirm", action="store_true", help="Do not ask for interactive confirmation")
+    p.add_argument("--max-in-flight", type=int, default=4, help="--all: transactions sent concurrently")
+    p.add_argument("--lookup-table", help="--all: existing address lookup table holding the accounts to close")
+    add_compute_budget_arguments(p)
+    add_profile_arguments(p)
     args = p.parse_args()
+    configure_profiling(args)
 
     try:
         owner_kp = load_keypair(args.keypair)
@@ -56,9 +243,17 @@ async def main():
         sys.exit(1)
 
     payer_pubkey = owner_kp.pubkey()
-    token_account = Pubkey.from_string(args.account)
     recipient = Pubkey.from_string(args.recipient) if args.recipient else payer_pubkey
 
+    if args.all:
+        print(f"RPC: {args.url}")
+        print(f"Owner: {payer_pubkey}")
+        print(f"Recipient (where recovered SOL will go): {recipient}")
+        await close_all(args, owner_kp, recipient)
+        return
+
+    token_account = Pubkey.from_string(args.account)
+
     print(f"RPC: {args.url}")
     print(f"Token account to close: {token_account}")
     print(f"Payer/owner: {payer_pubkey}")
@@ -70,7 +265,7 @@ async def main():
             print("Aborted by user.")
             return
 
-    rpc = AsyncClient(args.url)
+    rpc = instrument(AsyncClient(args.url))
     async with rpc:
         # 1) Basic checks
         info = await rpc.get_account_info_json_parsed(token_account)
@@ -99,13 +294,18 @@ async def main():
             )
         )
 
-        # 3) Build and sign versioned transaction
+        # 3) Optionally size the compute budget and priority fee, then build and sign the versioned transaction
+        instructions = [close_ix]
+        tuner = tuner_from_args(rpc, args)
+        if tuner is not None:
+            instructions = await tuner.tune_async(instructions, payer_pubkey)
+
         latest = await rpc.get_latest_blockhash()
         recent_blockhash = latest.value.blockhash
 
         message = MessageV0.try_compile(
             payer=payer_pubkey,
-            instructions=[close_ix],
+            instructions=instructions,
             address_lookup_table_accounts=[],
             recent_blockhash=recent_blockhash,
         )
@@ -113,7 +313,8 @@ async def main():
         # signers: include payer; if owner != payer you'd include owner Keypair too (here they are same)
         signers = [owner_kp]
 
-        tx = VersionedTransaction(message, signers)
+        with span("sign"):
+            tx = VersionedTransaction(message, signers)
 
         print("Sending close transaction...")
         resp = await rpc.send_transaction(tx)
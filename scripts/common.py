@@ -1,23 +1,265 @@
+import asyncio
+import csv
 import json
 import os
+import struct
+import threading
 import time
+from dataclasses import dataclass, replace
 from decimal import ROUND_DOWN, Decimal
-from typing import Optional, Union
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Type, Union
 
+import httpx
 from solana.constants import LAMPORTS_PER_SOL
 from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment
+from solana.rpc.core import RPCException
+from solana.rpc.types import DataSliceOpts, MemcmpOpts, TxOpts
+from solana.rpc.websocket_api import connect
+from solders.hash import Hash
+from solders.instruction import Instruction
 from solders.keypair import Keypair
 from solders.message import Message
 from solders.pubkey import Pubkey
+from solders.rpc.errors import (
+    InvalidParamsMessage,
+    RpcCustomErrorFieldless,
+    SendTransactionPreflightFailureMessage,
+    TransactionPrecompileVerificationFailureMessage,
+    UnsupportedTransactionVersionMessage,
+)
+from solders.rpc.responses import (
+    GetAccountInfoResp,
+    GetBalanceResp,
+    GetMultipleAccountsResp,
+    GetProgramAccountsResp,
+    GetTokenAccountBalanceResp,
+    RequestAirdropResp,
+    RPCError,
+    SendTransactionResp,
+    SignatureNotification,
+)
 from solders.signature import Signature
 from solders.system_program import TransferParams, transfer
 from solders.transaction import Transaction
+from solders.transaction_status import TransactionConfirmationStatus, TransactionErrorFieldless
+
+from compute_budget import MAX_COMPUTE_UNITS, ComputeBudgetTuner, placeholder_budget_instructions
+from keystore import Keystore, is_keystore
+from rpc_profile import count_retry, instrument, span
 
 DEFAULT_RPC = os.getenv("SOLANA_RPC_URL") or "http://solana-validator:8899"
 
+# Maximum serialized transaction size accepted by the cluster.
+PACKET_DATA_SIZE = 1232
+COMPUTE_BUDGET_PROGRAM_ID = Pubkey.from_string("ComputeBudget111111111111111111111111111111")
+LAMPORTS_PER_SIGNATURE = 5000
+# Compute units each instruction gets when no SetComputeUnitLimit is present.
+DEFAULT_INSTRUCTION_COMPUTE_UNITS = 200_000
+# getSignatureStatuses accepts at most this many signatures per request.
+MAX_SIGNATURE_STATUSES = 256
+# Airdrops are tracked without a block height (see track_airdrop); give up on them after this long.
+# A blockhash lives ~150 blocks (about a minute), plus a margin for the faucet's own latency.
+AIRDROP_CONFIRM_TIMEOUT_SEC = 90.0
+# getMultipleAccounts accepts at most this many keys per request.
+MAX_MULTIPLE_ACCOUNTS = 100
+# sendTransaction calls packed into one JSON-RPC batch by TransactionSender.
+DEFAULT_SEND_BATCH = 100
+_LANDED_STATUSES = (
+    TransactionConfirmationStatus.Confirmed,
+    TransactionConfirmationStatus.Finalized,
+    "confirmed",
+    "finalized",
+)
+
+
+# Keep-alive connection pool shared by every call made through one client.
+DEFAULT_POOL_SIZE = 8
+DEFAULT_RPC_TIMEOUT = 10.0
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+
+_CLIENTS: Dict[Tuple[str, int, float], Client] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_client(
+    rpc_url: Optional[str] = None,
+    pool_size: int = DEFAULT_POOL_SIZE,
+    timeout: float = DEFAULT_RPC_TIMEOUT,
+) -> Client:
+    """Return a client backed by a pooled keep-alive HTTP session.
+
+    Clients are cached per (url, pool size, timeout), so helpers that call
+    ``get_client`` repeatedly reuse the same open connections. With profiling
+    enabled (``--profile``) the client's round trips are recorded.
+    """
+    url = rpc_url or DEFAULT_RPC
+    key = (url, pool_size, timeout)
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = Client(url, timeout=timeout)
+            client._provider.session.close()
+            client._provider.session = httpx.Client(
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=pool_size,
+                    max_keepalive_connections=pool_size,
+                    keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY,
+                ),
+            )
+            _CLIENTS[key] = instrument(client)
+    return client
+
+
+class PendingResponse:
+    """Placeholder for a call queued on an ``RpcBatch``; ``get()`` works once the batch ran."""
+
+    __slots__ = ("_response", "_done")
+
+    def __init__(self) -> None:
+        self._response: Any = None
+        self._done = False
+
+    def _set(self, response: Any) -> None:
+        self._response = response
+        self._done = True
+
+    def get(self) -> Any:
+        if not self._done:
+            raise RuntimeError("RPC batch has not been executed yet")
+        return self._response
+
+
+class RpcBatch:
+    """Collect several RPC calls and send them as a single JSON-RPC batch POST.
+
+    Works with both ``Client`` (``with RpcBatch(client) as batch``) and
+    ``AsyncClient`` (``async with``). Responses are parsed into the same typed
+    objects the regular client methods return; an RPC error in any slot raises
+    ``RPCException`` when the batch is executed, unless ``raise_errors`` is
+    false, in which case that slot resolves to the error object instead.
+    """
+
+    def __init__(self, client: Union[Client, AsyncClient], raise_errors: bool = True):
+        self.client = client
+        self.raise_errors = raise_errors
+        self._bodies: List[Any] = []
+        self._parsers: List[Type[Any]] = []
+        self._pending: List[PendingResponse] = []
+
+    def __len__(self) -> int:
+        return len(self._bodies)
+
+    def _add(self, body: Any, parser: Type[Any]) -> PendingResponse:
+        pending = PendingResponse()
+        self._bodies.append(body)
+        self._parsers.append(parser)
+        self._pending.append(pending)
+        return pending
+
+    def get_balance(self, pubkey: Pubkey, commitment: Optional[Commitment] = None) -> PendingResponse:
+        return self._add(self.client._get_balance_body(pubkey, commitment), GetBalanceResp)
+
+    def get_token_account_balance(
+        self, pubkey: Pubkey, commitment: Optional[Commitment] = None
+    ) -> PendingResponse:
+        body = self.client._get_token_account_balance_body(pubkey, commitment)
+        return self._add(body, GetTokenAccountBalanceResp)
 
-def get_client(rpc_url: Optional[str] = None) -> Client:
-    return Client(rpc_url or DEFAULT_RPC)
+    def get_account_info(self, pubkey: Pubkey, commitment: Optional[Commitment] = None) -> PendingResponse:
+        body = self.client._get_account_info_body(pubkey, commitment, "base64", None)
+        return self._add(body, GetAccountInfoResp)
+
+    def get_multiple_accounts(
+        self,
+        pubkeys: List[Pubkey],
+        commitment: Optional[Commitment] = None,
+        data_slice: Optional[DataSliceOpts] = None,
+    ) -> PendingResponse:
+        body = self.client._get_multiple_accounts_body(pubkeys, commitment, "base64", data_slice)
+        return self._add(body, GetMultipleAccountsResp)
+
+    def get_program_accounts(
+        self,
+        pubkey: Pubkey,
+        commitment: Optional[Commitment] = None,
+        data_slice: Optional[DataSliceOpts] = None,
+        filters: Optional[Sequence[Union[int, MemcmpOpts]]] = None,
+    ) -> PendingResponse:
+        body = self.client._get_program_accounts_body(pubkey, commitment, "base64", data_slice, filters)
+        return self._add(body, GetProgramAccountsResp)
+
+    def request_airdrop(
+        self, pubkey: Pubkey, lamports: int, commitment: Optional[Commitment] = None
+    ) -> PendingResponse:
+        return self._add(self.client._request_airdrop_body(pubkey, lamports, commitment), RequestAirdropResp)
+
+    def send_raw_transaction(self, txn: bytes, opts: TxOpts) -> PendingResponse:
+        return self._add(self.client._send_raw_transaction_body(txn, opts), SendTransactionResp)
+
+    def _resolve(self, results: Sequence[Any]) -> None:
+        # The validator answers a batch in request order; every body carries the
+        # same id, so responses are matched positionally.
+        bodies, pending = self._bodies, self._pending
+        self._bodies, self._parsers, self._pending = [], [], []
+        if len(results) != len(bodies):
+            raise RPCException(f"Expected {len(bodies)} batch responses, got {len(results)}")
+        for slot, result in zip(pending, results):
+            if self.raise_errors and isinstance(result, RPCError.__args__):
+                raise RPCException(result)
+            slot._set(result)
+
+    def execute(self) -> None:
+        if self._bodies:
+            results = self.client._provider.make_batch_request(tuple(self._bodies), tuple(self._parsers))
+            self._resolve(results)
+
+    async def execute_async(self) -> None:
+        if self._bodies:
+            results = await self.client._provider.make_batch_request(tuple(self._bodies), tuple(self._parsers))
+            self._resolve(results)
+
+    def __enter__(self) -> "RpcBatch":
+        return self
+
+    def __exit__(self, exc_type, _exc, _tb) -> None:
+        if exc_type is None:
+            self.execute()
+
+    async def __aenter__(self) -> "RpcBatch":
+        return self
+
+    async def __aexit__(self, exc_type, _exc, _tb) -> None:
+        if exc_type is None:
+            await self.execute_async()
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Block until ``tokens`` are available, then take them."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
 
 
 def parse_pubkey(addr: str) -> Pubkey:
@@ -32,32 +274,277 @@ def lamports_from_sol(sol_str: str) -> int:
     return int(val)
 
 
-def wait_for_confirmation(client: Client, signature: Union[str, Signature], timeout_sec: float = 30.0) -> bool:
-    sig_obj = Signature.from_string(signature) if isinstance(signature, str) else signature
-    start = time.time()
-    while time.time() - start < timeout_sec:
-        try:
-            resp = client.get_signature_statuses([sig_obj])
-            val = resp.value[0] if resp.value else None
-            if val is not None:
+@dataclass
+class TrackedSignature:
+    signature: Signature
+    last_valid_block_height: Optional[int]
+    submitted_at: float
+    status: str = "pending"
+    err: object = None
+    landed_at: Optional[float] = None
+    sends: int = 0
+
+    @property
+    def latency(self) -> Optional[float]:
+        """Seconds between submission and the status poll that saw it land."""
+        return None if self.landed_at is None else self.landed_at - self.submitted_at
+
+
+class ConfirmationTracker:
+    """Track many signatures at once.
+
+    Pending signatures are polled together (up to 256 per getSignatureStatuses
+    call) with adaptive backoff, and expire once the cluster's block height
+    passes the lastValidBlockHeight of the blockhash they were signed with.
+    """
+
+    def __init__(
+            self,
+            client: Client,
+            min_interval: float = 0.25,
+            max_interval: float = 2.0,
+            backoff: float = 1.5,
+    ):
+        self.client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.tracked: Dict[Signature, TrackedSignature] = {}
+        self._interval = min_interval
+
+    def add(
+            self,
+            signature: Union[str, Signature],
+            last_valid_block_height: Optional[int] = None,
+            submitted_at: Optional[float] = None,
+    ) -> TrackedSignature:
+        sig_obj = Signature.from_string(signature) if isinstance(signature, str) else signature
+        tracked = TrackedSignature(
+            signature=sig_obj,
+            last_valid_block_height=last_valid_block_height,
+            submitted_at=time.time() if submitted_at is None else submitted_at,
+        )
+        self.tracked[sig_obj] = tracked
+        return tracked
+
+    def pending(self) -> List[TrackedSignature]:
+        return [t for t in self.tracked.values() if t.status == "pending"]
+
+    def _resolve(self, tracked: TrackedSignature, err: object, now: float) -> None:
+        tracked.landed_at = now
+        if err is not None:
+            tracked.status = "failed"
+            tracked.err = err
+        else:
+            tracked.status = "confirmed"
+
+    def _expire(self, block_height: int) -> int:
+        expired = 0
+        for tracked in self.pending():
+            if tracked.last_valid_block_height is not None and block_height > tracked.last_valid_block_height:
+                tracked.status = "expired"
+                expired += 1
+        return expired
+
+    def poll_once(self) -> int:
+        """Poll every pending signature once; return how many were resolved or expired."""
+        pending = self.pending()
+        resolved = 0
+        for start in range(0, len(pending), MAX_SIGNATURE_STATUSES):
+            chunk = pending[start:start + MAX_SIGNATURE_STATUSES]
+            resp = self.client.get_signature_statuses([t.signature for t in chunk])
+            now = time.time()
+            for tracked, val in zip(chunk, resp.value or []):
+                if val is None:
+                    continue
                 status = getattr(val, "confirmation_status", None)
                 err = getattr(val, "err", None)
                 confirmations = getattr(val, "confirmations", None)
-                if err is not None:
-                    print(f"Ошибка транзакции: {err}")
-                    return False
-                if status in ("confirmed", "finalized") or confirmations is None:
-                    return True
-            time.sleep(0.5)
-        except Exception as e:
-            print(f"Ошибка при проверке статуса: {e}")
-            time.sleep(0.5)
-    print("Таймаут: транзакция не подтверждена")
-    return False
+                if err is not None or status in _LANDED_STATUSES or confirmations is None:
+                    self._resolve(tracked, err, now)
+                    resolved += 1
+        # Only ask for the block height when something could actually expire.
+        if any(t.last_valid_block_height is not None for t in self.pending()):
+            resolved += self._expire(self.client.get_block_height().value)
+        return resolved
+
+    def wait(self, timeout_sec: Optional[float] = None) -> List[TrackedSignature]:
+        """Poll until nothing is pending; signatures without a block height give up after ``timeout_sec``."""
+        start = time.time()
+        while self.pending():
+            try:
+                progressed = self.poll_once()
+            except Exception as e:
+                print(f"Ошибка при проверке статуса: {e}")
+                progressed = 0
+            if not self.pending():
+                break
+            if timeout_sec is not None and time.time() - start >= timeout_sec:
+                for tracked in self.pending():
+                    tracked.status = "expired"
+                break
+            self._interval = self.min_interval if progressed else min(self._interval * self.backoff, self.max_interval)
+            time.sleep(self._interval)
+        return list(self.tracked.values())
+
+    def wait_ws(
+            self,
+            ws_url: str,
+            timeout_sec: Optional[float] = None,
+            tick: Optional[Callable[[], object]] = None,
+            tick_interval: float = 2.0,
+    ) -> List[TrackedSignature]:
+        """Like :meth:`wait`, but let ``signatureSubscribe`` notifications drive resolution.
+
+        ``tick`` (a rebroadcast, say) runs every ``tick_interval`` seconds while waiting.
+        """
+        asyncio.run(self._wait_ws(ws_url, timeout_sec, tick, tick_interval))
+        return list(self.tracked.values())
+
+    async def _wait_ws(
+            self,
+            ws_url: str,
+            timeout_sec: Optional[float],
+            tick: Optional[Callable[[], object]] = None,
+            tick_interval: float = 2.0,
+    ) -> None:
+        start = time.time()
+        next_tick = time.monotonic() + tick_interval
+        async with connect(ws_url) as ws:
+            for tracked in self.pending():
+                await ws.signature_subscribe(tracked.signature, commitment="confirmed")
+            # Anything that landed before its subscription went out will never be notified.
+            await asyncio.to_thread(self.poll_once)
+            while self.pending():
+                if timeout_sec is not None and time.time() - start >= timeout_sec:
+                    for tracked in self.pending():
+                        tracked.status = "expired"
+                    break
+                recv_timeout = self.max_interval
+                if tick is not None:
+                    if time.monotonic() >= next_tick:
+                        await asyncio.to_thread(tick)
+                        next_tick = time.monotonic() + tick_interval
+                    recv_timeout = min(recv_timeout, max(0.0, next_tick - time.monotonic()))
+                try:
+                    messages = await asyncio.wait_for(ws.recv(), timeout=recv_timeout)
+                except asyncio.TimeoutError:
+                    block_height = await asyncio.to_thread(lambda: self.client.get_block_height().value)
+                    self._expire(block_height)
+                    continue
+                now = time.time()
+                for message in messages:
+                    if not isinstance(message, SignatureNotification):
+                        continue
+                    signature = ws.subscriptions[message.subscription].signature
+                    tracked = self.tracked.get(signature)
+                    if tracked is not None and tracked.status == "pending":
+                        self._resolve(tracked, message.result.value.err, now)
+
+    def confirm(self, ws_url: Optional[str] = None, timeout_sec: Optional[float] = None) -> List[TrackedSignature]:
+        """Wait with ``signatureSubscribe`` when a websocket URL is given, otherwise by polling."""
+        if ws_url:
+            return self.wait_ws(ws_url, timeout_sec)
+        return self.wait(timeout_sec)
+
+    def latencies(self) -> Dict[Signature, float]:
+        return {sig: t.latency for sig, t in self.tracked.items() if t.latency is not None}
+
+
+def track_airdrop(tracker: ConfirmationTracker, signature: Union[str, Signature]) -> TrackedSignature:
+    """Track a faucet airdrop by time rather than by block height.
+
+    The faucet signs with a blockhash of its own, fetched after ours, so the
+    lastValidBlockHeight we could read up front is only a lower bound on the
+    real one: expiring at it would mark an airdrop that is still landing as
+    lost. Wait with ``timeout_sec=AIRDROP_CONFIRM_TIMEOUT_SEC`` instead.
+    """
+    return tracker.add(signature, last_valid_block_height=None)
+
+
+def wait_for_confirmation(
+        client: Client,
+        signature: Union[str, Signature],
+        timeout_sec: float = 30.0,
+        last_valid_block_height: Optional[int] = None,
+) -> bool:
+    tracker = ConfirmationTracker(client)
+    tracked = tracker.add(signature, last_valid_block_height)
+    tracker.wait(timeout_sec)
+    if tracked.status == "failed":
+        print(f"Ошибка транзакции: {tracked.err}")
+        return False
+    if tracked.status != "confirmed":
+        print("Таймаут: транзакция не подтверждена")
+        return False
+    return True
+
+
+def report_confirmation(tracked: TrackedSignature) -> None:
+    if tracked.status == "confirmed":
+        print(f"Статус: ✅ подтверждено за {tracked.latency:.2f} с")
+    elif tracked.status == "failed":
+        print(f"Статус: ❌ ошибка транзакции: {tracked.err}")
+    elif tracked.status == "expired":
+        print("Статус: ⌛ blockhash истёк, транзакция не попала в блок")
+    elif tracked.status == "rejected":
+        print(f"Статус: ❌ узел отклонил транзакцию: {tracked.err}")
+    else:
+        print("Статус: ⏳ не подтверждено (проверь позже)")
 
 
-def load_keypair(path: Optional[str] = None) -> Keypair:
-    path = os.path.expanduser(path or "~/.config/solana/id.json")
+_KEYSTORES: Dict[str, Tuple[Tuple[int, int], Keystore]] = {}
+_KEYPAIRS: Dict[str, Tuple[Tuple[int, int], Keypair]] = {}
+
+
+def _file_identity(path: str) -> Tuple[int, int]:
+    """(inode, mtime): changes when a file is rewritten in place or replaced by a rename."""
+    st = os.stat(path)
+    return st.st_ino, st.st_mtime_ns
+
+
+def open_keystore(path: str) -> Keystore:
+    """Memory-map a keystore once per process and reuse it while the file is unchanged."""
+    path = os.path.realpath(os.path.expanduser(path))
+    identity = _file_identity(path)
+    cached = _KEYSTORES.get(path)
+    if cached is not None:
+        if cached[0] == identity:
+            return cached[1]
+        cached[1].close()
+    keystore = Keystore(path)
+    _KEYSTORES[path] = (identity, keystore)
+    return keystore
+
+
+def _split_keystore_spec(path: str) -> Tuple[str, Optional[int]]:
+    """``wallets.ks:17`` -> (``wallets.ks``, 17) when the part before the colon is a keystore."""
+    base, sep, index = path.rpartition(":")
+    if sep and index.lstrip("-").isdigit() and is_keystore(os.path.expanduser(base)):
+        return base, int(index)
+    return path, None
+
+
+def load_keypair(path: Optional[str] = None, index: Optional[int] = None) -> Keypair:
+    """Load a solana CLI JSON keypair, or record ``index`` of a keystore (also ``path:index``)."""
+    path, spec_index = _split_keystore_spec(path or "~/.config/solana/id.json")
+    path = os.path.expanduser(path)
+    if index is None:
+        index = spec_index
+    if is_keystore(path):
+        return open_keystore(path).keypair(index or 0)
+    # Parsed keypairs are kept while the file is unchanged, which only matters to a resident process.
+    real_path = os.path.realpath(path)
+    identity = _file_identity(real_path)
+    cached = _KEYPAIRS.get(real_path)
+    if cached is not None and cached[0] == identity:
+        return cached[1]
+    keypair = _read_keypair_json(real_path)
+    _KEYPAIRS[real_path] = (identity, keypair)
+    return keypair
+
+
+def _read_keypair_json(path: str) -> Keypair:
     with open(path, "r") as f:
         data = json.load(f)
     if isinstance(data, list):
@@ -66,38 +553,271 @@ def load_keypair(path: Optional[str] = None) -> Keypair:
         secret = bytes(data["secretKey"])
     else:
         raise ValueError("Неизвестный формат ключа, ожидаю массив байт или поле secretKey")
+    if len(secret) == 32:
+        return Keypair.from_seed(secret)
     if len(secret) != 64:
-        raise ValueError(f"Длина секретного ключа {len(secret)} байт, ожидаю 64")
+        raise ValueError(f"Длина секретного ключа {len(secret)} байт, ожидаю 64 (или 32 байта seed)")
     return Keypair.from_bytes(secret)
 
 
-def estimate_simple_transfer_fee(client: Client, from_pub: Pubkey, to_pub: Pubkey, retries: int = 3) -> int:
+def load_keypairs(path: str, start: int = 0, stop: Optional[int] = None) -> Iterator[Keypair]:
+    """Lazily yield keypairs ``start:stop`` of a keystore straight from the memory map."""
+    return open_keystore(path).keypairs(start, stop)
+
+
+@dataclass
+class BlockhashInfo:
+    blockhash: Hash
+    last_valid_block_height: int
+    fetched_at: float
+
+
+class BlockhashProvider:
+    """Keep one recent blockhash warm for every transaction builder in the process.
+
+    ``get()`` returns the cached blockhash while it is younger than
+    ``max_age``; ``start()`` runs a daemon thread that refreshes it every
+    ``refresh_interval`` seconds so callers never wait on the RPC node.
+    Starts and stops are counted, so a shared provider keeps refreshing
+    until its last user stops it.
+    """
+
+    def __init__(self, client: Client, refresh_interval: float = 20.0, max_age: float = 30.0):
+        self.client = client
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self._current: Optional[BlockhashInfo] = None
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[BlockhashInfo], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._users = 0
+
+    def on_rotate(self, callback: Callable[[BlockhashInfo], None]) -> None:
+        self._listeners.append(callback)
+
+    def refresh(self) -> BlockhashInfo:
+        value = self.client.get_latest_blockhash().value
+        info = BlockhashInfo(
+            blockhash=value.blockhash,
+            last_valid_block_height=value.last_valid_block_height,
+            fetched_at=time.time(),
+        )
+        with self._lock:
+            rotated = self._current is None or self._current.blockhash != info.blockhash
+            self._current = info
+        if rotated:
+            for callback in self._listeners:
+                callback(info)
+        return info
+
+    def get(self) -> BlockhashInfo:
+        with self._lock:
+            current = self._current
+        if current is None or time.time() - current.fetched_at > self.max_age:
+            return self.refresh()
+        return current
+
+    def start(self) -> "BlockhashProvider":
+        with self._lock:
+            self._users += 1
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="blockhash-provider", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        with self._lock:
+            self._users = max(0, self._users - 1)
+            if self._users:
+                return
+            thread, self._thread = self._thread, None
+            self._stop.set()
+        if thread is not None:
+            thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Ошибка при обновлении blockhash: {e}")
+            self._stop.wait(self.refresh_interval)
+
+    def __enter__(self) -> "BlockhashProvider":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+_PROVIDERS: Dict[int, BlockhashProvider] = {}
+_FEE_CACHES: Dict[int, "FeeCache"] = {}
+
+
+def get_blockhash_provider(client: Client) -> BlockhashProvider:
+    """The process-wide ``BlockhashProvider`` of ``client``, so a resident process keeps one blockhash warm."""
+    with _CLIENTS_LOCK:
+        provider = _PROVIDERS.get(id(client))
+        if provider is None:
+            provider = _PROVIDERS[id(client)] = BlockhashProvider(client)
+    return provider
+
+
+def get_fee_cache(client: Client) -> "FeeCache":
+    """The process-wide ``FeeCache`` of ``client``, invalidated when its shared blockhash rotates."""
+    provider = get_blockhash_provider(client)
+    with _CLIENTS_LOCK:
+        fee_cache = _FEE_CACHES.get(id(client))
+        if fee_cache is None:
+            fee_cache = _FEE_CACHES[id(client)] = FeeCache(client, provider)
+    return fee_cache
+
+
+def message_shape(message: Message) -> Tuple[int, Tuple[bytes, ...]]:
+    """Fee-relevant shape of a message: signature count and its compute-budget instructions (limit and price)."""
+    keys = message.account_keys
+    budget = tuple(
+        bytes(ix.data) for ix in message.instructions if keys[ix.program_id_index] == COMPUTE_BUDGET_PROGRAM_ID
+    )
+    return message.header.num_required_signatures, budget
+
+
+def estimate_message_fee(message: Message) -> int:
+    """Signature fee plus the priority fee its compute-budget instructions ask for, computed locally.
+
+    The fallback for when getFeeForMessage returns null (a blockhash the node does not know yet).
+    """
+    signatures, budget = message_shape(message)
+    limit, price = None, 0
+    for data in budget:
+        if data[:1] == b"\x02":
+            limit = struct.unpack_from("<I", data, 1)[0]
+        elif data[:1] == b"\x03":
+            price = struct.unpack_from("<Q", data, 1)[0]
+    if limit is None:
+        limit = min(MAX_COMPUTE_UNITS, DEFAULT_INSTRUCTION_COMPUTE_UNITS * (len(message.instructions) - len(budget)))
+    return signatures * LAMPORTS_PER_SIGNATURE + -(-limit * price // 1_000_000)
+
+
+class FeeCache:
+    """Cache getFeeForMessage results per message shape until the blockhash rotates.
+
+    A null answer is not cached: the local estimate is returned instead, and
+    the node is asked again once the message carries a different blockhash.
+    """
+
+    def __init__(self, client: Client, provider: Optional[BlockhashProvider] = None):
+        self.client = client
+        self._fees: Dict[Tuple[int, Tuple[bytes, ...]], int] = {}
+        # Shapes the node returned null for, with the blockhash it did not know.
+        self._misses: Dict[Tuple[int, Tuple[bytes, ...]], Hash] = {}
+        self._lock = threading.Lock()
+        if provider is not None:
+            provider.on_rotate(self.invalidate)
+
+    def invalidate(self, _info: Optional[BlockhashInfo] = None) -> None:
+        with self._lock:
+            self._fees.clear()
+            self._misses.clear()
+
+    def fee_for(self, message: Message) -> int:
+        shape = message_shape(message)
+        with self._lock:
+            fee = self._fees.get(shape)
+            missed = self._misses.get(shape)
+        if fee is not None:
+            return fee
+        if missed == message.recent_blockhash:
+            return estimate_message_fee(message)
+        value = self.client.get_fee_for_message(message).value
+        if value is None:
+            with self._lock:
+                self._misses[shape] = message.recent_blockhash
+            return estimate_message_fee(message)
+        fee = int(value)
+        with self._lock:
+            self._fees[shape] = fee
+            self._misses.pop(shape, None)
+        return fee
+
+
+def estimate_simple_transfer_fee(
+        client: Client,
+        from_pub: Pubkey,
+        to_pub: Pubkey,
+        retries: int = 3,
+        provider: Optional[BlockhashProvider] = None,
+        fee_cache: Optional[FeeCache] = None,
+        tuner: Optional[ComputeBudgetTuner] = None,
+) -> int:
     for attempt in range(retries):
         try:
-            bh_resp = client.get_latest_blockhash()
-            blockhash = bh_resp.value.blockhash
-            ix = transfer(TransferParams(from_pubkey=from_pub, to_pubkey=to_pub, lamports=1))
-            msg = Message.new_with_blockhash([ix], payer=from_pub, blockhash=blockhash)
+            blockhash = provider.get().blockhash if provider else client.get_latest_blockhash().value.blockhash
+            ixs = transfer_instructions(from_pub, [(to_pub, 1)])
+            if tuner is not None:
+                ixs = tuner.tune(ixs, from_pub)
+            msg = Message.new_with_blockhash(ixs, payer=from_pub, blockhash=blockhash)
+            if fee_cache is not None:
+                return fee_cache.fee_for(msg)
             fee_resp = client.get_fee_for_message(msg)
             fee = fee_resp.value
-            return int(fee) if fee is not None else 5000
+            return int(fee) if fee is not None else estimate_message_fee(msg)
         except Exception as e:
             print(f"Ошибка при оценке комиссии (попытка {attempt + 1}/{retries}): {e}")
             if attempt < retries - 1:
+                count_retry("getFeeForMessage")
                 time.sleep(0.5)
     print("Не удалось оценить комиссию, используется значение по умолчанию: 5000 лампортов")
     return 5000
 
 
+def transfer_instructions(from_pub: Pubkey, transfers: Sequence[Tuple[Pubkey, int]]) -> List[Instruction]:
+    return [
+        transfer(TransferParams(from_pubkey=from_pub, to_pubkey=to_pub, lamports=lamports))
+        for to_pub, lamports in transfers
+    ]
+
+
+def build_transfer_transaction(
+        from_keypair: Keypair,
+        transfers: Sequence[Tuple[Pubkey, int]],
+        blockhash: Hash,
+        tuner: Optional[ComputeBudgetTuner] = None,
+        reserve_compute_budget: bool = False,
+) -> Transaction:
+    """Sign a transfer.
+
+    ``tuner`` prepends tuned compute-budget instructions; ``reserve_compute_budget``
+    prepends same-sized placeholders instead, for sizing transactions while packing.
+    """
+    ixs = transfer_instructions(from_keypair.pubkey(), transfers)
+    if tuner is not None:
+        ixs = tuner.tune(ixs, from_keypair.pubkey())
+    elif reserve_compute_budget:
+        ixs = placeholder_budget_instructions() + ixs
+    with span("sign"):
+        msg = Message.new_with_blockhash(ixs, payer=from_keypair.pubkey(), blockhash=blockhash)
+        tx = Transaction.new_unsigned(msg)
+        tx.sign([from_keypair], blockhash)
+    return tx
+
+
 def send_transfer_transaction(
-        client: Client, from_keypair: Keypair, to_pub: Pubkey, lamports: int
+        client: Client,
+        from_keypair: Keypair,
+        to_pub: Pubkey,
+        lamports: int,
+        blockhash: Optional[Hash] = None,
+        extra_transfers: Sequence[Tuple[Pubkey, int]] = (),
+        provider: Optional[BlockhashProvider] = None,
+        tuner: Optional[ComputeBudgetTuner] = None,
 ) -> Optional[Signature]:
     try:
-        ix = transfer(TransferParams(from_pubkey=from_keypair.pubkey(), to_pubkey=to_pub, lamports=lamports))
-        blockhash = client.get_latest_blockhash().value.blockhash
-        msg = Message.new_with_blockhash([ix], payer=from_keypair.pubkey(), blockhash=blockhash)
-        tx = Transaction.new_unsigned(msg)
-        tx.sign([from_keypair], blockhash)
+        if blockhash is None:
+            blockhash = provider.get().blockhash if provider else client.get_latest_blockhash().value.blockhash
+        tx = build_transfer_transaction(from_keypair, [(to_pub, lamports), *extra_transfers], blockhash, tuner=tuner)
         sig = client.send_transaction(tx).value
         return sig
     except Exception as e:
@@ -105,8 +825,411 @@ def send_transfer_transaction(
         return None
 
 
+# Send errors that no resend can fix: the transaction itself is malformed or badly signed.
+TERMINAL_SEND_ERRORS = (
+    InvalidParamsMessage,
+    TransactionPrecompileVerificationFailureMessage,
+    UnsupportedTransactionVersionMessage,
+)
+TERMINAL_CUSTOM_ERRORS = (
+    RpcCustomErrorFieldless.TransactionSignatureVerificationFailure,
+    RpcCustomErrorFieldless.TransactionSignatureLenMismatch,
+)
+# Preflight failures that say more about the node or the moment than about the transaction: a node a
+# slot behind has not seen the blockhash yet, an earlier send already landed, the block is full.
+RETRYABLE_PREFLIGHT_ERRORS = (
+    TransactionErrorFieldless.BlockhashNotFound,
+    TransactionErrorFieldless.AlreadyProcessed,
+    TransactionErrorFieldless.AccountInUse,
+    TransactionErrorFieldless.ClusterMaintenance,
+    TransactionErrorFieldless.WouldExceedMaxBlockCostLimit,
+    TransactionErrorFieldless.WouldExceedMaxAccountCostLimit,
+    TransactionErrorFieldless.WouldExceedMaxVoteCostLimit,
+    TransactionErrorFieldless.WouldExceedAccountDataBlockLimit,
+)
+
+
+def is_terminal_send_error(error: object) -> bool:
+    """Whether a ``sendTransaction`` error means resending the same bytes cannot succeed.
+
+    Node-side conditions (unhealthy or lagging node, rate limits, internal errors) are not terminal.
+    """
+    if isinstance(error, SendTransactionPreflightFailureMessage):
+        err = error.data.err
+        return err is not None and err not in RETRYABLE_PREFLIGHT_ERRORS
+    if isinstance(error, RpcCustomErrorFieldless):
+        return error in TERMINAL_CUSTOM_ERRORS
+    return isinstance(error, TERMINAL_SEND_ERRORS)
+
+
+@dataclass
+class SendStats:
+    submitted: int = 0
+    broadcasts: int = 0
+    landed: int = 0
+    failed: int = 0
+    expired: int = 0
+    rejected: int = 0
+    send_errors: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def tps(self) -> float:
+        """Landed (successful) transactions per second of wall time."""
+        return self.landed / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class TransactionSender:
+    """Keep many signed transactions in flight and rebroadcast them until they land.
+
+    Each transaction is serialized once. Its bytes are sent with ``maxRetries=0``
+    (the node does not retry on its own) and sent again every
+    ``rebroadcast_interval`` seconds until the signature is confirmed or the
+    cluster passes the lastValidBlockHeight of its blockhash. Due sends are
+    packed into JSON-RPC batches of ``batch_size``. Nothing is printed: a
+    transaction the node refuses outright before any send was accepted (a
+    failing simulation, a bad signature) ends up ``rejected`` with the RPC
+    error in ``err``. Errors a resend can get past, such as BlockhashNotFound
+    from a lagging node or a rate limit, leave it pending.
+    """
+
+    def __init__(
+            self,
+            client: Client,
+            skip_preflight: bool = False,
+            rebroadcast_interval: float = 2.0,
+            max_in_flight: int = 256,
+            batch_size: int = DEFAULT_SEND_BATCH,
+            poll_interval: float = 0.25,
+    ):
+        self.client = client
+        self.opts = TxOpts(skip_preflight=skip_preflight, preflight_commitment=client.commitment, max_retries=0)
+        self.rebroadcast_interval = rebroadcast_interval
+        self.max_in_flight = max_in_flight
+        self.batch_size = batch_size
+        self.tracker = ConfirmationTracker(client, min_interval=poll_interval)
+        self._stats = SendStats()
+        self._raw: Dict[Signature, bytes] = {}
+        self._last_sent: Dict[Signature, float] = {}
+        self._outbox: List[Signature] = []
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._raw)
+
+    def submit(self, tx: Transaction, last_valid_block_height: Optional[int]) -> TrackedSignature:
+        """Queue a signed transaction, first waiting while ``max_in_flight`` are unresolved."""
+        while len(self._raw) >= self.max_in_flight:
+            self.step()
+        if self._started is None:
+            self._started = time.monotonic()
+        self._finished = None
+        signature = tx.signatures[0]
+        tracked = self.tracker.add(signature, last_valid_block_height)
+        self._raw[signature] = bytes(tx)
+        self._outbox.append(signature)
+        self._stats.submitted += 1
+        if len(self._outbox) >= self.batch_size:
+            self._broadcast(self._take_outbox())
+        return tracked
+
+    def flush(self) -> None:
+        """Broadcast everything queued now instead of waiting for a full batch or the next ``step``."""
+        if self._outbox:
+            self._broadcast(self._take_outbox())
+
+    def _take_outbox(self) -> List[Signature]:
+        outbox, self._outbox = self._outbox, []
+        return outbox
+
+    def _broadcast(self, signatures: Sequence[Signature]) -> None:
+        for start in range(0, len(signatures), self.batch_size):
+            chunk = [sig for sig in signatures[start:start + self.batch_size] if sig in self._raw]
+            now = time.monotonic()
+            for sig in chunk:
+                self._last_sent[sig] = now
+            try:
+                with RpcBatch(self.client, raise_errors=False) as batch:
+                    slots = [batch.send_raw_transaction(self._raw[sig], self.opts) for sig in chunk]
+            except Exception:
+                # The whole POST failed; every transaction in it is retried on the next interval.
+                self._stats.send_errors += len(chunk)
+                continue
+            for sig, slot in zip(chunk, slots):
+                tracked = self.tracker.tracked[sig]
+                result = slot.get()
+                if isinstance(result, SendTransactionResp):
+                    tracked.sends += 1
+                    self._stats.broadcasts += 1
+                elif tracked.sends == 0 and tracked.status == "pending" and is_terminal_send_error(result):
+                    tracked.status = "rejected"
+                    tracked.err = result
+                else:
+                    # Retryable errors (and bounced rebroadcasts of a landed transaction) are sent
+                    # again on the next interval; status polling and expiry decide the outcome.
+                    self._stats.send_errors += 1
+
+    def _retire(self) -> None:
+        for sig in list(self._raw):
+            status = self.tracker.tracked[sig].status
+            if status == "pending":
+                continue
+            del self._raw[sig]
+            self._last_sent.pop(sig, None)
+            if status == "confirmed":
+                self._stats.landed += 1
+            elif status == "failed":
+                self._stats.failed += 1
+            elif status == "expired":
+                self._stats.expired += 1
+            elif status == "rejected":
+                self._stats.rejected += 1
+
+    def rebroadcast(self) -> None:
+        """Send what is queued plus every unresolved transaction due for a resend, without polling."""
+        self._retire()
+        now = time.monotonic()
+        due = self._take_outbox()
+        queued = set(due)
+        due += [
+            sig for sig, sent in self._last_sent.items()
+            if now - sent >= self.rebroadcast_interval and sig not in queued
+        ]
+        if due:
+            self._broadcast(due)
+
+    def step(self, wait: bool = True) -> int:
+        """Send what is queued or due, poll statuses once; return how many transactions resolved.
+
+        With ``wait`` (the default) it sleeps until the next poll when nothing resolved, so a
+        loop of ``step()`` calls does not hammer the node; callers with their own schedule pass false.
+        """
+        now = time.monotonic()
+        self.rebroadcast()
+        self._retire()
+        before = len(self._raw)
+        if before:
+            try:
+                self.tracker.poll_once()
+            except Exception:
+                self._stats.send_errors += 1
+            self._retire()
+        resolved = before - len(self._raw)
+        if wait and not resolved and self._raw:
+            next_due = min(self._last_sent.values(), default=now) + self.rebroadcast_interval
+            time.sleep(max(0.0, min(self.tracker.min_interval, next_due - time.monotonic())))
+        return resolved
+
+    def drain(self, timeout_sec: Optional[float] = None) -> List[TrackedSignature]:
+        """Rebroadcast and poll until nothing is in flight; leftovers expire after ``timeout_sec``."""
+        start = time.monotonic()
+        while self._raw:
+            self.step()
+            if self._raw and timeout_sec is not None and time.monotonic() - start >= timeout_sec:
+                for sig in self._raw:
+                    self.tracker.tracked[sig].status = "expired"
+                self._retire()
+        if self._started is not None and self._finished is None:
+            self._finished = time.monotonic()
+        return list(self.tracker.tracked.values())
+
+    def stats(self) -> SendStats:
+        stats = replace(self._stats)
+        if self._started is not None:
+            stats.elapsed = (self._finished or time.monotonic()) - self._started
+        return stats
+
+
+def report_send_stats(stats: SendStats) -> None:
+    print(
+        f"Отправлено: {stats.submitted} (всего отправок: {stats.broadcasts}), в блоке: {stats.landed}, "
+        f"с ошибкой: {stats.failed}, истекло: {stats.expired}, отклонено: {stats.rejected}. "
+        f"{stats.elapsed:.2f} с, {stats.tps:.1f} TPS"
+    )
+
+
+def add_sender_arguments(parser) -> None:
+    parser.add_argument(
+        "--skip-preflight", action="store_true", help="Send without simulating first (errors show up only on-chain)"
+    )
+    parser.add_argument(
+        "--rebroadcast-interval", type=float, default=2.0, help="Seconds between resends of an unconfirmed transaction"
+    )
+
+
+def sender_from_args(client: Client, args) -> TransactionSender:
+    return TransactionSender(
+        client,
+        skip_preflight=args.skip_preflight,
+        rebroadcast_interval=args.rebroadcast_interval,
+        max_in_flight=args.max_in_flight,
+    )
+
+
+@dataclass
+class TransferRow:
+    line: int
+    recipient: Pubkey
+    lamports: int
+
+
+@dataclass
+class TransferRowResult:
+    row: TransferRow
+    signature: Optional[Signature]
+    status: str
+    latency: Optional[float] = None
+    error: object = None
+
+
+def read_transfer_csv(path: str, amounts_in_lamports: bool = False) -> List[TransferRow]:
+    """Read ``recipient,amount`` rows; amounts are SOL unless ``amounts_in_lamports`` is set."""
+    rows: List[TransferRow] = []
+    with open(path, newline="") as f:
+        for line, record in enumerate(csv.reader(f), start=1):
+            if not record or not record[0].strip() or record[0].lstrip().startswith("#"):
+                continue
+            if len(record) < 2:
+                raise ValueError(f"Строка {line}: ожидаю пару адрес,сумма")
+            recipient, amount = record[0].strip(), record[1].strip()
+            if line == 1 and recipient.lower() in ("recipient", "address", "to"):
+                continue
+            lamports = int(amount) if amounts_in_lamports else lamports_from_sol(amount)
+            if lamports <= 0:
+                raise ValueError(f"Строка {line}: сумма перевода должна быть больше 0")
+            rows.append(TransferRow(line=line, recipient=parse_pubkey(recipient), lamports=lamports))
+    return rows
+
+
+def pack_transfer_batches(
+        from_keypair: Keypair, rows: Sequence[TransferRow], reserve_compute_budget: bool = False
+) -> List[List[TransferRow]]:
+    """Greedily pack rows into transactions that stay within the packet size limit.
+
+    With ``reserve_compute_budget`` room is left for the two compute-budget instructions.
+    """
+    batches: List[List[TransferRow]] = []
+    current: List[TransferRow] = []
+    placeholder = Hash.default()
+    for row in rows:
+        candidate = current + [row]
+        transfers = [(r.recipient, r.lamports) for r in candidate]
+        tx = build_transfer_transaction(
+            from_keypair, transfers, placeholder, reserve_compute_budget=reserve_compute_budget
+        )
+        if len(bytes(tx)) <= PACKET_DATA_SIZE:
+            current = candidate
+            continue
+        if not current:
+            raise ValueError(f"Строка {row.line}: перевод не помещается в одну транзакцию")
+        batches.append(current)
+        current = [row]
+    if current:
+        batches.append(current)
+    return batches
+
+
+def estimate_transfer_batch_fee(
+        client: Client,
+        from_keypair: Keypair,
+        batch: Sequence[TransferRow],
+        provider: Optional[BlockhashProvider] = None,
+        fee_cache: Optional[FeeCache] = None,
+        tuner: Optional[ComputeBudgetTuner] = None,
+) -> int:
+    blockhash = provider.get().blockhash if provider else client.get_latest_blockhash().value.blockhash
+    tx = build_transfer_transaction(from_keypair, [(r.recipient, r.lamports) for r in batch], blockhash, tuner=tuner)
+    if fee_cache is not None:
+        return fee_cache.fee_for(tx.message)
+    fee = client.get_fee_for_message(tx.message).value
+    return int(fee) if fee is not None else estimate_message_fee(tx.message)
+
+
+def send_transfer_batches(
+        client: Client,
+        from_keypair: Keypair,
+        batches: Sequence[Sequence[TransferRow]],
+        max_in_flight: int = 8,
+        timeout_sec: Optional[float] = None,
+        ws_url: Optional[str] = None,
+        provider: Optional[BlockhashProvider] = None,
+        sender: Optional[TransactionSender] = None,
+        tuner: Optional[ComputeBudgetTuner] = None,
+) -> List[TransferRowResult]:
+    """Send batches through a ``TransactionSender``, each signed with the provider's current blockhash.
+
+    Transactions are rebroadcast until they land or expire. With ``ws_url``
+    confirmation comes from ``signatureSubscribe`` instead of polling, and
+    unconfirmed transactions are still rebroadcast while it waits.
+    """
+    provider = provider or get_blockhash_provider(client)
+    sender = sender or TransactionSender(client, max_in_flight=max_in_flight)
+    sent: List[Tuple[Sequence[TransferRow], TrackedSignature]] = []
+
+    for batch in batches:
+        latest = provider.get()
+        transfers = [(r.recipient, r.lamports) for r in batch]
+        tx = build_transfer_transaction(from_keypair, transfers, latest.blockhash, tuner=tuner)
+        sent.append((batch, sender.submit(tx, latest.last_valid_block_height)))
+
+    if ws_url:
+        sender.flush()
+        sender.tracker.wait_ws(
+            ws_url, timeout_sec, tick=sender.rebroadcast, tick_interval=sender.rebroadcast_interval
+        )
+    sender.drain(timeout_sec)
+
+    results: List[TransferRowResult] = []
+    for batch, tracked in sent:
+        for row in batch:
+            results.append(
+                TransferRowResult(
+                    row=row,
+                    signature=tracked.signature,
+                    status=tracked.status,
+                    latency=tracked.latency,
+                    error=tracked.err,
+                )
+            )
+    return results
+
+
+def write_transfer_results(path: str, results: Sequence[TransferRowResult]) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["line", "recipient", "lamports", "signature", "status", "latency_sec", "error"])
+        for result in results:
+            writer.writerow([
+                result.row.line,
+                str(result.row.recipient),
+                result.row.lamports,
+                "" if result.signature is None else str(result.signature),
+                result.status,
+                "" if result.latency is None else f"{result.latency:.3f}",
+                "" if result.error is None else str(result.error),
+            ])
+
+
+def get_balances(
+        client: Client, pubkeys: Sequence[Pubkey], chunk_size: int = MAX_MULTIPLE_ACCOUNTS
+) -> List[int]:
+    """Lamport balances of ``pubkeys`` (0 for missing accounts) via one batch of getMultipleAccounts calls."""
+    no_data = DataSliceOpts(offset=0, length=0)
+    with RpcBatch(client) as batch:
+        chunks = [
+            batch.get_multiple_accounts(list(pubkeys[start:start + chunk_size]), data_slice=no_data)
+            for start in range(0, len(pubkeys), chunk_size)
+        ]
+    return [0 if account is None else account.lamports for chunk in chunks for account in chunk.get().value]
+
+
 def print_balances(client: Client, from_pub: Pubkey, to_pub: Pubkey) -> None:
-    from_balance = client.get_balance(from_pub).value or 0
-    to_balance = client.get_balance(to_pub).value or 0
+    with RpcBatch(client) as batch:
+        from_resp = batch.get_balance(from_pub)
+        to_resp = batch.get_balance(to_pub)
+    from_balance = from_resp.get().value or 0
+    to_balance = to_resp.get().value or 0
     print(f"Баланс отправителя ({from_pub}): {from_balance} лампортов ({from_balance / LAMPORTS_PER_SOL} SOL)")
     print(f"Баланс получателя ({to_pub}): {to_balance} лампортов ({to_balance / LAMPORTS_PER_SOL} SOL)")
@@ -0,0 +1,275 @@
+"""Compute-budget tuning for the transactions the scripts build.
+
+``ComputeBudgetTuner`` prepends ``SetComputeUnitLimit`` and
+``SetComputeUnitPrice`` instructions to a list of instructions:
+
+* the limit is the ``unitsConsumed`` of one ``simulateTransaction`` run,
+  plus a margin. Simulations are cached per message shape (program, account
+  count and data length of every instruction), so a thousand transfers cost
+  one simulation, not a thousand; a shape whose simulation fails keeps the
+  default budget without being simulated again;
+* the price (micro-lamports per CU) is a percentile of
+  ``getRecentPrioritizationFees`` for the writable accounts involved, capped
+  at ``max_price`` and cached per set of writable accounts for
+  ``price_ttl`` seconds.
+
+It works with both ``Client`` (``tune``) and ``AsyncClient``
+(``tune_async``). Scripts expose it as ``--compute-budget``.
+
+Usage example:
+  python transfer.py --from-keypair id.json --to <PUBKEY> --sol 0.1 --compute-budget
+  python close_token_account.py --all --compute-budget --priority-percentile 90
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple, Union
+
+from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.core import RPCException
+from solders.address_lookup_table_account import AddressLookupTableAccount
+from solders.commitment_config import CommitmentLevel
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price
+from solders.hash import Hash
+from solders.instruction import Instruction
+from solders.message import MessageV0
+from solders.pubkey import Pubkey
+from solders.rpc.config import RpcSimulateTransactionConfig
+from solders.rpc.requests import SimulateVersionedTransaction
+from solders.rpc.responses import SimulateTransactionResp
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+
+# A transaction may request at most this many compute units.
+MAX_COMPUTE_UNITS = 1_400_000
+# getRecentPrioritizationFees accepts at most this many account keys.
+MAX_PRIORITIZATION_FEE_ACCOUNTS = 128
+DEFAULT_CU_MARGIN = 0.1
+DEFAULT_PRIORITY_PERCENTILE = 75.0
+# Upper bound on the price the tuner will pay, in micro-lamports per CU.
+DEFAULT_MAX_CU_PRICE = 1_000_000
+DEFAULT_PRICE_TTL = 10.0
+
+InstructionShape = Tuple[Tuple[Pubkey, int, int], ...]
+
+
+@dataclass(frozen=True)
+class ComputeBudget:
+    units: Optional[int]
+    price: int
+
+    def instructions(self) -> List[Instruction]:
+        ixs = [] if self.units is None else [set_compute_unit_limit(self.units)]
+        return ixs + [set_compute_unit_price(self.price)]
+
+
+def instruction_shape(instructions: Sequence[Instruction]) -> InstructionShape:
+    """Program, account count and data length of every instruction: what the CU cost depends on."""
+    return tuple((ix.program_id, len(ix.accounts), len(ix.data)) for ix in instructions)
+
+
+def writable_accounts(instructions: Sequence[Instruction], payer: Pubkey) -> List[Pubkey]:
+    """The fee payer and every account an instruction writes, in first-seen order."""
+    seen = {payer: None}
+    for ix in instructions:
+        for meta in ix.accounts:
+            if meta.is_writable:
+                seen.setdefault(meta.pubkey, None)
+    return list(seen)[:MAX_PRIORITIZATION_FEE_ACCOUNTS]
+
+
+def fee_percentile(fees: Sequence[int], percentile: float) -> int:
+    """Nearest-rank percentile of the recent per-slot prioritization fees (0 when there are none)."""
+    if not fees:
+        return 0
+    ordered = sorted(fees)
+    rank = math.ceil(percentile / 100 * len(ordered))
+    return ordered[min(len(ordered), max(rank, 1)) - 1]
+
+
+def placeholder_budget_instructions() -> List[Instruction]:
+    """Budget instructions of the final size, for packing transactions before they are tuned."""
+    return ComputeBudget(units=MAX_COMPUTE_UNITS, price=DEFAULT_MAX_CU_PRICE).instructions()
+
+
+class _RecentPrioritizationFees:
+    """Request body for getRecentPrioritizationFees, which solders has no type for."""
+
+    def __init__(self, addresses: Sequence[Pubkey]):
+        self.addresses = addresses
+
+    def to_json(self) -> str:
+        params = [[str(address) for address in self.addresses]]
+        return json.dumps({"jsonrpc": "2.0", "id": 0, "method": "getRecentPrioritizationFees", "params": params})
+
+
+def _parse_prioritization_fees(raw: str) -> List[int]:
+    parsed = json.loads(raw)
+    if "error" in parsed:
+        raise RPCException(parsed["error"])
+    return [int(entry["prioritizationFee"]) for entry in parsed["result"]]
+
+
+class ComputeBudgetTuner:
+    """Size the compute-unit limit by simulation and price it from recent prioritization fees."""
+
+    def __init__(
+            self,
+            client: Union[Client, AsyncClient],
+            margin: float = DEFAULT_CU_MARGIN,
+            percentile: float = DEFAULT_PRIORITY_PERCENTILE,
+            max_price: int = DEFAULT_MAX_CU_PRICE,
+            price_ttl: float = DEFAULT_PRICE_TTL,
+    ):
+        self.client = client
+        self.margin = margin
+        self.percentile = percentile
+        self.max_price = max_price
+        self.price_ttl = price_ttl
+        self.simulations = 0
+        # None records a shape whose simulation failed, so it is not simulated again.
+        self._units: Dict[InstructionShape, Optional[int]] = {}
+        # Prioritization fees depend on the write-locked accounts, not on the instruction layout.
+        self._prices: Dict[FrozenSet[Pubkey], Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        # Concurrent async callers with the same shape wait for one simulation instead of each running their own.
+        self._shape_locks: Dict[InstructionShape, asyncio.Lock] = {}
+
+    def _simulation_body(
+            self,
+            instructions: Sequence[Instruction],
+            payer: Pubkey,
+            lookup_tables: Sequence[AddressLookupTableAccount],
+    ) -> SimulateVersionedTransaction:
+        # Simulate at the maximum limit so the default per-instruction budget cannot cut the run short.
+        budgeted = [set_compute_unit_limit(MAX_COMPUTE_UNITS), set_compute_unit_price(0), *instructions]
+        message = MessageV0.try_compile(payer, budgeted, list(lookup_tables), Hash.default())
+        tx = VersionedTransaction.populate(message, [Signature.default()] * message.header.num_required_signatures)
+        config = RpcSimulateTransactionConfig(replace_recent_blockhash=True, commitment=CommitmentLevel.Confirmed)
+        return SimulateVersionedTransaction(tx, config)
+
+    def _limit_from(self, shape: InstructionShape, resp: SimulateTransactionResp) -> Optional[int]:
+        value = resp.value
+        units = None
+        # A failing simulation says nothing about the real cost; leave the default budget.
+        if value.err is None and value.units_consumed is not None:
+            units = min(MAX_COMPUTE_UNITS, math.ceil(value.units_consumed * (1 + self.margin)))
+        with self._lock:
+            self.simulations += 1
+            self._units[shape] = units
+        return units
+
+    def _price_from(self, accounts: FrozenSet[Pubkey], fees: Sequence[int]) -> int:
+        price = min(self.max_price, fee_percentile(fees, self.percentile))
+        with self._lock:
+            self._prices[accounts] = (price, time.monotonic())
+        return price
+
+    def _cached(
+            self, shape: InstructionShape, accounts: FrozenSet[Pubkey]
+    ) -> Tuple[bool, Optional[int], Optional[int]]:
+        """``(simulated, units, price)``; ``units`` is None after a failed simulation too."""
+        with self._lock:
+            simulated = shape in self._units
+            units = self._units.get(shape)
+            price, fetched_at = self._prices.get(accounts, (None, 0.0))
+        if price is not None and time.monotonic() - fetched_at > self.price_ttl:
+            price = None
+        return simulated, units, price
+
+    def budget(
+            self,
+            instructions: Sequence[Instruction],
+            payer: Pubkey,
+            lookup_tables: Sequence[AddressLookupTableAccount] = (),
+    ) -> ComputeBudget:
+        shape = instruction_shape(instructions)
+        writable = writable_accounts(instructions, payer)
+        accounts = frozenset(writable)
+        simulated, units, price = self._cached(shape, accounts)
+        provider = self.client._provider
+        if not simulated:
+            body = self._simulation_body(instructions, payer, lookup_tables)
+            units = self._limit_from(shape, provider.make_request(body, SimulateTransactionResp))
+        if price is None:
+            raw = provider.make_request_unparsed(_RecentPrioritizationFees(writable))
+            price = self._price_from(accounts, _parse_prioritization_fees(raw))
+        return ComputeBudget(units=units, price=price)
+
+    async def budget_async(
+            self,
+            instructions: Sequence[Instruction],
+            payer: Pubkey,
+            lookup_tables: Sequence[AddressLookupTableAccount] = (),
+    ) -> ComputeBudget:
+        shape = instruction_shape(instructions)
+        writable = writable_accounts(instructions, payer)
+        accounts = frozenset(writable)
+        provider = self.client._provider
+        async with self._shape_locks.setdefault(shape, asyncio.Lock()):
+            simulated, units, price = self._cached(shape, accounts)
+            if not simulated:
+                body = self._simulation_body(instructions, payer, lookup_tables)
+                units = self._limit_from(shape, await provider.make_request(body, SimulateTransactionResp))
+            if price is None:
+                raw = await provider.make_request_unparsed(_RecentPrioritizationFees(writable))
+                price = self._price_from(accounts, _parse_prioritization_fees(raw))
+        return ComputeBudget(units=units, price=price)
+
+    def tune(
+            self,
+            instructions: Sequence[Instruction],
+            payer: Pubkey,
+            lookup_tables: Sequence[AddressLookupTableAccount] = (),
+    ) -> List[Instruction]:
+        """``instructions`` with the tuned budget instructions in front."""
+        return self.budget(instructions, payer, lookup_tables).instructions() + list(instructions)
+
+    async def tune_async(
+            self,
+            instructions: Sequence[Instruction],
+            payer: Pubkey,
+            lookup_tables: Sequence[AddressLookupTableAccount] = (),
+    ) -> List[Instruction]:
+        budget = await self.budget_async(instructions, payer, lookup_tables)
+        return budget.instructions() + list(instructions)
+
+
+def add_compute_budget_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("compute budget")
+    group.add_argument(
+        "--compute-budget",
+        action="store_true",
+        help="Set a simulated compute-unit limit and a priority fee from recent prioritization fees",
+    )
+    group.add_argument(
+        "--cu-margin", type=float, default=DEFAULT_CU_MARGIN, help="Headroom over simulated units (0.1 = 10%%)"
+    )
+    group.add_argument(
+        "--priority-percentile",
+        type=float,
+        default=DEFAULT_PRIORITY_PERCENTILE,
+        help="Percentile of recent prioritization fees to pay",
+    )
+    group.add_argument(
+        "--max-cu-price",
+        type=int,
+        default=DEFAULT_MAX_CU_PRICE,
+        help="Cap on the priority fee, in micro-lamports per compute unit",
+    )
+
+
+def tuner_from_args(client: Union[Client, AsyncClient], args: Any) -> Optional[ComputeBudgetTuner]:
+    if not args.compute_budget:
+        return None
+    return ComputeBudgetTuner(
+        client, margin=args.cu_margin, percentile=args.priority_percentile, max_price=args.max_cu_price
+    )
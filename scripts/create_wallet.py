@@ -1,7 +1,185 @@
+"""Create a new wallet, or grind vanity keypairs on every core.
+
+Usage example:
+  python create_wallet.py
+  python create_wallet.py --starts-with mnt --count 1 --out-dir .
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import queue
+import time
+from typing import List, Optional, Tuple
+
 from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_BASE58_INDEX = {ch: i for i, ch in enumerate(BASE58_ALPHABET)}
+PUBKEY_BYTES = 32
+# Candidates generated between checks of the stop flag.
+GRIND_BATCH = 2000
+
+
+def _base58_value(text: str) -> int:
+    value = 0
+    for ch in text:
+        if ch not in _BASE58_INDEX:
+            raise ValueError(f"Символ {ch!r} не входит в алфавит base58")
+        value = value * 58 + _BASE58_INDEX[ch]
+    return value
+
+
+def prefix_ranges(prefix: str) -> List[Tuple[bytes, bytes]]:
+    """Inclusive big-endian byte ranges of 32-byte keys whose base58 form starts with ``prefix``.
+
+    A key without leading zero bytes encodes to ``length`` characters exactly when
+    ``58**(length-1) <= n < 58**length``; within that band the prefix pins ``n`` to
+    one contiguous interval, so matching is a plain ``bytes`` comparison.
+    """
+    value, k = _base58_value(prefix), len(prefix)
+    limit = 1 << (8 * PUBKEY_BYTES)
+    ranges: List[Tuple[bytes, bytes]] = []
+    length = k
+    while 58 ** (length - 1) < limit:
+        scale = 58 ** (length - k)
+        lo = max(value * scale, 58 ** (length - 1))
+        hi = min((value + 1) * scale, 58 ** length, limit)
+        if lo < hi:
+            ranges.append((lo.to_bytes(PUBKEY_BYTES, "big"), (hi - 1).to_bytes(PUBKEY_BYTES, "big")))
+        length += 1
+    return ranges
+
+
+class VanityMatcher:
+    """Match base58 prefix/suffix against raw public key bytes without encoding them."""
+
+    def __init__(self, prefix: str = "", suffix: str = ""):
+        if not prefix and not suffix:
+            raise ValueError("Нужен хотя бы префикс или суффикс")
+        self.prefix = prefix
+        self.suffix = suffix
+        # A leading "1" stands for a zero byte, which the numeric ranges do not model.
+        self._ranges = prefix_ranges(prefix) if prefix and not prefix.startswith("1") else None
+        self._suffix_mod = 58 ** len(suffix)
+        self._suffix_value = _base58_value(suffix)
+
+    @property
+    def expected_attempts(self) -> int:
+        """Mean keys per match: the prefix odds come from the real range widths, since base58
+        lengths skew the first character (most 32-byte keys encode to 44 characters)."""
+        suffix_odds = 58 ** len(self.suffix)
+        if self._ranges is None:
+            return 58 ** len(self.prefix) * suffix_odds
+        width = sum(int.from_bytes(hi, "big") - int.from_bytes(lo, "big") + 1 for lo, hi in self._ranges)
+        return -(-(1 << (8 * PUBKEY_BYTES)) * suffix_odds // width)
+
+    def _matches_encoded(self, raw: bytes) -> bool:
+        encoded = str(Pubkey.from_bytes(raw))
+        return encoded.startswith(self.prefix) and encoded.endswith(self.suffix)
+
+    def matches(self, raw: bytes) -> bool:
+        if raw[0] == 0 or (self.prefix and self._ranges is None):
+            return self._matches_encoded(raw)
+        if self._ranges is not None and not any(lo <= raw <= hi for lo, hi in self._ranges):
+            return False
+        return not self.suffix or int.from_bytes(raw, "big") % self._suffix_mod == self._suffix_value
+
+
+def _grind_worker(worker_id: int, matcher: VanityMatcher, stop, results) -> None:
+    attempts = 0
+    start = time.perf_counter()
+    while not stop.is_set():
+        for _ in range(GRIND_BATCH):
+            keypair = Keypair()
+            if matcher.matches(bytes(keypair.pubkey())):
+                results.put(("match", worker_id, bytes(keypair)))
+        attempts += GRIND_BATCH
+    results.put(("stats", worker_id, attempts, time.perf_counter() - start))
+
+
+def grind(
+    matcher: VanityMatcher, count: int = 1, workers: Optional[int] = None
+) -> Tuple[List[Keypair], List[Tuple[int, int, float]]]:
+    """Run ``workers`` processes until ``count`` matches; return the keypairs and per-worker stats."""
+    workers = workers or os.cpu_count() or 1
+    stop = mp.Event()
+    results = mp.Queue()
+    procs = [mp.Process(target=_grind_worker, args=(i, matcher, stop, results), daemon=True) for i in range(workers)]
+    for proc in procs:
+        proc.start()
+
+    found: List[Keypair] = []
+    stats: List[Tuple[int, int, float]] = []
+    try:
+        while len(stats) < workers:
+            try:
+                message = results.get(timeout=1.0)
+            except queue.Empty:
+                if not any(proc.is_alive() for proc in procs):
+                    raise RuntimeError("Все процессы подбора завершились без результата")
+                continue
+            if message[0] == "match":
+                if len(found) < count:
+                    keypair = Keypair.from_bytes(message[2])
+                    found.append(keypair)
+                    print(f"Найден ключ [{len(found)}/{count}] (процесс {message[1]}): {keypair.pubkey()}")
+                if len(found) >= count:
+                    stop.set()
+            else:
+                stats.append(message[1:])
+    finally:
+        stop.set()
+        for proc in procs:
+            proc.join(timeout=5)
+    return found, sorted(stats)
+
+
+def save_keypair(keypair: Keypair, out_dir: str) -> str:
+    """Write ``<pubkey>.json`` in the solana CLI format (JSON array of 64 bytes)."""
+    path = os.path.join(out_dir, f"{keypair.pubkey()}.json")
+    # The file holds the secret key: keep it private like solana-keygen does.
+    with open(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+        json.dump(list(bytes(keypair)), f)
+    return path
+
+
+def run_grind(args) -> None:
+    matcher = VanityMatcher(args.starts_with or "", args.ends_with or "")
+    workers = args.workers or os.cpu_count() or 1
+    print(
+        f"Подбор ключей: префикс {matcher.prefix!r}, суффикс {matcher.suffix!r}, процессов: {workers}, "
+        f"ожидаемое число попыток на ключ: ~{matcher.expected_attempts}"
+    )
+    start = time.perf_counter()
+    found, stats = grind(matcher, count=args.count, workers=workers)
+    elapsed = time.perf_counter() - start
+
+    for worker_id, attempts, seconds in stats:
+        print(f"  процесс {worker_id}: {attempts} ключей, {attempts / seconds:.0f} ключей/с")
+    total = sum(attempts for _, attempts, _ in stats)
+    print(f"Всего: {total} ключей за {elapsed:.1f} с ({total / elapsed:.0f} ключей/с)")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for keypair in found:
+        print(f"Сохранён: {save_keypair(keypair, args.out_dir)}")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Create a new wallet or grind a vanity keypair")
+    parser.add_argument("--starts-with", help="Base58 prefix the public key must start with")
+    parser.add_argument("--ends-with", help="Base58 suffix the public key must end with")
+    parser.add_argument("--count", type=int, default=1, help="Stop after this many matching keypairs")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: number of cores)")
+    parser.add_argument("--out-dir", default=".", help="Where to write <pubkey>.json files")
+    args = parser.parse_args()
+
+    if args.starts_with or args.ends_with:
+        run_grind(args)
+        return
+
     keypair = Keypair()
     public_key = keypair.pubkey()
     # secret_key = list(keypair.to_bytes())
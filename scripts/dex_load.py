@@ -0,0 +1,626 @@
+"""Load generator for ``my_dex`` buy/sell throughput and latency on a local validator.
+
+``setup`` creates what a run needs on the docker-compose
+``solana-test-validator``: two test mints (token A and a stand-in for WSOL,
+as ``dex_client.ts`` does), the pool PDA with its vaults, the ``initialize``
+call, vault liquidity, and token accounts funded with both mints for every
+trader. Traders pay their own fees, so fund them with SOL first
+(``provision_wallets.py --fund airdrop``). With ``--info`` it only funds
+traders for an existing pool whose mints ``--keypair`` can mint.
+
+``run`` derives the pool PDA and every trader's token accounts once, then
+signs trades ahead of time in a process pool, one wave per blockhash, while
+the previous wave is being sent. Trades go out at ``--rate`` per second on a
+fixed schedule whatever the node does (or all at once with ``--open-loop``)
+through ``TransactionSender``, which rebroadcasts until they land or their
+blockhash expires. The report gives submit-to-confirm latency percentiles,
+landed TPS and failure reasons; ``--out`` saves it as JSON and ``--compare``
+sets it against an earlier run, e.g. before and after a program change.
+
+Instructions are encoded directly (Anchor discriminator + little-endian
+``u64``); the tree carries no IDL for anchorpy to load. Each trade's amount
+is offset by its sequence number so no two trades share a signature.
+
+Latency is measured by status polling, so it is only as fine as
+``--poll-interval``.
+
+Usage example:
+  python provision_wallets.py --count 16 --out traders.ks --fund airdrop --sol 10
+  python dex_load.py setup --keypair id.json --traders traders.ks --out dex-load-pool.json
+  python dex_load.py run --info dex-load-pool.json --traders traders.ks --rate 200 --duration 30 --out before.json
+  python dex_load.py run --info dex-load-pool.json --traders traders.ks --open-loop --count 5000 --compare before.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import platform
+import struct
+import sys
+import time
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from solana.rpc.api import Client
+from solders.hash import Hash
+from solders.instruction import AccountMeta, Instruction
+from solders.keypair import Keypair
+from solders.message import Message
+from solders.pubkey import Pubkey
+from solders.system_program import ID as SYSTEM_PROGRAM_ID
+from solders.system_program import CreateAccountParams, create_account
+from solders.sysvar import RENT
+from solders.transaction import Transaction
+from spl.token.constants import TOKEN_PROGRAM_ID
+from spl.token.instructions import (
+    InitializeMintParams,
+    MintToParams,
+    create_idempotent_associated_token_account,
+    get_associated_token_address,
+    initialize_mint,
+    mint_to,
+)
+
+from common import (
+    DEFAULT_RPC,
+    BlockhashProvider,
+    TrackedSignature,
+    TransactionSender,
+    add_sender_arguments,
+    get_blockhash_provider,
+    get_client,
+    load_keypair,
+    open_keystore,
+)
+from compute_budget import ComputeBudget
+from dex_pools import MY_DEX_PROGRAM_ID, PoolState
+from keystore import is_keystore
+from price_report import WSOL_MINT, load_swap_info
+
+MINT_ACCOUNT_SIZE = 82
+DEFAULT_SETUP_DECIMALS = 6
+DEFAULT_POOL_RATE = 2
+DEFAULT_LIQUIDITY = 10 ** 15
+DEFAULT_TRADER_FUNDING = 10 ** 12
+DEFAULT_TRADE_AMOUNT = 1_000
+DEFAULT_RATE = 100.0
+DEFAULT_POOL_INFO = "dex-load-pool.json"
+# Trades signed per blockhash in --open-loop runs; paced runs sign WAVE_SECONDS of trades at a time.
+DEFAULT_OPEN_LOOP_WAVE = 2_000
+# Short enough that a wave signed one wave ahead still has most of its ~60 s blockhash lifetime left.
+WAVE_SECONDS = 10.0
+LATENCY_PERCENTILES = (50, 90, 99)
+
+
+def _anchor_discriminator(name: str) -> bytes:
+    return hashlib.sha256(f"global:{name}".encode()).digest()[:8]
+
+
+INITIALIZE_DISCRIMINATOR = _anchor_discriminator("initialize")
+BUY_DISCRIMINATOR = _anchor_discriminator("buy")
+SELL_DISCRIMINATOR = _anchor_discriminator("sell")
+U64 = struct.Struct("<Q")
+
+
+@dataclass(frozen=True)
+class PoolAccounts:
+    """Every account a ``my_dex`` trade touches apart from the trader's own."""
+
+    program_id: Pubkey
+    pool: Pubkey
+    bump: int
+    token_a_mint: Pubkey
+    token_b_mint: Pubkey
+    token_a_vault: Pubkey
+    token_b_vault: Pubkey
+
+    @classmethod
+    def derive(
+            cls,
+            token_a_mint: Pubkey,
+            token_b_mint: Pubkey,
+            token_a_vault: Optional[Pubkey] = None,
+            token_b_vault: Optional[Pubkey] = None,
+            program_id: Pubkey = MY_DEX_PROGRAM_ID,
+    ) -> "PoolAccounts":
+        """The pool PDA for the two mints; vaults default to the PDA's associated token accounts."""
+        pool, bump = Pubkey.find_program_address([b"pool", bytes(token_a_mint), bytes(token_b_mint)], program_id)
+        return cls(
+            program_id=program_id,
+            pool=pool,
+            bump=bump,
+            token_a_mint=token_a_mint,
+            token_b_mint=token_b_mint,
+            token_a_vault=token_a_vault or get_associated_token_address(pool, token_a_mint),
+            token_b_vault=token_b_vault or get_associated_token_address(pool, token_b_mint),
+        )
+
+    @classmethod
+    def from_swap_info(cls, info: Dict[str, Any], program_id: Pubkey = MY_DEX_PROGRAM_ID) -> "PoolAccounts":
+        """Accounts of a swap-info record; hand-written records without ``token_b_mint`` trade against WSOL."""
+        return cls.derive(
+            Pubkey.from_string(info["custom_token_mint"]),
+            Pubkey.from_string(info.get("token_b_mint") or WSOL_MINT),
+            Pubkey.from_string(info["token_a_vault"]),
+            Pubkey.from_string(info["token_b_vault"]),
+            program_id,
+        )
+
+    def user_accounts(self, user: Pubkey) -> Tuple[Pubkey, Pubkey]:
+        """The user's associated token accounts for token A and token B."""
+        return (
+            get_associated_token_address(user, self.token_a_mint),
+            get_associated_token_address(user, self.token_b_mint),
+        )
+
+    def pool_state(self, rate: int) -> PoolState:
+        return PoolState(
+            pool=str(self.pool),
+            token_a_mint=str(self.token_a_mint),
+            token_b_mint=str(self.token_b_mint),
+            token_a_vault=str(self.token_a_vault),
+            token_b_vault=str(self.token_b_vault),
+            rate=rate,
+            bump=self.bump,
+        )
+
+
+def initialize_instruction(accounts: PoolAccounts, payer: Pubkey, rate: int) -> Instruction:
+    metas = [
+        AccountMeta(accounts.pool, is_signer=False, is_writable=True),
+        AccountMeta(accounts.token_a_mint, is_signer=False, is_writable=True),
+        AccountMeta(accounts.token_b_mint, is_signer=False, is_writable=True),
+        AccountMeta(accounts.token_a_vault, is_signer=False, is_writable=True),
+        AccountMeta(accounts.token_b_vault, is_signer=False, is_writable=False),
+        AccountMeta(payer, is_signer=True, is_writable=True),
+        AccountMeta(SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
+        AccountMeta(TOKEN_PROGRAM_ID, is_signer=False, is_writable=False),
+        AccountMeta(RENT, is_signer=False, is_writable=False),
+    ]
+    return Instruction(accounts.program_id, INITIALIZE_DISCRIMINATOR + U64.pack(rate), metas)
+
+
+def trade_instruction(
+        accounts: PoolAccounts, user: Pubkey, user_a: Pubkey, user_b: Pubkey, sell: bool, amount: int
+) -> Instruction:
+    """``sell(amount_a)`` or ``buy(amount_b)``; both take the same accounts in the same order."""
+    metas = [
+        AccountMeta(accounts.pool, is_signer=False, is_writable=True),
+        AccountMeta(user, is_signer=True, is_writable=True),
+        AccountMeta(user_a, is_signer=False, is_writable=True),
+        AccountMeta(user_b, is_signer=False, is_writable=True),
+        AccountMeta(accounts.token_a_vault, is_signer=False, is_writable=True),
+        AccountMeta(accounts.token_b_vault, is_signer=False, is_writable=True),
+        AccountMeta(TOKEN_PROGRAM_ID, is_signer=False, is_writable=False),
+    ]
+    discriminator = SELL_DISCRIMINATOR if sell else BUY_DISCRIMINATOR
+    return Instruction(accounts.program_id, discriminator + U64.pack(amount), metas)
+
+
+def _signed(instructions: Sequence[Instruction], signers: Sequence[Keypair], blockhash: Hash) -> Transaction:
+    msg = Message.new_with_blockhash(list(instructions), payer=signers[0].pubkey(), blockhash=blockhash)
+    tx = Transaction.new_unsigned(msg)
+    tx.sign(list(signers), blockhash)
+    return tx
+
+
+def load_traders(sources: Sequence[str], count: Optional[int] = None) -> List[Keypair]:
+    """Keypairs from keystores (every entry) and keypair files, in order, cut to ``count``."""
+    traders: List[Keypair] = []
+    for source in sources:
+        path = os.path.expanduser(source)
+        if is_keystore(path):
+            traders.extend(open_keystore(path).keypairs(0, None if count is None else count - len(traders)))
+        else:
+            traders.append(load_keypair(source))
+        if count is not None and len(traders) >= count:
+            break
+    return traders[:count]
+
+
+# -- setup ---------------------------------------------------------------------------
+
+
+def _send_all(sender: TransactionSender, txs: Sequence[Transaction], last_valid_block_height: int, what: str) -> None:
+    tracked = [sender.submit(tx, last_valid_block_height) for tx in txs]
+    sender.drain()
+    failed = [t for t in tracked if t.status != "confirmed"]
+    if failed:
+        raise RuntimeError(
+            f"{what}: {len(failed)} of {len(tracked)} transactions did not land ({failure_reason(failed[0])})"
+        )
+
+
+def create_pool(
+        client: Client,
+        sender: TransactionSender,
+        provider: BlockhashProvider,
+        payer: Keypair,
+        decimals: int,
+        rate: int,
+        liquidity: int,
+        program_id: Pubkey = MY_DEX_PROGRAM_ID,
+) -> PoolAccounts:
+    """Create both mints, initialize the pool on them and mint ``liquidity`` into each vault, in one transaction."""
+    mint_a, mint_b = Keypair(), Keypair()
+    accounts = PoolAccounts.derive(mint_a.pubkey(), mint_b.pubkey(), program_id=program_id)
+    rent = client.get_minimum_balance_for_rent_exemption(MINT_ACCOUNT_SIZE).value
+    owner = payer.pubkey()
+    ixs: List[Instruction] = []
+    for mint in (mint_a, mint_b):
+        ixs.append(create_account(CreateAccountParams(
+            from_pubkey=owner, to_pubkey=mint.pubkey(), lamports=rent, space=MINT_ACCOUNT_SIZE, owner=TOKEN_PROGRAM_ID
+        )))
+        ixs.append(initialize_mint(InitializeMintParams(
+            decimals=decimals, program_id=TOKEN_PROGRAM_ID, mint=mint.pubkey(), mint_authority=owner
+        )))
+    for mint in (accounts.token_a_mint, accounts.token_b_mint):
+        ixs.append(create_idempotent_associated_token_account(owner, accounts.pool, mint))
+    ixs.append(initialize_instruction(accounts, owner, rate))
+    vaults = ((accounts.token_a_mint, accounts.token_a_vault), (accounts.token_b_mint, accounts.token_b_vault))
+    for mint, vault in vaults:
+        ixs.append(mint_to(MintToParams(
+            program_id=TOKEN_PROGRAM_ID, mint=mint, dest=vault, mint_authority=owner, amount=liquidity
+        )))
+    info = provider.get()
+    _send_all(sender, [_signed(ixs, [payer, mint_a, mint_b], info.blockhash)], info.last_valid_block_height, "pool")
+    return accounts
+
+
+def fund_traders(
+        sender: TransactionSender,
+        provider: BlockhashProvider,
+        payer: Keypair,
+        accounts: PoolAccounts,
+        traders: Sequence[Keypair],
+        amount: int,
+) -> None:
+    """Create both token accounts of every trader (if missing) and mint ``amount`` of each token into them."""
+    owner = payer.pubkey()
+    info = provider.get()
+    txs = []
+    for trader in traders:
+        user_a, user_b = accounts.user_accounts(trader.pubkey())
+        ixs = [
+            create_idempotent_associated_token_account(owner, trader.pubkey(), accounts.token_a_mint),
+            create_idempotent_associated_token_account(owner, trader.pubkey(), accounts.token_b_mint),
+            mint_to(MintToParams(TOKEN_PROGRAM_ID, accounts.token_a_mint, user_a, owner, amount)),
+            mint_to(MintToParams(TOKEN_PROGRAM_ID, accounts.token_b_mint, user_b, owner, amount)),
+        ]
+        txs.append(_signed(ixs, [payer], info.blockhash))
+    _send_all(sender, txs, info.last_valid_block_height, "trader funding")
+
+
+# -- run -------------------------------------------------------------------------------
+
+# Per-process state of the signing workers, filled in once by ``_init_signer``.
+_SIGNER: Dict[str, Any] = {}
+
+
+def _init_signer(secrets: Sequence[bytes], accounts: PoolAccounts, budget: Optional[Tuple[Optional[int], int]]) -> None:
+    keypairs = [Keypair.from_bytes(secret) for secret in secrets]
+    _SIGNER["accounts"] = accounts
+    _SIGNER["traders"] = [(keypair, *accounts.user_accounts(keypair.pubkey())) for keypair in keypairs]
+    _SIGNER["budget"] = [] if budget is None else ComputeBudget(*budget).instructions()
+
+
+def _sign_trades(blockhash: str, trades: Sequence[Tuple[int, bool, int]]) -> List[bytes]:
+    """Serialized, signed transactions for ``(trader, sell, amount)`` trades."""
+    recent = Hash.from_string(blockhash)
+    accounts, traders, budget = _SIGNER["accounts"], _SIGNER["traders"], _SIGNER["budget"]
+    signed = []
+    for trader, sell, amount in trades:
+        keypair, user_a, user_b = traders[trader]
+        ix = trade_instruction(accounts, keypair.pubkey(), user_a, user_b, sell, amount)
+        signed.append(bytes(_signed([*budget, ix], [keypair], recent)))
+    return signed
+
+
+def plan_trades(count: int, traders: int, side: str, amount: int) -> List[Tuple[int, bool, int]]:
+    """Round-robin over traders; ``mixed`` alternates buys and sells so the vaults stay balanced."""
+    plan = []
+    for seq in range(count):
+        sell = side == "sell" or (side == "mixed" and seq % 2 == 1)
+        plan.append((seq % traders, sell, amount + seq))
+    return plan
+
+
+class WaveSigner:
+    """Sign waves of trades in a process pool, each wave against the blockhash current when it was queued."""
+
+    def __init__(
+            self,
+            pool: ProcessPoolExecutor,
+            provider: BlockhashProvider,
+            workers: int,
+    ):
+        self.pool = pool
+        self.provider = provider
+        self.workers = workers
+
+    def start(self, trades: Sequence[Tuple[int, bool, int]]) -> Tuple[int, List[Future]]:
+        info = self.provider.get()
+        chunk = max(1, math.ceil(len(trades) / self.workers))
+        futures = [
+            self.pool.submit(_sign_trades, str(info.blockhash), trades[start:start + chunk])
+            for start in range(0, len(trades), chunk)
+        ]
+        return info.last_valid_block_height, futures
+
+    @staticmethod
+    def result(started: Tuple[int, List[Future]]) -> Tuple[int, List[Transaction]]:
+        last_valid_block_height, futures = started
+        return last_valid_block_height, [Transaction.from_bytes(raw) for f in futures for raw in f.result()]
+
+
+@dataclass
+class SendSchedule:
+    submitted: int = 0
+    send_seconds: float = 0.0
+    presign_seconds: float = 0.0
+    # How far behind schedule the worst send went out; open-loop runs have no schedule.
+    max_lag: Optional[float] = None
+
+
+def send_paced(
+        sender: TransactionSender,
+        signer: WaveSigner,
+        plan: Sequence[Tuple[int, bool, int]],
+        rate: Optional[float],
+        wave: int,
+        poll_interval: float,
+) -> SendSchedule:
+    """Submit ``plan`` at ``rate`` per second (``None``: as fast as possible) while later waves are signed."""
+    schedule = SendSchedule()
+    waves = [plan[start:start + wave] for start in range(0, len(plan), wave)]
+    presign_start = time.perf_counter()
+    current = signer.result(signer.start(waves[0]))
+    schedule.presign_seconds = time.perf_counter() - presign_start
+
+    start = last_poll = time.monotonic()
+    for index in range(len(waves)):
+        upcoming = signer.start(waves[index + 1]) if index + 1 < len(waves) else None
+        last_valid_block_height, txs = current
+        for tx in txs:
+            if rate:
+                due = start + schedule.submitted / rate
+                while (now := time.monotonic()) < due:
+                    if now - last_poll >= poll_interval:
+                        sender.step(wait=False)
+                        last_poll = time.monotonic()
+                    time.sleep(max(0.0, min(due, last_poll + poll_interval) - time.monotonic()))
+                schedule.max_lag = max(schedule.max_lag or 0.0, now - due)
+            sender.submit(tx, last_valid_block_height)
+            schedule.submitted += 1
+            if rate and start + schedule.submitted / rate > time.monotonic():
+                # Paced sends go out now rather than waiting for a full batch.
+                sender.flush()
+            # Keep polling while sending, or early trades would only be seen landing once everything is out.
+            if time.monotonic() - last_poll >= poll_interval:
+                sender.step(wait=False)
+                last_poll = time.monotonic()
+        if upcoming is not None:
+            current = signer.result(upcoming)
+    sender.flush()
+    schedule.send_seconds = time.monotonic() - start
+    return schedule
+
+
+def failure_reason(tracked: TrackedSignature) -> str:
+    if tracked.status == "expired":
+        return "expired: blockhash expired before the transaction landed"
+    message = getattr(tracked.err, "message", None)
+    return f"{tracked.status}: {message or tracked.err}"
+
+
+def _percentile(ordered: Sequence[float], percentile: float) -> float:
+    rank = math.ceil(percentile / 100 * len(ordered))
+    return ordered[min(len(ordered), max(rank, 1)) - 1]
+
+
+def summarize(tracked: Sequence[TrackedSignature], schedule: SendSchedule, sender: TransactionSender) -> Dict[str, Any]:
+    landed = [t for t in tracked if t.status == "confirmed"]
+    latencies = sorted(t.latency for t in landed)
+    window = max(t.landed_at for t in landed) - min(t.submitted_at for t in tracked) if landed else 0.0
+    stats = sender.stats()
+    failures = Counter(failure_reason(t) for t in tracked if t.status != "confirmed")
+    latency_ms = {}
+    if latencies:
+        latency_ms = {f"p{p}": round(_percentile(latencies, p) * 1000, 1) for p in LATENCY_PERCENTILES}
+        latency_ms["max"] = round(latencies[-1] * 1000, 1)
+        latency_ms["mean"] = round(sum(latencies) / len(latencies) * 1000, 1)
+    return {
+        "submitted": schedule.submitted,
+        "landed": len(landed),
+        "failed": stats.failed,
+        "expired": stats.expired,
+        "rejected": stats.rejected,
+        "broadcasts": stats.broadcasts,
+        "send_errors": stats.send_errors,
+        "presign_seconds": round(schedule.presign_seconds, 3),
+        "send_seconds": round(schedule.send_seconds, 3),
+        "offered_tps": round(schedule.submitted / schedule.send_seconds, 1) if schedule.send_seconds else 0.0,
+        "landed_tps": round(len(landed) / window, 1) if window else 0.0,
+        "max_send_lag_ms": None if schedule.max_lag is None else round(schedule.max_lag * 1000, 1),
+        "latency_ms": latency_ms,
+        "failures": dict(failures.most_common()),
+    }
+
+
+def print_report(results: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    def versus(value: float, old: Optional[float]) -> str:
+        return f"  (was {old})" if old is not None and old != value else ""
+
+    old = baseline or {}
+    lag = f", max send lag {results['max_send_lag_ms']} ms" if results["max_send_lag_ms"] is not None else ""
+    print(
+        f"Submitted {results['submitted']} in {results['send_seconds']:.2f}s "
+        f"({results['offered_tps']} tx/s offered{lag})"
+    )
+    print(
+        f"Landed {results['landed']}, failed {results['failed']}, expired {results['expired']}, "
+        f"rejected {results['rejected']}; {results['broadcasts']} sends"
+    )
+    print(f"Landed TPS: {results['landed_tps']}" + versus(results["landed_tps"], old.get("landed_tps")))
+    old_latency = old.get("latency_ms", {})
+    for key, value in results["latency_ms"].items():
+        print(f"  latency {key:>4}: {value:>9.1f} ms" + versus(value, old_latency.get(key)))
+    for reason, count in results["failures"].items():
+        print(f"  {count:>6} x {reason}")
+
+
+def add_pool_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--rpc", help="RPC URL (default: from SOLANA_RPC_URL or solana-validator:8899)")
+    parser.add_argument("--program", type=Pubkey.from_string, default=MY_DEX_PROGRAM_ID, help="my_dex program id")
+    parser.add_argument(
+        "--traders", nargs="+", required=True, help="Keystores (every keypair in them) and keypair files of the traders"
+    )
+    parser.add_argument("--trader-count", type=int, help="Use only the first N traders")
+    parser.add_argument("--max-in-flight", type=int, default=10_000, help="Unconfirmed transactions before sends block")
+    add_sender_arguments(parser)
+
+
+def cmd_setup(args: argparse.Namespace) -> int:
+    client = get_client(args.rpc)
+    payer = load_keypair(args.keypair)
+    traders = load_traders(args.traders, args.trader_count)
+    sender = TransactionSender(
+        client,
+        skip_preflight=args.skip_preflight,
+        rebroadcast_interval=args.rebroadcast_interval,
+        max_in_flight=args.max_in_flight,
+    )
+    with get_blockhash_provider(client) as provider:
+        if args.info:
+            accounts = PoolAccounts.from_swap_info(load_swap_info(args.info), args.program)
+        else:
+            accounts = create_pool(
+                client, sender, provider, payer, args.decimals, args.pool_rate, args.liquidity, args.program
+            )
+            # Written before funding, so a failed funding run can be retried with --info.
+            args.out.write_text(json.dumps(accounts.pool_state(args.pool_rate).swap_info(args.decimals), indent=2))
+            print(f"Pool {accounts.pool} on mints {accounts.token_a_mint} / {accounts.token_b_mint} -> {args.out}")
+        fund_traders(sender, provider, payer, accounts, traders, args.fund)
+    print(f"Funded {len(traders)} traders with {args.fund} base units of each token")
+    return 0
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    if args.open_loop and args.count is None:
+        raise SystemExit("--open-loop needs --count")
+    rate = None if args.open_loop else args.rate
+    count = args.count if args.count is not None else int(args.rate * args.duration)
+    wave = args.wave or (DEFAULT_OPEN_LOOP_WAVE if rate is None else max(1, int(rate * WAVE_SECONDS)))
+    workers = args.workers or os.cpu_count() or 1
+
+    client = get_client(args.rpc)
+    info = load_swap_info(args.info)
+    accounts = PoolAccounts.from_swap_info(info, args.program)
+    traders = load_traders(args.traders, args.trader_count)
+    if not traders:
+        raise SystemExit("No traders given")
+    budget = None
+    if args.cu_limit is not None or args.cu_price:
+        budget = (args.cu_limit, args.cu_price)
+    plan = plan_trades(count, len(traders), args.side, args.amount)
+    sender = TransactionSender(
+        client,
+        skip_preflight=args.skip_preflight,
+        rebroadcast_interval=args.rebroadcast_interval,
+        max_in_flight=args.max_in_flight,
+        poll_interval=args.poll_interval,
+    )
+    pace = "open loop" if rate is None else f"{rate:g} tx/s"
+    print(f"{count} {args.side} trades on pool {accounts.pool} from {len(traders)} traders, {pace}, {workers} signers")
+
+    secrets = [bytes(trader) for trader in traders]
+    with get_blockhash_provider(client) as provider, ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_signer, initargs=(secrets, accounts, budget)
+    ) as pool:
+        schedule = send_paced(sender, WaveSigner(pool, provider, workers), plan, rate, wave, args.poll_interval)
+        tracked = sender.drain(args.timeout)
+    results = summarize(tracked, schedule, sender)
+
+    baseline = json.loads(args.compare.read_text())["results"] if args.compare else None
+    print_report(results, baseline)
+    if args.out:
+        payload = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "config": {
+                "rpc": args.rpc or DEFAULT_RPC,
+                "program": str(accounts.program_id),
+                "pool": str(accounts.pool),
+                "side": args.side,
+                "amount": args.amount,
+                "rate": rate,
+                "count": count,
+                "traders": len(traders),
+                "workers": workers,
+                "skip_preflight": args.skip_preflight,
+                "rebroadcast_interval": args.rebroadcast_interval,
+                "cu_limit": args.cu_limit,
+                "cu_price": args.cu_price,
+            },
+            "results": results,
+        }
+        args.out.write_text(json.dumps(payload, indent=2))
+        print(f"Results written to {args.out}")
+    return 0 if results["landed"] else 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure my_dex buy/sell throughput and latency on a local validator")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    setup = commands.add_parser("setup", help="Create a pool and fund the traders' token accounts")
+    add_pool_arguments(setup)
+    setup.add_argument("--keypair", help="Payer and mint authority (default: ~/.config/solana/id.json)")
+    setup.add_argument("--info", type=Path, help="Fund traders for this existing pool instead of creating one")
+    setup.add_argument("--decimals", type=int, default=DEFAULT_SETUP_DECIMALS, help="Decimals of the new mints")
+    setup.add_argument("--pool-rate", type=int, default=DEFAULT_POOL_RATE, help="rate passed to initialize")
+    setup.add_argument("--liquidity", type=int, default=DEFAULT_LIQUIDITY, help="Base units minted into each vault")
+    setup.add_argument("--fund", type=int, default=DEFAULT_TRADER_FUNDING, help="Base units of each token per trader")
+    setup.add_argument(
+        "--out", type=Path, default=Path(DEFAULT_POOL_INFO), help="Where to write the new pool's swap-info"
+    )
+
+    run = commands.add_parser("run", help="Send trades and report latency and landed TPS")
+    add_pool_arguments(run)
+    run.add_argument("--info", type=Path, default=Path(DEFAULT_POOL_INFO), help="swap-info of the pool to trade on")
+    run.add_argument("--side", choices=("buy", "sell", "mixed"), default="mixed", help="Trade direction")
+    run.add_argument(
+        "--amount", type=int, default=DEFAULT_TRADE_AMOUNT, help="Base units per trade (WSOL for buy, token for sell)"
+    )
+    pacing = run.add_mutually_exclusive_group()
+    pacing.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Trades per second, on a fixed schedule")
+    pacing.add_argument("--open-loop", action="store_true", help="Send every trade as fast as possible")
+    size = run.add_mutually_exclusive_group()
+    size.add_argument("--count", type=int, help="Number of trades")
+    size.add_argument("--duration", type=float, default=10.0, help="Seconds of trades at --rate (default 10)")
+    run.add_argument("--workers", type=int, help="Signing processes (default: number of cores)")
+    run.add_argument("--wave", type=int, help="Trades signed per blockhash (default: 10 s worth, or 2000 open loop)")
+    run.add_argument("--poll-interval", type=float, default=0.1, help="Seconds between signature status polls")
+    run.add_argument("--timeout", type=float, default=90.0, help="Seconds to wait for stragglers after the last send")
+    run.add_argument("--cu-limit", type=int, help="SetComputeUnitLimit for every trade")
+    run.add_argument("--cu-price", type=int, default=0, help="Priority fee in micro-lamports per compute unit")
+    run.add_argument("--out", type=Path, help="Write the results as JSON")
+    run.add_argument("--compare", type=Path, help="Earlier --out file to compare against")
+
+    args = parser.parse_args(argv)
+    try:
+        return cmd_setup(args) if args.command == "setup" else cmd_run(args)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
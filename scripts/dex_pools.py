@@ -0,0 +1,208 @@
+"""Discover ``my_dex`` pools on chain and write swap-info files for them.
+
+One ``getProgramAccounts`` call returns every pool: the node filters on the
+account size and the ``PoolState`` discriminator, and a data slice drops the
+discriminator from the response, so only the 137 bytes of pool fields come
+back per account. ``--mint`` narrows the search to pools holding that mint on
+either side (two memcmp-filtered queries sent in one batch POST).
+
+The fields are decoded straight from the account bytes with a fixed layout
+(``token_a_mint | token_b_mint | token_a_vault | token_b_vault | rate: u64 |
+bump: u8``) instead of anchorpy's IDL coder, all accounts at once through a
+NumPy structured array.
+
+Each pool becomes a swap-info record that ``price_report.py --info`` and
+``dex_quote.py --info`` accept: token A is the custom token and token B is
+the quote side (WSOL for the pools the program is used with).
+
+Usage example:
+  python dex_pools.py --rpc http://localhost:8899
+  python dex_pools.py --mint mntrBoi14K4bn4QqT9pHicv3EKqvxCT4y9mS7YfJkDh --out-dir pools/
+  python price_report.py --info pools/
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import struct
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import base58
+import numpy as np
+from solana.rpc.api import Client
+from solana.rpc.types import DataSliceOpts, MemcmpOpts
+from solders.pubkey import Pubkey
+
+from common import MAX_MULTIPLE_ACCOUNTS, RpcBatch, get_client
+from price_report import MINT_DECIMALS_OFFSET, WSOL_DECIMALS, WSOL_MINT
+from rpc_profile import add_profile_arguments, configure_profiling, span
+
+MY_DEX_PROGRAM_ID = Pubkey.from_string("2JubASqT22dDF7uPzZGtwqerKf6f8FhCms694yssT1ay")
+# Anchor prefixes every account with sha256("account:<Name>")[:8].
+POOL_STATE_DISCRIMINATOR = hashlib.sha256(b"account:PoolState").digest()[:8]
+# discriminator + four pubkeys + rate (u64) + bump (u8), as allocated by `initialize`.
+POOL_STATE_SIZE = 8 + 32 * 4 + 8 + 1
+TOKEN_A_MINT_OFFSET = 8
+TOKEN_B_MINT_OFFSET = 40
+# The discriminator is matched on the node, so only the fields after it are transferred.
+POOL_FIELDS_SLICE = DataSliceOpts(offset=8, length=POOL_STATE_SIZE - 8)
+POOL_FIELDS = struct.Struct("<32s32s32s32sQB")
+POOL_FIELDS_DTYPE = np.dtype([
+    ("token_a_mint", "V32"),
+    ("token_b_mint", "V32"),
+    ("token_a_vault", "V32"),
+    ("token_b_vault", "V32"),
+    ("rate", "<u8"),
+    ("bump", "u1"),
+])
+PUBKEY_FIELDS = ("token_a_mint", "token_b_mint", "token_a_vault", "token_b_vault")
+POOL_RECORD_FIELDS = ("pool", *PUBKEY_FIELDS, "rate", "bump", "token_a_decimals")
+
+
+@dataclass(frozen=True)
+class PoolState:
+    pool: str
+    token_a_mint: str
+    token_b_mint: str
+    token_a_vault: str
+    token_b_vault: str
+    rate: int
+    bump: int
+
+    def swap_info(self, token_decimals: int) -> Dict[str, object]:
+        """The swap-info record ``price_report.load_swap_info`` expects, plus the remaining pool fields."""
+        return {
+            "name": self.pool,
+            "custom_token_mint": self.token_a_mint,
+            "custom_token_decimals": token_decimals,
+            "token_a_vault": self.token_a_vault,
+            "token_b_vault": self.token_b_vault,
+            "token_b_mint": self.token_b_mint,
+            "rate": self.rate,
+            "bump": self.bump,
+        }
+
+
+def pool_filters(mint: Optional[Pubkey] = None, offset: int = TOKEN_A_MINT_OFFSET) -> List[object]:
+    """``getProgramAccounts`` filters matching ``PoolState`` accounts, optionally with ``mint`` at ``offset``."""
+    discriminator = base58.b58encode(POOL_STATE_DISCRIMINATOR).decode()
+    filters: List[object] = [POOL_STATE_SIZE, MemcmpOpts(offset=0, bytes=discriminator)]
+    if mint is not None:
+        filters.append(MemcmpOpts(offset=offset, bytes=str(mint)))
+    return filters
+
+
+def decode_pool_states(pools: Sequence[Pubkey], blob: bytes) -> List[PoolState]:
+    """Decode ``len(pools)`` back-to-back ``POOL_FIELDS_SLICE`` payloads from ``blob``.
+
+    The numeric columns and key bytes come out of one ``frombuffer`` call;
+    each distinct key is base58-encoded once.
+    """
+    if len(blob) != len(pools) * POOL_FIELDS.size:
+        raise ValueError(f"Expected {len(pools)} pool records of {POOL_FIELDS.size} bytes, got {len(blob)} bytes")
+    records = np.frombuffer(blob, dtype=POOL_FIELDS_DTYPE)
+    columns = {name: records[name].tolist() for name in POOL_FIELDS_DTYPE.names}
+    names: Dict[bytes, str] = {}
+    for name in PUBKEY_FIELDS:
+        columns[name] = [names.get(key) or names.setdefault(key, str(Pubkey.from_bytes(key))) for key in columns[name]]
+    return [
+        PoolState(str(pool), *values)
+        for pool, values in zip(pools, zip(*(columns[name] for name in (*PUBKEY_FIELDS, "rate", "bump"))))
+    ]
+
+
+def discover_pools(
+    client: Client, mints: Sequence[Pubkey] = (), program_id: Pubkey = MY_DEX_PROGRAM_ID
+) -> List[PoolState]:
+    """Every pool of ``program_id``, or only pools holding one of ``mints`` on either side, in one POST."""
+    with RpcBatch(client) as batch:
+        if mints:
+            queries = [
+                batch.get_program_accounts(program_id, data_slice=POOL_FIELDS_SLICE, filters=pool_filters(mint, offset))
+                for mint in mints
+                for offset in (TOKEN_A_MINT_OFFSET, TOKEN_B_MINT_OFFSET)
+            ]
+        else:
+            queries = [batch.get_program_accounts(program_id, data_slice=POOL_FIELDS_SLICE, filters=pool_filters())]
+    # A pool that holds two of the requested mints matches two queries.
+    accounts = {keyed.pubkey: keyed.account.data for query in queries for keyed in query.get().value}
+    with span("decode.pools"):
+        return decode_pool_states(list(accounts), b"".join(accounts.values()))
+
+
+def mint_decimals(client: Client, mints: Sequence[str], chunk_size: int = MAX_MULTIPLE_ACCOUNTS) -> Dict[str, int]:
+    """Decimals of every mint that exists, read with one-byte slices in one POST."""
+    known = {WSOL_MINT: WSOL_DECIMALS}
+    missing = [mint for mint in dict.fromkeys(mints) if mint not in known]
+    decimals_slice = DataSliceOpts(offset=MINT_DECIMALS_OFFSET, length=1)
+    with RpcBatch(client) as batch:
+        chunks = [
+            batch.get_multiple_accounts(
+                [Pubkey.from_string(mint) for mint in missing[start:start + chunk_size]], data_slice=decimals_slice
+            )
+            for start in range(0, len(missing), chunk_size)
+        ]
+    accounts = [account for chunk in chunks for account in chunk.get().value]
+    for mint, account in zip(missing, accounts):
+        if account is not None and account.data:
+            known[mint] = account.data[0]
+    return known
+
+
+def write_swap_infos(pools: Sequence[PoolState], decimals: Dict[str, int], out_dir: Path) -> int:
+    """One ``<pool>.json`` swap-info file per pool whose token A mint exists; returns the number written."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for pool in pools:
+        if pool.token_a_mint not in decimals:
+            print(f"Skipping pool {pool.pool}: mint {pool.token_a_mint} not found", file=sys.stderr)
+            continue
+        (out_dir / f"{pool.pool}.json").write_text(json.dumps(pool.swap_info(decimals[pool.token_a_mint]), indent=2))
+        written += 1
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Discover my_dex pools and emit swap-info records for them")
+    parser.add_argument("--rpc", help="RPC URL (default: from SOLANA_RPC_URL or solana-validator:8899)")
+    parser.add_argument("--program", type=Pubkey.from_string, default=MY_DEX_PROGRAM_ID, help="my_dex program id")
+    parser.add_argument(
+        "--mint", type=Pubkey.from_string, action="append", default=[], help="Only pools holding this mint (repeatable)"
+    )
+    parser.add_argument("--format", choices=("json", "csv"), default="json", help="Output format on stdout")
+    parser.add_argument("--out-dir", type=Path, help="Write one swap-info file per pool here instead of printing")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    configure_profiling(args)
+
+    client = get_client(args.rpc)
+    start = time.perf_counter()
+    pools = discover_pools(client, args.mint, args.program)
+    decimals = mint_decimals(client, [pool.token_a_mint for pool in pools])
+    print(f"Found {len(pools)} pools in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+    if args.out_dir is not None:
+        written = write_swap_infos(pools, decimals, args.out_dir)
+        print(f"Wrote {written} swap-info files to {args.out_dir}", file=sys.stderr)
+        return 0
+    writer = csv.DictWriter(sys.stdout, fieldnames=POOL_RECORD_FIELDS) if args.format == "csv" else None
+    if writer is not None:
+        writer.writeheader()
+    for pool in pools:
+        record = {**asdict(pool), "token_a_decimals": decimals.get(pool.token_a_mint)}
+        if writer is not None:
+            writer.writerow({key: "" if value is None else value for key, value in record.items()})
+        else:
+            sys.stdout.write(json.dumps(record) + "\n")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,303 @@
+"""Vectorized quote and trade simulation for the ``my_dex`` pool.
+
+``FixedRateModel`` mirrors the on-chain program exactly: ``buy(amount_b)``
+pays ``amount_b * 2`` of token A out of the A vault, ``sell(amount_a)`` pays
+``amount_a / 2`` (truncated) of WSOL out of the B vault. The program ignores
+``PoolState.rate`` and is built with overflow checks, so a trade fails (and
+the transaction reverts, leaving both vaults untouched) when the product
+overflows u64, when the paying vault is short, or when the receiving vault
+would overflow. User-side balances are not checked.
+
+``ConstantProductModel`` is an x*y=k curve over the same vaults for
+comparison. All amounts are raw base units held in ``uint64`` arrays.
+
+Usage example:
+  python dex_quote.py --vault-a 5000000000000 --vault-b 1000000000000 --side buy --amounts 1000000 2000000
+  python dex_quote.py --url http://localhost:8899 --side sell --range 0:4000000000000:9 --model constant-product
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+BUY = 0
+SELL = 1
+U64_MAX = 2 ** 64 - 1
+BPS = 10_000
+
+
+def as_u64(values) -> np.ndarray:
+    """Convert integer amounts to a ``uint64`` array, rejecting floats and out-of-range values."""
+    arr = np.asarray(values)
+    if arr.dtype.kind == "f" and not isinstance(values, np.ndarray):
+        # NumPy turns a mix of small ints and ints above int64 into float64; keep them exact.
+        arr = np.asarray(values, dtype=object)
+    if arr.dtype.kind == "u":
+        return arr.astype(np.uint64, copy=False)
+    if arr.dtype.kind == "i":
+        if arr.size and arr.min() < 0:
+            raise ValueError("Token amounts cannot be negative")
+        return arr.astype(np.uint64)
+    if arr.dtype.kind == "O":
+        if not all(isinstance(value, (int, np.integer)) for value in arr.flat):
+            raise TypeError("Token amounts must be integers")
+        try:
+            return np.array(arr.tolist(), dtype=np.uint64)
+        except OverflowError:
+            raise ValueError(f"Token amounts must be in [0, {U64_MAX}]") from None
+    raise TypeError(f"Token amounts must be integers, got {arr.dtype}")
+
+
+def as_sides(sides, shape: Tuple[int, ...]) -> np.ndarray:
+    """Boolean "is sell" array from ``BUY``/``SELL`` codes or ``"buy"``/``"sell"`` strings."""
+    arr = np.asarray(sides)
+    if arr.dtype.kind in "US":
+        arr = np.char.lower(arr.astype(str))
+        if not np.isin(arr, ("buy", "sell")).all():
+            raise ValueError("Trade sides must be 'buy' or 'sell'")
+        sell = arr == "sell"
+    else:
+        if not np.isin(arr, (BUY, SELL)).all():
+            raise ValueError(f"Trade sides must be BUY ({BUY}) or SELL ({SELL})")
+        sell = arr == SELL
+    return np.broadcast_to(sell, shape)
+
+
+def mul_div(a, b, c) -> np.ndarray:
+    """Exact ``floor(a * b / c)`` for ``uint64`` inputs whose product may exceed 64 bits.
+
+    The quotient itself must fit in 64 bits; elements with ``c == 0`` yield 0.
+    """
+    a, b, c = np.broadcast_arrays(as_u64(a), as_u64(b), as_u64(c))
+    out = np.zeros(a.shape, dtype=np.uint64)
+    valid = c > 0
+    fast = valid & (a <= np.uint64(U64_MAX) // np.maximum(b, np.uint64(1)))
+    out[fast] = a[fast] * b[fast] // c[fast]
+    slow = valid & ~fast
+    if slow.any():
+        # Fall back to Python integers for the (rare) 128-bit products.
+        wide = a[slow].astype(object) * b[slow].astype(object) // c[slow].astype(object)
+        out[slow] = np.array(wide.tolist(), dtype=np.uint64)
+    return out
+
+
+class FixedRateModel:
+    """The on-chain ``my_dex`` pricing: a fixed 2 A per B, truncating on sell."""
+
+    name = "fixed"
+
+    def __init__(self, ratio: int = 2):
+        if ratio < 1:
+            raise ValueError("ratio must be a positive integer")
+        self.ratio = ratio
+
+    def amounts_out(self, sell, amounts, vault_a, vault_b) -> Tuple[np.ndarray, np.ndarray]:
+        ratio = np.uint64(self.ratio)
+        # checked_mul: amount_b * 2 aborts the transaction on overflow.
+        buy_ok = amounts <= np.uint64(U64_MAX) // ratio
+        bought = np.where(buy_ok, amounts, np.uint64(0)) * ratio
+        return np.where(sell, amounts // ratio, bought), sell | buy_ok
+
+
+class ConstantProductModel:
+    """x*y=k over the same vaults, with an optional input fee, for comparison."""
+
+    name = "constant-product"
+
+    def __init__(self, fee_bps: int = 0):
+        if not 0 <= fee_bps < BPS:
+            raise ValueError(f"fee_bps must be in [0, {BPS})")
+        self.fee_bps = fee_bps
+
+    def amounts_out(self, sell, amounts, vault_a, vault_b) -> Tuple[np.ndarray, np.ndarray]:
+        reserve_in = np.where(sell, vault_a, vault_b)
+        reserve_out = np.where(sell, vault_b, vault_a)
+        keep = np.uint64(BPS - self.fee_bps)
+        # floor(amount * keep / BPS) without a 128-bit intermediate.
+        effective = amounts // np.uint64(BPS) * keep + amounts % np.uint64(BPS) * keep // np.uint64(BPS)
+        fits = effective <= np.uint64(U64_MAX) - reserve_in
+        denominator = np.where(fits, reserve_in + np.where(fits, effective, np.uint64(0)), np.uint64(0))
+        return mul_div(reserve_out, effective, denominator), fits
+
+
+PricingModel = Union[FixedRateModel, ConstantProductModel]
+FIXED_RATE = FixedRateModel()
+
+
+@dataclass(frozen=True)
+class PoolReserves:
+    """Raw vault balances: token A (the custom token) and token B (WSOL)."""
+
+    vault_a: int
+    vault_b: int
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> "PoolReserves":
+        """Build from a ``price_report.PoolSnapshot`` (UI amounts) by rescaling to base units."""
+        return cls(
+            vault_a=int(snapshot.token_balance.scaleb(snapshot.token_decimals)),
+            vault_b=int(snapshot.wsol_balance.scaleb(snapshot.wsol_decimals)),
+        )
+
+
+@dataclass
+class TradeResult:
+    """Per-trade outcome; failed trades have zero in/out and leave the vaults unchanged."""
+
+    sell: np.ndarray
+    amount_in: np.ndarray
+    amount_out: np.ndarray
+    ok: np.ndarray
+    # Vault balances right after each trade.
+    vault_a: np.ndarray
+    vault_b: np.ndarray
+
+    def __len__(self) -> int:
+        return self.ok.size
+
+
+def _apply(model: PricingModel, sell, amounts, vault_a, vault_b):
+    out, ok = model.amounts_out(sell, amounts, vault_a, vault_b)
+    reserve_in = np.where(sell, vault_a, vault_b)
+    reserve_out = np.where(sell, vault_b, vault_a)
+    # The SPL token transfers fail when the paying vault is short or the receiving one would overflow.
+    ok = ok & (amounts <= np.uint64(U64_MAX) - reserve_in) & (out <= reserve_out)
+    amount_in = np.where(ok, amounts, np.uint64(0))
+    amount_out = np.where(ok, out, np.uint64(0))
+    new_a = np.where(sell, vault_a + amount_in, vault_a - amount_out)
+    new_b = np.where(sell, vault_b - amount_out, vault_b + amount_in)
+    return amount_in, amount_out, ok, new_a, new_b
+
+
+def quote(
+    reserves: PoolReserves, sides, amounts, model: PricingModel = FIXED_RATE
+) -> TradeResult:
+    """Evaluate every trade independently against the same pool state."""
+    amounts = as_u64(amounts)
+    sell = as_sides(sides, amounts.shape)
+    vault_a = np.full(amounts.shape, reserves.vault_a, dtype=np.uint64)
+    vault_b = np.full(amounts.shape, reserves.vault_b, dtype=np.uint64)
+    amount_in, amount_out, ok, new_a, new_b = _apply(model, sell, amounts, vault_a, vault_b)
+    return TradeResult(sell, amount_in, amount_out, ok, new_a, new_b)
+
+
+def simulate(
+    reserves: PoolReserves, sides, amounts, model: PricingModel = FIXED_RATE
+) -> TradeResult:
+    """Apply trades in order along the last axis, each seeing the vaults left by the previous one.
+
+    ``amounts`` of shape ``(steps,)`` is one sequence; ``(sequences, steps)``
+    simulates many candidate sequences at once, vectorized across sequences.
+    """
+    amounts = as_u64(amounts)
+    if amounts.ndim not in (1, 2):
+        raise ValueError("amounts must be a 1-D sequence or a 2-D array of sequences")
+    sell = as_sides(sides, amounts.shape)
+    shape = amounts.shape
+    result = TradeResult(
+        sell=sell,
+        amount_in=np.zeros(shape, dtype=np.uint64),
+        amount_out=np.zeros(shape, dtype=np.uint64),
+        ok=np.zeros(shape, dtype=bool),
+        vault_a=np.zeros(shape, dtype=np.uint64),
+        vault_b=np.zeros(shape, dtype=np.uint64),
+    )
+    vault_a = np.full(shape[:-1], reserves.vault_a, dtype=np.uint64)
+    vault_b = np.full(shape[:-1], reserves.vault_b, dtype=np.uint64)
+    for step in range(shape[-1]):
+        amount_in, amount_out, ok, vault_a, vault_b = _apply(
+            model, sell[..., step], amounts[..., step], vault_a, vault_b
+        )
+        result.amount_in[..., step] = amount_in
+        result.amount_out[..., step] = amount_out
+        result.ok[..., step] = ok
+        result.vault_a[..., step] = vault_a
+        result.vault_b[..., step] = vault_b
+    return result
+
+
+def max_fill(reserves: PoolReserves, side: int, model: PricingModel = FIXED_RATE) -> int:
+    """Largest single trade on ``side`` that the pool can fill."""
+    if isinstance(model, FixedRateModel):
+        if side == BUY:
+            return min(reserves.vault_a // model.ratio, U64_MAX // model.ratio, U64_MAX - reserves.vault_b)
+        # amount_a // ratio <= vault_b
+        return min(reserves.vault_b * model.ratio + model.ratio - 1, U64_MAX - reserves.vault_a)
+    # A constant-product trade can never drain the output vault; only the input vault limits it.
+    return U64_MAX - (reserves.vault_a if side == SELL else reserves.vault_b)
+
+
+def parse_range(spec: str) -> np.ndarray:
+    """``START:STOP:COUNT`` -> ``COUNT`` evenly spaced integer amounts, both ends included."""
+    try:
+        start, stop, count = (int(part) for part in spec.split(":"))
+    except ValueError:
+        raise ValueError(f"Invalid range {spec!r}; expected START:STOP:COUNT") from None
+    if count < 1:
+        raise ValueError("Range count must be at least 1")
+    if count == 1:
+        return as_u64([start])
+    return as_u64([start + (stop - start) * i // (count - 1) for i in range(count)])
+
+
+def print_trades(result: TradeResult, limit: Optional[int] = None) -> None:
+    rows = len(result) if limit is None else min(limit, len(result))
+    print(f"{'#':>5}  {'side':<5}{'amount in':>22}{'amount out':>22}  {'ok':<4}{'vault A after':>22}{'vault B after':>22}")
+    flat = [getattr(result, name).reshape(-1) for name in ("sell", "amount_in", "amount_out", "ok", "vault_a", "vault_b")]
+    for i in range(rows):
+        sell, amount_in, amount_out, ok, vault_a, vault_b = (column[i] for column in flat)
+        print(
+            f"{i:>5}  {'sell' if sell else 'buy':<5}{int(amount_in):>22}{int(amount_out):>22}  "
+            f"{'yes' if ok else 'no':<4}{int(vault_a):>22}{int(vault_b):>22}"
+        )
+    if rows < len(result):
+        print(f"  ... {len(result) - rows} more")
+    print(f"Filled {int(result.ok.sum())}/{len(result)} trades.")
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Quote my_dex trades from a pool snapshot")
+    parser.add_argument("--url", help="RPC endpoint to read the vault balances from")
+    parser.add_argument(
+        "--info", type=Path, default=Path(__file__).resolve().parent / "swap-info.json", help="Path to swap-info.json"
+    )
+    parser.add_argument("--vault-a", type=int, help="Token A vault balance in base units (instead of --url)")
+    parser.add_argument("--vault-b", type=int, help="WSOL vault balance in lamports (instead of --url)")
+    parser.add_argument("--side", choices=("buy", "sell"), required=True, help="buy: pay WSOL for A; sell: pay A for WSOL")
+    amounts = parser.add_mutually_exclusive_group(required=True)
+    amounts.add_argument("--amounts", nargs="+", type=int, help="Input amounts in base units")
+    amounts.add_argument("--range", help="START:STOP:COUNT evenly spaced input amounts")
+    parser.add_argument("--model", choices=("fixed", "constant-product"), default="fixed", help="Pricing model")
+    parser.add_argument("--fee-bps", type=int, default=0, help="Input fee for --model constant-product")
+    parser.add_argument("--sequence", action="store_true", help="Apply the trades one after another instead of independently")
+    parser.add_argument("--show", type=int, default=20, help="Rows to print")
+    args = parser.parse_args(argv)
+
+    if args.vault_a is not None and args.vault_b is not None:
+        reserves = PoolReserves(args.vault_a, args.vault_b)
+    elif args.url:
+        from common import get_client
+        from price_report import load_swap_info, read_pool_snapshot
+
+        reserves = PoolReserves.from_snapshot(read_pool_snapshot(get_client(args.url), load_swap_info(args.info)))
+    else:
+        parser.error("pass --url, or both --vault-a and --vault-b")
+
+    model: PricingModel = FIXED_RATE if args.model == "fixed" else ConstantProductModel(args.fee_bps)
+    trade_amounts = as_u64(args.amounts) if args.amounts else parse_range(args.range)
+    run = simulate if args.sequence else quote
+    result = run(reserves, args.side, trade_amounts, model)
+    side = BUY if args.side == "buy" else SELL
+    print(f"Pool: vault A {reserves.vault_a}, vault B {reserves.vault_b}; model {model.name}")
+    print(f"Largest single {args.side}: {max_fill(reserves, side, model)}")
+    print_trades(result, args.show)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
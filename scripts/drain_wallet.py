@@ -1,30 +1,194 @@
+import sys
+
+from scriptd import delegate
+
+# Hand the command to a running scriptd daemon before the slow imports below.
+if __name__ == "__main__":
+    delegate("drain_wallet", sys.argv[1:])
+
 import argparse
+import csv
+import glob
+import os
+import time
+from dataclasses import dataclass
+from typing import List, Optional
 
 from common import (
+    ConfirmationTracker,
+    TrackedSignature,
     estimate_simple_transfer_fee,
+    get_balances,
+    get_blockhash_provider,
     get_client,
+    get_fee_cache,
     load_keypair,
     parse_pubkey,
     print_balances,
+    report_confirmation,
     send_transfer_transaction,
-    wait_for_confirmation,
 )
+from compute_budget import ComputeBudgetTuner, add_compute_budget_arguments, tuner_from_args
+from rpc_profile import add_profile_arguments, configure_profiling
 from solana.constants import LAMPORTS_PER_SOL
+from solders.keypair import Keypair
+
+
+@dataclass
+class SweepResult:
+    path: str
+    wallet: str
+    balance: int
+    lamports: int
+    status: str
+    tracked: Optional[TrackedSignature] = None
+
+    @property
+    def recovered(self) -> int:
+        return self.lamports if self.status == "confirmed" else 0
+
+
+def expand_keypair_paths(spec: str) -> List[str]:
+    """A directory means every ``*.json`` inside it; anything else is treated as a glob."""
+    pattern = os.path.join(spec, "*.json") if os.path.isdir(spec) else os.path.expanduser(spec)
+    return sorted(glob.glob(pattern))
+
+
+def sweep_wallets(
+        client,
+        keypairs: List[Keypair],
+        paths: List[str],
+        to_pub,
+        max_in_flight: int = 8,
+        ws_url: Optional[str] = None,
+        tuner: Optional[ComputeBudgetTuner] = None,
+) -> List[SweepResult]:
+    """Drain every wallet above the transfer fee into ``to_pub`` with at most ``max_in_flight`` unconfirmed."""
+    provider = get_blockhash_provider(client)
+    fee = estimate_simple_transfer_fee(
+        client, keypairs[0].pubkey(), to_pub, provider=provider, fee_cache=get_fee_cache(client), tuner=tuner
+    )
+    balances = get_balances(client, [kp.pubkey() for kp in keypairs])
+    print(f"Комиссия за перевод: {fee} лампортов.")
+
+    tracker = ConfirmationTracker(client)
+    results: List[SweepResult] = []
+    with provider:
+        for path, keypair, balance in zip(paths, keypairs, balances):
+            lamports = balance - fee
+            result = SweepResult(
+                path=path, wallet=str(keypair.pubkey()), balance=balance, lamports=max(lamports, 0), status="skipped"
+            )
+            results.append(result)
+            if lamports <= 0:
+                continue
+            while len(tracker.pending()) >= max_in_flight:
+                if not tracker.poll_once():
+                    time.sleep(tracker.min_interval)
+            latest = provider.get()
+            sig = send_transfer_transaction(
+                client, keypair, to_pub, result.lamports, blockhash=latest.blockhash, tuner=tuner
+            )
+            if sig is None:
+                result.status = "send_failed"
+                continue
+            result.tracked = tracker.add(sig, latest.last_valid_block_height)
+        tracker.confirm(ws_url=ws_url)
+
+    for result in results:
+        if result.tracked is not None:
+            result.status = result.tracked.status
+    return results
+
+
+def print_sweep_summary(results: List[SweepResult]) -> None:
+    print(f"{'Кошелёк':<46}{'Баланс':>16}{'Возвращено':>16}  Статус")
+    for result in results:
+        print(f"{result.wallet:<46}{result.balance:>16}{result.recovered:>16}  {result.status}")
+    recovered = sum(result.recovered for result in results)
+    swept = sum(1 for result in results if result.recovered)
+    print(
+        f"Опустошено кошельков: {swept}/{len(results)}. "
+        f"Возвращено: {recovered} лампортов ({recovered / LAMPORTS_PER_SOL} SOL)."
+    )
+
+
+def write_sweep_report(path: str, results: List[SweepResult]) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["keypair", "wallet", "balance", "recovered", "signature", "status", "latency_sec"])
+        for result in results:
+            tracked = result.tracked
+            latency = None if tracked is None else tracked.latency
+            writer.writerow([
+                result.path,
+                result.wallet,
+                result.balance,
+                result.recovered,
+                "" if tracked is None else str(tracked.signature),
+                result.status,
+                "" if latency is None else f"{latency:.3f}",
+            ])
+
+
+def drain_tuner(client, args) -> Optional[ComputeBudgetTuner]:
+    tuner = tuner_from_args(client, args)
+    if tuner is not None:
+        # The amount sent is the balance minus the fee, so the priority price must not move after the estimate.
+        tuner.price_ttl = float("inf")
+    return tuner
+
+
+def run_sweep(args, client, to_pub):
+    paths = expand_keypair_paths(args.sweep)
+    if not paths:
+        print(f"Не найдено ни одного файла ключа: {args.sweep}")
+        return
+    keypairs: List[Keypair] = [load_keypair(path) for path in paths]
+    print(f"Кошельков к опустошению: {len(keypairs)}")
+
+    results = sweep_wallets(
+        client,
+        keypairs,
+        paths,
+        to_pub,
+        max_in_flight=args.max_in_flight,
+        ws_url=args.ws_url,
+        tuner=drain_tuner(client, args),
+    )
+    print_sweep_summary(results)
+    if args.report:
+        write_sweep_report(args.report, results)
+        print(f"Отчёт: {args.report}")
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Transfer all available lamports to an address")
-    parser.add_argument(
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
         "--from-keypair",
         help="Path to sender's keypair file (default: ~/.config/solana/id.json)"
     )
+    source.add_argument("--sweep", help="Directory or glob of keypair files to drain into --to")
     parser.add_argument("--to", required=True, help="Recipient's public key")
     parser.add_argument("--rpc", help="RPC URL (default: from SOLANA_RPC_URL or solana-validator:8899)")
-    args = parser.parse_args()
+    parser.add_argument("--ws-url", help="Websocket URL; confirm via signatureSubscribe instead of polling")
+    parser.add_argument("--max-in-flight", type=int, default=8, help="Sweep mode: max unconfirmed transactions")
+    parser.add_argument("--report", help="Sweep mode: write a per-wallet CSV report to this path")
+    add_compute_budget_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    configure_profiling(args)
 
     client = get_client(args.rpc)
-    from_keypair = load_keypair(args.from_keypair)
     to_pub = parse_pubkey(args.to)
+    if args.sweep:
+        run_sweep(args, client, to_pub)
+        return
+
+    from_keypair = load_keypair(args.from_keypair)
+    provider = get_blockhash_provider(client)
+    tuner = drain_tuner(client, args)
 
     balance_resp = client.get_balance(from_keypair.pubkey())
     balance = balance_resp.value if balance_resp.value is not None else 0
@@ -32,7 +196,9 @@ def main():
         f"Текущий баланс отправителя ({from_keypair.pubkey()}): {balance} лампортов ({balance / LAMPORTS_PER_SOL} SOL)"
     )
 
-    fee = estimate_simple_transfer_fee(client, from_keypair.pubkey(), to_pub)
+    fee = estimate_simple_transfer_fee(
+        client, from_keypair.pubkey(), to_pub, provider=provider, fee_cache=get_fee_cache(client), tuner=tuner
+    )
     lamports = balance - fee
 
     if lamports <= 0:
@@ -43,13 +209,16 @@ def main():
         f"Оцениваемая комиссия: {fee} лампортов. К переводу: {lamports} лампортов ({lamports / LAMPORTS_PER_SOL} SOL)."
     )
 
-    sig = send_transfer_transaction(client, from_keypair, to_pub, lamports)
+    latest = provider.get()
+    sig = send_transfer_transaction(client, from_keypair, to_pub, lamports, blockhash=latest.blockhash, tuner=tuner)
     if sig is None:
         return
 
     print(f"Signature: {sig}")
-    ok = wait_for_confirmation(client, sig)
-    print("Статус:", "✅ подтверждено" if ok else "⏳ не подтверждено (проверь позже)")
+    tracker = ConfirmationTracker(client)
+    tracked = tracker.add(sig, latest.last_valid_block_height)
+    tracker.confirm(ws_url=args.ws_url)
+    report_confirmation(tracked)
 
     print_balances(client, from_keypair.pubkey(), to_pub)
 
@@ -0,0 +1,160 @@
+"""Compact binary keystore for large numbers of throwaway wallets.
+
+Layout (little-endian)::
+
+    header   magic "SKS1" | version u32 | count u64
+    records  count x 64 bytes, the solana CLI keypair bytes (secret | pubkey)
+    index    count x (pubkey 32 bytes | record u32), sorted by pubkey
+
+The file is memory-mapped; records and slices are handed out as
+``memoryview`` objects, and a ``Keypair`` is only built when asked for.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Union
+
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+
+KEYSTORE_MAGIC = b"SKS1"
+KEYSTORE_VERSION = 1
+RECORD_SIZE = 64
+PUBKEY_OFFSET = 32
+
+_HEADER = struct.Struct("<4sIQ")
+_INDEX_ENTRY = struct.Struct("<32sI")
+# Keypairs generated per task when provisioning in parallel.
+GENERATE_CHUNK = 1000
+
+
+def is_keystore(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(KEYSTORE_MAGIC)) == KEYSTORE_MAGIC
+    except OSError:
+        return False
+
+
+def write_keystore(path: str, records: Union[bytes, bytearray, memoryview]) -> int:
+    """Write concatenated 64-byte keypair records plus the pubkey index; return the record count."""
+    view = memoryview(records)
+    if len(view) % RECORD_SIZE:
+        raise ValueError(f"Keystore records must be a multiple of {RECORD_SIZE} bytes")
+    count = len(view) // RECORD_SIZE
+    index = sorted(
+        (bytes(view[i * RECORD_SIZE + PUBKEY_OFFSET:(i + 1) * RECORD_SIZE]), i) for i in range(count)
+    )
+    tmp_path = f"{path}.tmp"
+    # The records are secret keys: keep the file private like solana-keygen does.
+    with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+        f.write(_HEADER.pack(KEYSTORE_MAGIC, KEYSTORE_VERSION, count))
+        f.write(view)
+        f.write(b"".join(_INDEX_ENTRY.pack(pubkey, i) for pubkey, i in index))
+    os.replace(tmp_path, path)
+    return count
+
+
+def _generate_records(count: int) -> bytes:
+    return b"".join(bytes(Keypair()) for _ in range(count))
+
+
+def generate_keystore(path: str, count: int, workers: Optional[int] = None) -> int:
+    """Generate ``count`` keypairs across a process pool and write them to ``path``."""
+    chunks = [min(GENERATE_CHUNK, count - start) for start in range(0, count, GENERATE_CHUNK)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        records = b"".join(pool.map(_generate_records, chunks))
+    return write_keystore(path, records)
+
+
+class Keystore:
+    """Read-only, memory-mapped view of a keystore file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic, version, count = _HEADER.unpack_from(self._view, 0)
+        if magic != KEYSTORE_MAGIC:
+            raise ValueError(f"{path} is not a keystore file")
+        if version != KEYSTORE_VERSION:
+            raise ValueError(f"Unsupported keystore version {version}")
+        records_end = _HEADER.size + count * RECORD_SIZE
+        if len(self._view) != records_end + count * _INDEX_ENTRY.size:
+            raise ValueError(f"Keystore {path} is truncated")
+        self.count = count
+        self._records = self._view[_HEADER.size:records_end]
+        self._index = self._view[records_end:]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _check(self, i: int) -> int:
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(f"Keystore record {i} out of range (0..{self.count - 1})")
+        return i
+
+    def record(self, i: int) -> memoryview:
+        """The 64 raw keypair bytes of record ``i``."""
+        i = self._check(i)
+        return self._records[i * RECORD_SIZE:(i + 1) * RECORD_SIZE]
+
+    def records(self, start: int = 0, stop: Optional[int] = None) -> memoryview:
+        """Records ``start:stop`` as one contiguous view (no copy)."""
+        start, stop, _ = slice(start, stop).indices(self.count)
+        return self._records[start * RECORD_SIZE:max(start, stop) * RECORD_SIZE]
+
+    def keypair(self, i: int) -> Keypair:
+        return Keypair.from_bytes(self.record(i))
+
+    def pubkey(self, i: int) -> Pubkey:
+        return Pubkey.from_bytes(bytes(self.record(i)[PUBKEY_OFFSET:]))
+
+    def keypairs(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Keypair]:
+        view = self.records(start, stop)
+        for offset in range(0, len(view), RECORD_SIZE):
+            yield Keypair.from_bytes(view[offset:offset + RECORD_SIZE])
+
+    def pubkeys(self, start: int = 0, stop: Optional[int] = None) -> List[Pubkey]:
+        view = self.records(start, stop)
+        return [
+            Pubkey.from_bytes(bytes(view[offset + PUBKEY_OFFSET:offset + RECORD_SIZE]))
+            for offset in range(0, len(view), RECORD_SIZE)
+        ]
+
+    def index_of(self, pubkey: Union[Pubkey, str]) -> int:
+        """Binary search the pubkey index; raise ``KeyError`` if the wallet is not in the store."""
+        target = bytes(Pubkey.from_string(pubkey) if isinstance(pubkey, str) else pubkey)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key, record = _INDEX_ENTRY.unpack_from(self._index, mid * _INDEX_ENTRY.size)
+            if key < target:
+                lo = mid + 1
+            elif key > target:
+                hi = mid
+            else:
+                return record
+        raise KeyError(f"{pubkey} is not in keystore {self.path}")
+
+    def find(self, pubkey: Union[Pubkey, str]) -> Keypair:
+        return self.keypair(self.index_of(pubkey))
+
+    def close(self) -> None:
+        self._records.release()
+        self._index.release()
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "Keystore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
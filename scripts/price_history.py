@@ -0,0 +1,484 @@
+"""Append-only, memory-mapped price history with a NumPy query API.
+
+A history is a directory of segment files. Each segment is preallocated for
+a fixed number of records and laid out column by column::
+
+    header   magic "PHS1" | version u32 | count u64 | capacity u64 | meta length u32 | meta JSON
+             (padded to HEADER_SIZE)
+    columns  one contiguous ``capacity x itemsize`` block per column, 64-byte aligned
+
+A record is written into every column first and only then counted, so a
+reader never sees a half-written record. When a segment is full the writer
+rolls over to the next one. Queries slice the columns by time with a binary
+search and hand back plain NumPy arrays; nothing is parsed.
+
+Recording is started from price_report (``--record DIR``); this module's
+CLI queries a history:
+
+Usage example:
+  python price_report.py --record history/ --interval 1
+  python price_history.py history/ --describe
+  python price_history.py history/ --column SOL.price --since 3600 --ohlc 60
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+HISTORY_MAGIC = b"PHS1"
+HISTORY_VERSION = 1
+HEADER_SIZE = 4096
+COLUMN_ALIGN = 64
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+TIME_COLUMN = "time"
+# Vault amount recorded when the vault could not be read.
+MISSING_AMOUNT = 2 ** 64 - 1
+
+_HEADER = struct.Struct("<4sIQQI")
+_COUNT_OFFSET = 8
+_SEGMENT_GLOB = "segment-*.phs"
+
+
+def _column_offsets(columns: Sequence[Tuple[str, str]], capacity: int) -> Dict[str, int]:
+    offsets: Dict[str, int] = {}
+    offset = HEADER_SIZE
+    for name, dtype in columns:
+        offsets[name] = offset
+        offset += -(-capacity * np.dtype(dtype).itemsize // COLUMN_ALIGN) * COLUMN_ALIGN
+    offsets[""] = offset  # end of file
+    return offsets
+
+
+class Segment:
+    """One memory-mapped segment file."""
+
+    def __init__(self, path: Path, writable: bool = False):
+        self.path = path
+        self.writable = writable
+        with open(path, "r+b" if writable else "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        magic, version, _count, capacity, meta_len = _HEADER.unpack_from(self._mmap, 0)
+        if magic != HISTORY_MAGIC:
+            raise ValueError(f"{path} is not a price history segment")
+        if version != HISTORY_VERSION:
+            raise ValueError(f"Unsupported price history version {version}")
+        self.capacity = capacity
+        self.meta = json.loads(self._mmap[_HEADER.size:_HEADER.size + meta_len])
+        self.columns: List[Tuple[str, str]] = [tuple(column) for column in self.meta["columns"]]
+        offsets = _column_offsets(self.columns, capacity)
+        if len(self._mmap) < offsets[""]:
+            raise ValueError(f"Price history segment {path} is truncated")
+        self._arrays = {
+            name: np.frombuffer(self._mmap, dtype=dtype, count=capacity, offset=offsets[name])
+            for name, dtype in self.columns
+        }
+
+    @classmethod
+    def create(
+        cls, path: Path, columns: Sequence[Tuple[str, str]], capacity: int, meta: Optional[Dict[str, Any]] = None
+    ) -> "Segment":
+        if not columns or columns[0] != (TIME_COLUMN, "f8"):
+            raise ValueError(f"The first column must be ({TIME_COLUMN!r}, 'f8')")
+        body = json.dumps({**(meta or {}), "columns": [list(column) for column in columns]}).encode()
+        if _HEADER.size + len(body) > HEADER_SIZE:
+            raise ValueError("Price history metadata does not fit in the segment header")
+        size = _column_offsets(columns, capacity)[""]
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(HISTORY_MAGIC, HISTORY_VERSION, 0, capacity, len(body)) + body)
+            # Sparse until written to.
+            f.truncate(size)
+        os.replace(tmp_path, path)
+        return cls(path, writable=True)
+
+    @property
+    def count(self) -> int:
+        return struct.unpack_from("<Q", self._mmap, _COUNT_OFFSET)[0]
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    def column(self, name: str) -> np.ndarray:
+        """The recorded values of ``name`` (a view into the file)."""
+        return self._arrays[name][:self.count]
+
+    def time_range(self) -> Optional[Tuple[float, float]]:
+        count = self.count
+        if not count:
+            return None
+        times = self._arrays[TIME_COLUMN]
+        return float(times[0]), float(times[count - 1])
+
+    def append(self, values: Mapping[str, Any]) -> None:
+        if not self.writable:
+            raise ValueError(f"Segment {self.path} is read-only")
+        count = self.count
+        if count >= self.capacity:
+            raise ValueError(f"Segment {self.path} is full")
+        for name, array in self._arrays.items():
+            array[count] = values[name]
+        struct.pack_into("<Q", self._mmap, _COUNT_OFFSET, count + 1)
+
+    def extend(self, columns: Mapping[str, np.ndarray], start: int = 0) -> int:
+        """Append rows ``start:`` of equally long column arrays, as many as fit; return how many were written."""
+        if not self.writable:
+            raise ValueError(f"Segment {self.path} is read-only")
+        count = self.count
+        total = len(columns[TIME_COLUMN]) - start
+        rows = min(total, self.capacity - count)
+        for name, array in self._arrays.items():
+            array[count:count + rows] = columns[name][start:start + rows]
+        struct.pack_into("<Q", self._mmap, _COUNT_OFFSET, count + rows)
+        return rows
+
+    def flush(self) -> None:
+        if self.writable:
+            self._mmap.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._arrays.clear()
+        self._mmap.close()
+
+
+class HistoryWriter:
+    """Append records to a history directory, rolling to a new segment when the current one is full."""
+
+    def __init__(
+        self,
+        directory: Path,
+        columns: Sequence[Tuple[str, str]],
+        meta: Optional[Dict[str, Any]] = None,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.columns = [tuple(column) for column in columns]
+        self.meta = meta or {}
+        record_size = sum(np.dtype(dtype).itemsize for _name, dtype in self.columns)
+        self.capacity = max(1, (segment_bytes - HEADER_SIZE) // record_size)
+        segments = sorted(self.directory.glob(_SEGMENT_GLOB))
+        self._next_index = int(segments[-1].stem.split("-")[1]) + 1 if segments else 1
+        self._segment: Optional[Segment] = None
+        if segments:
+            last = Segment(segments[-1], writable=True)
+            if last.columns != self.columns:
+                last.close()
+                raise ValueError(f"{self.directory} records different columns; record into a new directory")
+            if last.full:
+                last.close()
+            else:
+                self._segment = last
+
+    def _roll(self) -> Segment:
+        if self._segment is not None:
+            self._segment.close()
+        path = self.directory / f"segment-{self._next_index:06d}.phs"
+        self._next_index += 1
+        self._segment = Segment.create(path, self.columns, self.capacity, self.meta)
+        return self._segment
+
+    def append(self, values: Mapping[str, Any]) -> None:
+        segment = self._segment
+        if segment is None or segment.full:
+            segment = self._roll()
+        segment.append(values)
+
+    def extend(self, columns: Mapping[str, np.ndarray]) -> None:
+        """Bulk-append whole column arrays (e.g. a backfill), rolling segments as needed."""
+        done, total = 0, len(columns[TIME_COLUMN])
+        while done < total:
+            segment = self._segment
+            if segment is None or segment.full:
+                segment = self._roll()
+            done += segment.extend(columns, done)
+
+    def flush(self) -> None:
+        if self._segment is not None:
+            self._segment.flush()
+
+    def close(self) -> None:
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+    def __enter__(self) -> "HistoryWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class HistoryReader:
+    """Read-only view of a history directory."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.segments = [Segment(path) for path in sorted(self.directory.glob(_SEGMENT_GLOB))]
+
+    @property
+    def columns(self) -> List[Tuple[str, str]]:
+        return self.segments[-1].columns if self.segments else []
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        return self.segments[-1].meta if self.segments else {}
+
+    def __len__(self) -> int:
+        return sum(segment.count for segment in self.segments)
+
+    def read(
+        self, start: Optional[float] = None, end: Optional[float] = None, columns: Optional[Sequence[str]] = None
+    ) -> Dict[str, np.ndarray]:
+        """Columns for records with ``start <= time < end``; always includes ``time``."""
+        names = [TIME_COLUMN, *(name for name in (columns or [c for c, _ in self.columns]) if name != TIME_COLUMN)]
+        parts: Dict[str, List[np.ndarray]] = {name: [] for name in names}
+        for segment in self.segments:
+            span = segment.time_range()
+            if span is None or (start is not None and span[1] < start) or (end is not None and span[0] >= end):
+                continue
+            times = segment.column(TIME_COLUMN)
+            lo = 0 if start is None else int(np.searchsorted(times, start, side="left"))
+            hi = len(times) if end is None else int(np.searchsorted(times, end, side="left"))
+            for name in names:
+                parts[name].append(segment.column(name)[lo:hi])
+        dtypes = dict(self.columns)
+        return {
+            name: np.concatenate(chunks) if chunks else np.empty(0, dtype=dtypes.get(name, "f8"))
+            for name, chunks in parts.items()
+        }
+
+    def close(self) -> None:
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+
+    def __enter__(self) -> "HistoryReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def ohlc(times: np.ndarray, values: np.ndarray, bucket_seconds: float) -> Dict[str, np.ndarray]:
+    """Open/high/low/close and sample count per ``bucket_seconds`` bucket; ``times`` must be sorted."""
+    if bucket_seconds <= 0:
+        raise ValueError("bucket_seconds must be positive")
+    if not len(times):
+        empty = np.empty(0)
+        return {"start": empty, "open": empty, "high": empty, "low": empty, "close": empty, "count": empty.astype(int)}
+    buckets = np.floor(times / bucket_seconds)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(values)]
+    return {
+        "start": buckets[starts] * bucket_seconds,
+        "open": values[starts],
+        "high": np.maximum.reduceat(values, starts),
+        "low": np.minimum.reduceat(values, starts),
+        "close": values[ends - 1],
+        "count": ends - starts,
+    }
+
+
+def twap(times: np.ndarray, values: np.ndarray, end: Optional[float] = None) -> float:
+    """Time-weighted average, each sample holding until the next one (the last one until ``end``)."""
+    if not len(times):
+        return float("nan")
+    until = times[-1] if end is None else end
+    weights = np.diff(times, append=until)
+    total = weights.sum()
+    if total <= 0:
+        return float(values[-1])
+    return float(np.dot(values.astype(np.float64), weights) / total)
+
+
+def vault_price(
+    data: Mapping[str, np.ndarray], pool: str, token_decimals: int, wsol_decimals: int
+) -> np.ndarray:
+    """Token price in WSOL from the recorded raw vault amounts; NaN where a vault was missing or empty."""
+    token = data[f"{pool}.token_amount"]
+    wsol = data[f"{pool}.wsol_amount"]
+    valid = (token != MISSING_AMOUNT) & (wsol != MISSING_AMOUNT) & (token > 0)
+    ratio = np.full(len(token), np.nan)
+    ratio[valid] = wsol[valid] / token[valid] * 10.0 ** (token_decimals - wsol_decimals)
+    return ratio
+
+
+# --- recording (price_report --record) ---------------------------------------------------------------
+
+
+def history_columns(symbols: Sequence[str], pools: Sequence[str]) -> List[Tuple[str, str]]:
+    columns: List[Tuple[str, str]] = [(TIME_COLUMN, "f8")]
+    for symbol in symbols:
+        columns += [(f"{symbol}.price", "f8"), (f"{symbol}.conf", "f8"), (f"{symbol}.status", "u1")]
+    for pool in pools:
+        columns += [(f"{pool}.token_amount", "u8"), (f"{pool}.wsol_amount", "u8")]
+    return columns
+
+
+async def record(args: argparse.Namespace) -> int:
+    from pythclient.pythaccounts import PythPriceStatus
+    from solana.rpc.async_api import AsyncClient
+
+    from price_report import (
+        PYTH_SYMBOL_MAP,
+        WSOL_DECIMALS,
+        AsyncRpcLimiter,
+        fetch_indexed_prices_async,
+        fetch_pyth_prices_with_index_async,
+        load_pool_configs,
+        read_pool_balances_async,
+    )
+    from rpc_profile import instrument
+
+    pools = load_pool_configs(args.info)
+    if not pools:
+        print("No swap-info files found.", file=sys.stderr)
+        return 1
+    desired = set(PYTH_SYMBOL_MAP.values())
+    limiter = AsyncRpcLimiter(args.max_concurrency, args.timeout)
+    writer: Optional[HistoryWriter] = None
+    samples = 0
+    next_tick = time.monotonic()
+    try:
+        async with instrument(AsyncClient(args.url, timeout=args.timeout)) as client:
+            prices, index = await fetch_pyth_prices_with_index_async(
+                client,
+                desired,
+                limiter,
+                chunk_size=args.chunk_size,
+                index_path=None if args.no_index else args.index,
+                index_ttl=args.index_ttl,
+                rebuild_index=args.rebuild_index,
+            )
+            balances, errors = await read_pool_balances_async(client, pools, limiter, args.chunk_size)
+            for name, error in errors.items():
+                print(f"{name}: {error}", file=sys.stderr)
+            meta = {"symbols": PYTH_SYMBOL_MAP, "pools": {}}
+            for pool in pools:
+                found = balances.get(pool.name)
+                meta["pools"][pool.name] = {
+                    "token_mint": pool.token_mint,
+                    "token_vault": pool.token_vault,
+                    "wsol_vault": pool.wsol_vault,
+                    "token_decimals": found.token_decimals if found else pool.token_decimals,
+                    "wsol_decimals": found.wsol_decimals if found else WSOL_DECIMALS,
+                }
+            writer = HistoryWriter(
+                args.record,
+                history_columns(list(PYTH_SYMBOL_MAP), [pool.name for pool in pools]),
+                meta=meta,
+                segment_bytes=int(args.segment_mb * 1024 * 1024),
+            )
+            while True:
+                values: Dict[str, Any] = {TIME_COLUMN: time.time()}
+                for symbol, name in PYTH_SYMBOL_MAP.items():
+                    values[f"{symbol}.price"] = float(prices[name].price)
+                    values[f"{symbol}.conf"] = float(prices[name].confidence)
+                    values[f"{symbol}.status"] = PythPriceStatus[prices[name].status].value
+                for pool in pools:
+                    pool_balances = balances.get(pool.name)
+                    values[f"{pool.name}.token_amount"] = pool_balances.token_amount if pool_balances else MISSING_AMOUNT
+                    values[f"{pool.name}.wsol_amount"] = pool_balances.wsol_amount if pool_balances else MISSING_AMOUNT
+                writer.append(values)
+                samples += 1
+                if args.max_samples is not None and samples >= args.max_samples:
+                    break
+
+                while True:
+                    # Fixed schedule: a slow round trip shortens the next sleep instead of shifting every sample.
+                    next_tick = max(next_tick + args.interval, time.monotonic())
+                    await asyncio.sleep(next_tick - time.monotonic())
+                    try:
+                        indexed, (balances, errors) = await asyncio.gather(
+                            fetch_indexed_prices_async(client, index, desired, limiter, args.chunk_size),
+                            read_pool_balances_async(client, pools, limiter, args.chunk_size),
+                        )
+                        if indexed is None:
+                            # The price accounts moved; walk the mapping again.
+                            indexed, index = await fetch_pyth_prices_with_index_async(
+                                client, desired, limiter, chunk_size=args.chunk_size, rebuild_index=True
+                            )
+                        break
+                    except Exception as e:
+                        # One timeout or rate-limit response should not end the recording; skip this tick.
+                        print(f"Sample skipped: {e!r} {e.__cause__ or ''}".rstrip(), file=sys.stderr)
+                prices = indexed
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    finally:
+        if writer is not None:
+            writer.close()
+        print(f"Recorded {samples} samples to {args.record}", file=sys.stderr)
+    return 0
+
+
+# --- query CLI ----------------------------------------------------------------------------------------
+
+
+def _describe(reader: HistoryReader) -> None:
+    print(f"{reader.directory}: {len(reader)} records in {len(reader.segments)} segments")
+    for segment in reader.segments:
+        span = segment.time_range()
+        when = "empty" if span is None else f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(span[0]))} .. " \
+            f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(span[1]))}"
+        print(f"  {segment.path.name}: {segment.count}/{segment.capacity} records, {when}")
+    print("Columns: " + ", ".join(name for name, _dtype in reader.columns))
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Query a price history recorded by price_report.py --record")
+    parser.add_argument("directory", type=Path, help="History directory")
+    parser.add_argument("--describe", action="store_true", help="List segments, time ranges and columns")
+    parser.add_argument("--column", default="SOL.price", help="Column to aggregate (default SOL.price)")
+    parser.add_argument("--since", type=float, help="Only records from the last N seconds")
+    parser.add_argument("--start", type=float, help="Unix time of the first record to include")
+    parser.add_argument("--end", type=float, help="Unix time after the last record to include")
+    parser.add_argument("--ohlc", type=float, metavar="SECONDS", help="Print OHLC bars of this width")
+    args = parser.parse_args(argv)
+
+    with HistoryReader(args.directory) as reader:
+        if not reader.segments:
+            print(f"No price history in {args.directory}", file=sys.stderr)
+            return 1
+        if args.describe:
+            _describe(reader)
+            return 0
+        start = time.time() - args.since if args.since is not None else args.start
+        started = time.perf_counter()
+        data = reader.read(start, args.end, [args.column])
+        elapsed = time.perf_counter() - started
+        times, values = data[TIME_COLUMN], data[args.column]
+        print(f"{len(times)} records of {args.column} loaded in {elapsed * 1000:.1f} ms")
+        if not len(times):
+            return 0
+        if args.ohlc:
+            bars = ohlc(times, values, args.ohlc)
+            print(f"{'start':<20}{'open':>16}{'high':>16}{'low':>16}{'close':>16}{'n':>7}")
+            for i in range(len(bars["start"])):
+                stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(bars["start"][i]))
+                print(
+                    f"{stamp:<20}{bars['open'][i]:>16.6f}{bars['high'][i]:>16.6f}"
+                    f"{bars['low'][i]:>16.6f}{bars['close'][i]:>16.6f}{bars['count'][i]:>7}"
+                )
+        print(
+            f"min {values.min():.6f}  max {values.max():.6f}  last {values[-1]:.6f}  "
+            f"TWAP {twap(times, values, args.end):.6f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
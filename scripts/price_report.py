@@ -1,24 +1,59 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import base64
+import csv
 import json
 import struct
-from dataclasses import dataclass
+import sys
+import time
+from dataclasses import asdict, dataclass
 from decimal import ROUND_HALF_UP, Decimal, getcontext
+from fractions import Fraction
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Awaitable, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, TypeVar, Union
+
+from scriptd import delegate
+
+# Hand the command to a running scriptd daemon before the slow imports below.
+if __name__ == "__main__":
+    delegate("price_report", sys.argv[1:])
 
 from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
 from solders.pubkey import Pubkey
 
 from pythclient.pythaccounts import PythPriceInfo, PythPriceStatus
+from common import RpcBatch
+from rpc_profile import add_profile_arguments, configure_profiling, instrument, span
+from pyth_decode import (
+    ACCOUNT_HEADER_SIZE,
+    PYTH_MAGIC,
+    MappingView,
+    decode_account_view,
+    key_to_str,
+    price_product_key_raw,
+    product_symbol,
+)
 
 # Use high precision for currency math to avoid rounding surprises.
 getcontext().prec = 28
 
-PYTH_MAGIC = 0xA1B2C3D4
-ACCOUNT_HEADER_SIZE = 16
+T = TypeVar("T")
+
+# getMultipleAccounts accepts at most this many keys per request.
+MAX_MULTIPLE_ACCOUNTS = 100
+
+# SPL token account layout: mint (32) | owner (32) | amount (u64) | ...
+SPL_TOKEN_ACCOUNT = struct.Struct("<32s32sQ")
+# SPL mint layout: mint_authority COption<Pubkey> (36) | supply (u64) | decimals (u8) | ...
+MINT_DECIMALS_OFFSET = 44
+WSOL_MINT = "So11111111111111111111111111111111111111112"
+WSOL_DECIMALS = 9
+
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_RPC_TIMEOUT = 10.0
 
 # Mapping of shorthand symbols to Pyth product identifiers.
 PYTH_SYMBOL_MAP: Dict[str, str] = {
@@ -64,9 +99,7 @@ def parse_header(data: bytes) -> Tuple[int, int, int]:
     return version, account_type, size
 
 
-def decode_account_data(client: Client, pubkey: str) -> Tuple[bytes, int, int]:
-    resp = client.get_account_info(Pubkey.from_string(pubkey))
-    value = resp.value
+def decode_account(value, pubkey: str) -> Tuple[bytes, int, int]:
     if value is None:
         raise ValueError(f"Account {pubkey} is unavailable")
     data_field = value.data
@@ -81,6 +114,35 @@ def decode_account_data(client: Client, pubkey: str) -> Tuple[bytes, int, int]:
     return raw[:size], version, account_type
 
 
+def decode_account_data(client: Client, pubkey: str) -> Tuple[bytes, int, int]:
+    resp = client.get_account_info(Pubkey.from_string(pubkey))
+    return decode_account(resp.value, pubkey)
+
+
+def chunked(items: Sequence[T], size: int) -> Iterator[Sequence[T]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _as_pubkey(key: Union[str, Pubkey]) -> Pubkey:
+    return Pubkey.from_string(key) if isinstance(key, str) else key
+
+
+def decode_multiple_accounts(
+    client: Client, pubkeys: Sequence[Union[str, Pubkey]], chunk_size: int = MAX_MULTIPLE_ACCOUNTS
+) -> List[Tuple[memoryview, int, int]]:
+    """Fetch and decode accounts with one getMultipleAccounts call per chunk."""
+    if not 0 < chunk_size <= MAX_MULTIPLE_ACCOUNTS:
+        raise ValueError(f"Chunk size must be between 1 and {MAX_MULTIPLE_ACCOUNTS}")
+    decoded: List[Tuple[memoryview, int, int]] = []
+    for chunk in chunked(pubkeys, chunk_size):
+        resp = client.get_multiple_accounts([_as_pubkey(key) for key in chunk])
+        with span("decode.accounts"):
+            for key, value in zip(chunk, resp.value):
+                decoded.append(decode_account_view(value, key))
+    return decoded
+
+
 def parse_mapping_account(data: bytes) -> Tuple[List[str], Optional[str]]:
     offset = ACCOUNT_HEADER_SIZE
     num_products, _unused, next_key_bytes = struct.unpack_from("<II32s", data, offset)
@@ -149,45 +211,373 @@ def parse_price_account(data: bytes, version: int) -> Tuple[Decimal, Decimal, st
     status = price_info.price_status.name if isinstance(price_info.price_status, PythPriceStatus) else str(price_info.price_status)
     return price, confidence, status
 
+def parse_price_product_key(data: bytes, version: int) -> Optional[str]:
+    """Return the product account a price account points back to."""
+    return key_to_str(price_product_key_raw(data, version))
+
 PYTH_ACCOUNT_MAPPING = 1
 PYTH_ACCOUNT_PRODUCT = 2
 PYTH_ACCOUNT_PRICE = 3
 
 PYTH_MAPPING_DEVNET = "BmA9Z6FjioHJPpjT39QazZyhDRUdZy2ezwx4GiDdE2u2"
 
+# How long a cached symbol -> price account index is trusted before the mapping is walked again.
+DEFAULT_INDEX_TTL = 24 * 60 * 60
 
-def fetch_pyth_prices(client: Client, desired_symbols: Iterable[str]) -> Dict[str, PythPrice]:
-    desired = set(desired_symbols)
+
+@dataclass
+class PythIndexEntry:
+    product_key: str
+    price_key: str
+
+
+@dataclass
+class PythIndex:
+    mapping_key: str
+    mapping_slot: int
+    built_at: float
+    entries: Dict[str, PythIndexEntry]
+
+    def is_fresh(self, ttl: float, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return 0 <= now - self.built_at < ttl
+
+    def to_json(self) -> dict:
+        return {
+            "mapping_key": self.mapping_key,
+            "mapping_slot": self.mapping_slot,
+            "built_at": self.built_at,
+            "entries": {symbol: asdict(entry) for symbol, entry in self.entries.items()},
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "PythIndex":
+        return cls(
+            mapping_key=data["mapping_key"],
+            mapping_slot=int(data["mapping_slot"]),
+            built_at=float(data["built_at"]),
+            entries={symbol: PythIndexEntry(**entry) for symbol, entry in data["entries"].items()},
+        )
+
+
+# Parsed indexes by path, kept while the file is unchanged (a resident process reads each one once).
+_INDEX_CACHE: Dict[Path, Tuple[Tuple[int, int], PythIndex]] = {}
+
+
+def load_pyth_index(path: Path) -> Optional[PythIndex]:
+    try:
+        stat = path.stat()
+        version = (stat.st_mtime_ns, stat.st_size)
+        key = path.resolve()
+        cached = _INDEX_CACHE.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        index = PythIndex.from_json(json.loads(path.read_text()))
+    except FileNotFoundError:
+        return None
+    except (ValueError, KeyError, TypeError):
+        # A corrupt index is simply rebuilt.
+        return None
+    _INDEX_CACHE[key] = (version, index)
+    return index
+
+
+def save_pyth_index(path: Path, index: PythIndex) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(index.to_json(), indent=2, sort_keys=True))
+    tmp_path.replace(path)
+
+
+def _match_products(
+    product_keys: Sequence[Pubkey], product_accounts: Sequence[Tuple[memoryview, int, int]], desired: set
+) -> List[Tuple[str, str, str]]:
+    """Return ``(symbol, product_key, price_key)`` for every desired product, in mapping order."""
+    candidates: List[Tuple[str, str, str]] = []
+    with span("decode.products"):
+        for product_key, (product_data, _, product_type) in zip(product_keys, product_accounts):
+            if product_type != PYTH_ACCOUNT_PRODUCT:
+                continue
+            first_price_raw, symbol = product_symbol(product_data)
+            if symbol not in desired or first_price_raw is None:
+                continue
+            candidates.append((symbol, str(product_key), key_to_str(first_price_raw)))
+    return candidates
+
+
+def _record_prices(
+    candidates: Sequence[Tuple[str, str, str]],
+    price_accounts: Sequence[Tuple[memoryview, int, int]],
+    desired: set,
+    prices: Dict[str, PythPrice],
+    entries: Dict[str, PythIndexEntry],
+) -> None:
+    """Record matched price accounts in product order, stopping once every symbol is known."""
+    for (symbol, product_key, price_key), (price_data, price_version, price_type) in zip(candidates, price_accounts):
+        if price_type != PYTH_ACCOUNT_PRICE:
+            continue
+        with span("decode.prices"):
+            price, confidence, status = parse_price_account(price_data, price_version)
+        prices[symbol] = PythPrice(symbol=symbol, price=price, confidence=confidence, status=status)
+        entries[symbol] = PythIndexEntry(product_key=product_key, price_key=price_key)
+
+        if len(prices) == len(desired):
+            break
+
+
+def _build_index(entries: Dict[str, PythIndexEntry], mapping_slot: int) -> PythIndex:
+    return PythIndex(
+        mapping_key=PYTH_MAPPING_DEVNET,
+        mapping_slot=mapping_slot,
+        built_at=time.time(),
+        entries=entries,
+    )
+
+
+def walk_pyth_mapping(
+    client: Client, desired: set, chunk_size: int = MAX_MULTIPLE_ACCOUNTS
+) -> Tuple[Dict[str, PythPrice], PythIndex]:
+    """Walk the mapping -> product -> price chain and return the prices with the index that found them."""
     prices: Dict[str, PythPrice] = {}
+    entries: Dict[str, PythIndexEntry] = {}
     next_mapping = PYTH_MAPPING_DEVNET
+    mapping_slot = 0
 
     while next_mapping and len(prices) < len(desired):
-        mapping_data, _, account_type = decode_account_data(client, next_mapping)
+        mapping_resp = client.get_account_info(Pubkey.from_string(next_mapping))
+        mapping_slot = max(mapping_slot, mapping_resp.context.slot)
+        mapping_data, _, account_type = decode_account_view(mapping_resp.value, next_mapping)
         if account_type != PYTH_ACCOUNT_MAPPING:
             raise ValueError(f"Account {next_mapping} is not a Pyth mapping account")
-        product_keys, next_mapping = parse_mapping_account(mapping_data)
+        mapping = MappingView(mapping_data)
+        product_keys = list(mapping.pubkeys())
+        next_mapping = mapping.next_key
 
-        for product_key in product_keys:
-            product_data, _, product_type = decode_account_data(client, product_key)
-            if product_type != PYTH_ACCOUNT_PRODUCT:
-                continue
-            first_price_key, attrs = parse_product_account(product_data)
-            symbol = attrs.get("symbol")
-            if symbol not in desired or first_price_key is None:
-                continue
+        # Products are fetched chunk by chunk; once the matched products cover every
+        # missing symbol their price accounts are fetched together in one more batch.
+        candidates: List[Tuple[str, str, str]] = []
+        for product_chunk in chunked(product_keys, chunk_size):
+            product_accounts = decode_multiple_accounts(client, product_chunk, chunk_size)
+            candidates.extend(_match_products(product_chunk, product_accounts, desired))
 
-            price_data, price_version, price_type = decode_account_data(client, first_price_key)
-            if price_type != PYTH_ACCOUNT_PRICE:
-                continue
+            missing = desired - set(prices.keys())
+            if candidates and missing <= {symbol for symbol, _, _ in candidates}:
+                price_accounts = decode_multiple_accounts(client, [key for _, _, key in candidates], chunk_size)
+                _record_prices(candidates, price_accounts, desired, prices, entries)
+                candidates = []
+                if len(prices) == len(desired):
+                    break
+
+        if candidates and len(prices) < len(desired):
+            price_accounts = decode_multiple_accounts(client, [key for _, _, key in candidates], chunk_size)
+            _record_prices(candidates, price_accounts, desired, prices, entries)
+
+    return prices, _build_index(entries, mapping_slot)
+
+
+def _indexed_symbols(index: PythIndex, desired: set) -> Optional[List[str]]:
+    if index.mapping_key != PYTH_MAPPING_DEVNET or not desired <= set(index.entries.keys()):
+        return None
+    return sorted(desired)
+
+
+def _validate_indexed_prices(
+    index: PythIndex, symbols: Sequence[str], price_accounts: Sequence[Tuple[memoryview, int, int]]
+) -> Optional[Dict[str, PythPrice]]:
+    prices: Dict[str, PythPrice] = {}
+    for symbol, (price_data, price_version, price_type) in zip(symbols, price_accounts):
+        if price_type != PYTH_ACCOUNT_PRICE:
+            return None
+        if parse_price_product_key(price_data, price_version) != index.entries[symbol].product_key:
+            return None
+        with span("decode.prices"):
             price, confidence, status = parse_price_account(price_data, price_version)
-            prices[symbol] = PythPrice(symbol=symbol, price=price, confidence=confidence, status=status)
+        prices[symbol] = PythPrice(symbol=symbol, price=price, confidence=confidence, status=status)
+    return prices
+
+
+def fetch_indexed_prices(
+    client: Client, index: PythIndex, desired: set, chunk_size: int = MAX_MULTIPLE_ACCOUNTS
+) -> Optional[Dict[str, PythPrice]]:
+    """Read prices straight from the indexed price accounts.
+
+    Returns ``None`` when the index does not cover every symbol or any cached
+    account is no longer a price account for the expected product.
+    """
+    symbols = _indexed_symbols(index, desired)
+    if symbols is None:
+        return None
+    try:
+        price_accounts = decode_multiple_accounts(
+            client, [index.entries[symbol].price_key for symbol in symbols], chunk_size
+        )
+    except ValueError:
+        return None
+    return _validate_indexed_prices(index, symbols, price_accounts)
 
-            if len(prices) == len(desired):
-                break
 
+def _load_fresh_index(index_path: Optional[Path], index_ttl: float, rebuild_index: bool) -> Optional[PythIndex]:
+    if index_path is None or rebuild_index:
+        return None
+    index = load_pyth_index(index_path)
+    if index is None or not index.is_fresh(index_ttl):
+        return None
+    return index
+
+
+def _finish_walk(
+    desired: set, prices: Dict[str, PythPrice], index: PythIndex, index_path: Optional[Path]
+) -> Dict[str, PythPrice]:
     missing = desired - set(prices.keys())
     if missing:
         raise RuntimeError(f"Missing Pyth symbols: {', '.join(sorted(missing))}")
+    if index_path is not None:
+        save_pyth_index(index_path, index)
+    return prices
+
+
+def fetch_pyth_prices(
+    client: Client,
+    desired_symbols: Iterable[str],
+    chunk_size: int = MAX_MULTIPLE_ACCOUNTS,
+    index_path: Optional[Path] = None,
+    index_ttl: float = DEFAULT_INDEX_TTL,
+    rebuild_index: bool = False,
+) -> Dict[str, PythPrice]:
+    desired = set(desired_symbols)
+
+    index = _load_fresh_index(index_path, index_ttl, rebuild_index)
+    if index is not None:
+        prices = fetch_indexed_prices(client, index, desired, chunk_size)
+        if prices is not None:
+            return prices
+
+    prices, index = walk_pyth_mapping(client, desired, chunk_size)
+    return _finish_walk(desired, prices, index, index_path)
+
+
+class AsyncRpcLimiter:
+    """Bound the number of in-flight RPC requests and apply a per-request timeout."""
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, timeout: float = DEFAULT_RPC_TIMEOUT):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.timeout = timeout
+
+    async def call(self, awaitable: Awaitable[T]) -> T:
+        async with self._semaphore:
+            return await asyncio.wait_for(awaitable, self.timeout)
+
+
+async def decode_multiple_accounts_async(
+    client: AsyncClient,
+    pubkeys: Sequence[Union[str, Pubkey]],
+    limiter: AsyncRpcLimiter,
+    chunk_size: int = MAX_MULTIPLE_ACCOUNTS,
+) -> List[Tuple[memoryview, int, int]]:
+    """Async counterpart of :func:`decode_multiple_accounts`; all chunks are requested concurrently."""
+    if not 0 < chunk_size <= MAX_MULTIPLE_ACCOUNTS:
+        raise ValueError(f"Chunk size must be between 1 and {MAX_MULTIPLE_ACCOUNTS}")
+    chunks = list(chunked(pubkeys, chunk_size))
+    responses = await asyncio.gather(
+        *(limiter.call(client.get_multiple_accounts([_as_pubkey(key) for key in chunk])) for chunk in chunks)
+    )
+    decoded: List[Tuple[memoryview, int, int]] = []
+    with span("decode.accounts"):
+        for chunk, resp in zip(chunks, responses):
+            for key, value in zip(chunk, resp.value):
+                decoded.append(decode_account_view(value, key))
+    return decoded
+
+
+async def walk_pyth_mapping_async(
+    client: AsyncClient, desired: set, limiter: AsyncRpcLimiter, chunk_size: int = MAX_MULTIPLE_ACCOUNTS
+) -> Tuple[Dict[str, PythPrice], PythIndex]:
+    """Async counterpart of :func:`walk_pyth_mapping`.
+
+    Every product chunk of a mapping account is requested at once, then the
+    matched price accounts in one more batch; matches are still applied in
+    mapping order so the result is the same as the sequential walk.
+    """
+    prices: Dict[str, PythPrice] = {}
+    entries: Dict[str, PythIndexEntry] = {}
+    next_mapping = PYTH_MAPPING_DEVNET
+    mapping_slot = 0
+
+    while next_mapping and len(prices) < len(desired):
+        mapping_resp = await limiter.call(client.get_account_info(Pubkey.from_string(next_mapping)))
+        mapping_slot = max(mapping_slot, mapping_resp.context.slot)
+        mapping_data, _, account_type = decode_account_view(mapping_resp.value, next_mapping)
+        if account_type != PYTH_ACCOUNT_MAPPING:
+            raise ValueError(f"Account {next_mapping} is not a Pyth mapping account")
+        mapping = MappingView(mapping_data)
+        product_keys = list(mapping.pubkeys())
+        next_mapping = mapping.next_key
+
+        product_accounts = await decode_multiple_accounts_async(client, product_keys, limiter, chunk_size)
+        candidates = _match_products(product_keys, product_accounts, desired)
+        if candidates:
+            price_accounts = await decode_multiple_accounts_async(
+                client, [key for _, _, key in candidates], limiter, chunk_size
+            )
+            _record_prices(candidates, price_accounts, desired, prices, entries)
+
+    return prices, _build_index(entries, mapping_slot)
+
+
+async def fetch_indexed_prices_async(
+    client: AsyncClient,
+    index: PythIndex,
+    desired: set,
+    limiter: AsyncRpcLimiter,
+    chunk_size: int = MAX_MULTIPLE_ACCOUNTS,
+) -> Optional[Dict[str, PythPrice]]:
+    symbols = _indexed_symbols(index, desired)
+    if symbols is None:
+        return None
+    try:
+        price_accounts = await decode_multiple_accounts_async(
+            client, [index.entries[symbol].price_key for symbol in symbols], limiter, chunk_size
+        )
+    except ValueError:
+        return None
+    return _validate_indexed_prices(index, symbols, price_accounts)
+
+
+async def fetch_pyth_prices_with_index_async(
+    client: AsyncClient,
+    desired_symbols: Iterable[str],
+    limiter: AsyncRpcLimiter,
+    chunk_size: int = MAX_MULTIPLE_ACCOUNTS,
+    index_path: Optional[Path] = None,
+    index_ttl: float = DEFAULT_INDEX_TTL,
+    rebuild_index: bool = False,
+) -> Tuple[Dict[str, PythPrice], PythIndex]:
+    """Like :func:`fetch_pyth_prices_async` but also return the index naming each price account."""
+    desired = set(desired_symbols)
+
+    index = _load_fresh_index(index_path, index_ttl, rebuild_index)
+    if index is not None:
+        prices = await fetch_indexed_prices_async(client, index, desired, limiter, chunk_size)
+        if prices is not None:
+            return prices, index
+
+    prices, index = await walk_pyth_mapping_async(client, desired, limiter, chunk_size)
+    return _finish_walk(desired, prices, index, index_path), index
+
+
+async def fetch_pyth_prices_async(
+    client: AsyncClient,
+    desired_symbols: Iterable[str],
+    limiter: AsyncRpcLimiter,
+    chunk_size: int = MAX_MULTIPLE_ACCOUNTS,
+    index_path: Optional[Path] = None,
+    index_ttl: float = DEFAULT_INDEX_TTL,
+    rebuild_index: bool = False,
+) -> Dict[str, PythPrice]:
+    prices, _index = await fetch_pyth_prices_with_index_async(
+        client, desired_symbols, limiter, chunk_size, index_path, index_ttl, rebuild_index
+    )
     return prices
 
 
@@ -218,11 +608,32 @@ def read_pool_snapshot(client: Client, swap_info: dict) -> PoolSnapshot:
     token_vault = Pubkey.from_string(swap_info["token_a_vault"])
     wsol_vault = Pubkey.from_string(swap_info["token_b_vault"])
 
-    token_balance_resp = client.get_token_account_balance(token_vault)
-    wsol_balance_resp = client.get_token_account_balance(wsol_vault)
+    with RpcBatch(client) as batch:
+        token_balance_resp = batch.get_token_account_balance(token_vault)
+        wsol_balance_resp = batch.get_token_account_balance(wsol_vault)
+
+    token_balance_ui, token_decimals = decimal_amount(token_balance_resp.get())
+    wsol_balance_ui, wsol_decimals = decimal_amount(wsol_balance_resp.get())
+
+    return PoolSnapshot(
+        token_balance=token_balance_ui,
+        token_decimals=token_decimals,
+        wsol_balance=wsol_balance_ui,
+        wsol_decimals=wsol_decimals,
+    )
+
+
+async def read_pool_snapshot_async(client: AsyncClient, swap_info: dict, limiter: AsyncRpcLimiter) -> PoolSnapshot:
+    token_vault = Pubkey.from_string(swap_info["token_a_vault"])
+    wsol_vault = Pubkey.from_string(swap_info["token_b_vault"])
+
+    batch = RpcBatch(client)
+    token_balance_resp = batch.get_token_account_balance(token_vault)
+    wsol_balance_resp = batch.get_token_account_balance(wsol_vault)
+    await limiter.call(batch.execute_async())
 
-    token_balance_ui, token_decimals = decimal_amount(token_balance_resp)
-    wsol_balance_ui, wsol_decimals = decimal_amount(wsol_balance_resp)
+    token_balance_ui, token_decimals = decimal_amount(token_balance_resp.get())
+    wsol_balance_ui, wsol_decimals = decimal_amount(wsol_balance_resp.get())
 
     return PoolSnapshot(
         token_balance=token_balance_ui,
@@ -232,19 +643,258 @@ def read_pool_snapshot(client: Client, swap_info: dict) -> PoolSnapshot:
     )
 
 
+@dataclass
+class PoolConfig:
+    name: str
+    token_mint: str
+    token_decimals: int
+    token_vault: str
+    wsol_vault: str
+
+
+@dataclass
+class PoolBalances:
+    """Raw vault amounts in base units; converted to ``Decimal`` only for output."""
+
+    pool: PoolConfig
+    token_amount: int
+    token_decimals: int
+    wsol_amount: int
+    wsol_decimals: int
+
+    @property
+    def token_price_in_wsol(self) -> Fraction:
+        if self.token_amount == 0:
+            raise ValueError("Token vault balance is zero; cannot derive a price.")
+        return Fraction(
+            self.wsol_amount * 10 ** self.token_decimals, self.token_amount * 10 ** self.wsol_decimals
+        )
+
+    def snapshot(self) -> PoolSnapshot:
+        return PoolSnapshot(
+            token_balance=Decimal(self.token_amount) / Decimal(10) ** self.token_decimals,
+            token_decimals=self.token_decimals,
+            wsol_balance=Decimal(self.wsol_amount) / Decimal(10) ** self.wsol_decimals,
+            wsol_decimals=self.wsol_decimals,
+        )
+
+
+def expand_info_paths(paths: Sequence[Path]) -> List[Tuple[Path, bool]]:
+    """``(path, explicit)`` for every file given, plus the ``*.json`` files of every directory given."""
+    expanded: List[Tuple[Path, bool]] = []
+    for path in paths:
+        if path.is_dir():
+            expanded.extend((child, False) for child in sorted(path.glob("*.json")))
+        else:
+            expanded.append((path, True))
+    return expanded
+
+
+def load_pool_configs(paths: Sequence[Path]) -> List[PoolConfig]:
+    """Load swap-info files; JSON files found in a directory that are not swap-info files are skipped."""
+    configs: List[PoolConfig] = []
+    names = set()
+    for path, explicit in expand_info_paths(paths):
+        try:
+            info = load_swap_info(path)
+        except (KeyError, ValueError):
+            if explicit:
+                raise
+            continue
+        name = info.get("name") or path.stem
+        if name in names:
+            name = str(path)
+        names.add(name)
+        configs.append(
+            PoolConfig(
+                name=name,
+                token_mint=info["custom_token_mint"],
+                token_decimals=int(info["custom_token_decimals"]),
+                token_vault=info["token_a_vault"],
+                wsol_vault=info["token_b_vault"],
+            )
+        )
+    return configs
+
+
+async def fetch_account_data_async(
+    client: AsyncClient,
+    pubkeys: Sequence[str],
+    limiter: AsyncRpcLimiter,
+    chunk_size: int = MAX_MULTIPLE_ACCOUNTS,
+) -> Dict[str, Optional[bytes]]:
+    """Raw data of every account, ``None`` for missing ones; all chunks are requested concurrently."""
+    chunks = list(chunked(list(dict.fromkeys(pubkeys)), chunk_size))
+    responses = await asyncio.gather(
+        *(limiter.call(client.get_multiple_accounts([_as_pubkey(key) for key in chunk])) for chunk in chunks)
+    )
+    return {
+        key: None if value is None else bytes(value.data)
+        for chunk, resp in zip(chunks, responses)
+        for key, value in zip(chunk, resp.value)
+    }
+
+
+def decode_token_account(data: bytes) -> Tuple[str, int]:
+    """``(mint, amount)`` of an SPL token account."""
+    if len(data) < SPL_TOKEN_ACCOUNT.size:
+        raise ValueError("Account data too short for an SPL token account")
+    mint, _owner, amount = SPL_TOKEN_ACCOUNT.unpack_from(data, 0)
+    return str(Pubkey.from_bytes(mint)), amount
+
+
+async def read_pool_balances_async(
+    client: AsyncClient,
+    pools: Sequence[PoolConfig],
+    limiter: AsyncRpcLimiter,
+    chunk_size: int = MAX_MULTIPLE_ACCOUNTS,
+) -> Tuple[Dict[str, PoolBalances], Dict[str, str]]:
+    """Read every vault with chunked getMultipleAccounts; return balances and per-pool errors by pool name."""
+    vaults = await fetch_account_data_async(
+        client, [key for pool in pools for key in (pool.token_vault, pool.wsol_vault)], limiter, chunk_size
+    )
+    decoded: Dict[str, Tuple[str, int]] = {}
+    errors: Dict[str, str] = {}
+    with span("decode.vaults"):
+        for pool in pools:
+            try:
+                for key in (pool.token_vault, pool.wsol_vault):
+                    if vaults[key] is None:
+                        raise ValueError(f"vault {key} not found")
+                    decoded[key] = decode_token_account(vaults[key])
+            except ValueError as e:
+                errors[pool.name] = str(e)
+
+    # Decimals live on the mint; only mints the swap-info files do not describe need a lookup.
+    known_decimals = {WSOL_MINT: WSOL_DECIMALS}
+    known_decimals.update((pool.token_mint, pool.token_decimals) for pool in pools)
+    unknown = [mint for mint, _amount in decoded.values() if mint not in known_decimals]
+    if unknown:
+        for mint, data in (await fetch_account_data_async(client, unknown, limiter, chunk_size)).items():
+            if data is not None and len(data) > MINT_DECIMALS_OFFSET:
+                known_decimals[mint] = data[MINT_DECIMALS_OFFSET]
+
+    balances: Dict[str, PoolBalances] = {}
+    for pool in pools:
+        if pool.name in errors:
+            continue
+        (token_mint, token_amount), (wsol_mint, wsol_amount) = decoded[pool.token_vault], decoded[pool.wsol_vault]
+        if token_mint not in known_decimals or wsol_mint not in known_decimals:
+            errors[pool.name] = "vault mint not found"
+            continue
+        balances[pool.name] = PoolBalances(
+            pool=pool,
+            token_amount=token_amount,
+            token_decimals=known_decimals[token_mint],
+            wsol_amount=wsol_amount,
+            wsol_decimals=known_decimals[wsol_mint],
+        )
+    return balances, errors
+
+
 def format_decimal(value: Decimal, precision: int = 6) -> str:
     quant = Decimal(10) ** -precision
     return f"{value.quantize(quant, rounding=ROUND_HALF_UP):f}"
 
 
-def run(args: argparse.Namespace) -> int:
-    rpc_url = args.url
+def to_decimal(value: Fraction) -> Decimal:
+    """Convert an exact ratio to ``Decimal`` at the output boundary (context precision applies)."""
+    return Decimal(value.numerator) / Decimal(value.denominator)
+
+
+@dataclass
+class PoolReportRow:
+    pool: str
+    token_balance: Optional[Decimal] = None
+    wsol_balance: Optional[Decimal] = None
+    token_wsol: Optional[Decimal] = None
+    token_usd: Optional[Decimal] = None
+    token_btc: Optional[Decimal] = None
+    token_eth: Optional[Decimal] = None
+    error: Optional[str] = None
 
-    client = Client(rpc_url)
-    pyth_prices = fetch_pyth_prices(client, PYTH_SYMBOL_MAP.values())
-    swap_info = load_swap_info(args.info)
-    pool_snapshot = read_pool_snapshot(client, swap_info)
 
+POOL_ROW_FIELDS = ("token_balance", "wsol_balance", "token_wsol", "token_usd", "token_btc", "token_eth")
+
+
+def derive_pool_rows(
+    pools: Sequence[PoolConfig],
+    balances: Dict[str, PoolBalances],
+    errors: Dict[str, str],
+    pyth_prices: Dict[str, PythPrice],
+) -> List[PoolReportRow]:
+    """Price every pool against the shared oracle prices, with exact rationals until the final conversion."""
+    sol_usd = Fraction(pyth_prices[PYTH_SYMBOL_MAP["SOL"]].price)
+    btc_usd = Fraction(pyth_prices[PYTH_SYMBOL_MAP["BTC"]].price)
+    eth_usd = Fraction(pyth_prices[PYTH_SYMBOL_MAP["ETH"]].price)
+    rows: List[PoolReportRow] = []
+    for pool in pools:
+        if pool.name in errors:
+            rows.append(PoolReportRow(pool=pool.name, error=errors[pool.name]))
+            continue
+        pool_balances = balances[pool.name]
+        snapshot = pool_balances.snapshot()
+        row = PoolReportRow(pool=pool.name, token_balance=snapshot.token_balance, wsol_balance=snapshot.wsol_balance)
+        if pool_balances.token_amount == 0:
+            row.error = "token vault is empty"
+        else:
+            token_wsol = pool_balances.token_price_in_wsol
+            token_usd = token_wsol * sol_usd
+            row.token_wsol = to_decimal(token_wsol)
+            row.token_usd = to_decimal(token_usd)
+            row.token_btc = to_decimal(token_usd / btc_usd) if btc_usd else None
+            row.token_eth = to_decimal(token_usd / eth_usd) if eth_usd else None
+        rows.append(row)
+    return rows
+
+
+def _row_values(row: PoolReportRow, precision: int) -> Dict[str, str]:
+    values = {"pool": row.pool}
+    for name in POOL_ROW_FIELDS:
+        value = getattr(row, name)
+        values[name] = "" if value is None else format_decimal(value, precision)
+    values["error"] = row.error or ""
+    return values
+
+
+def print_pool_table(rows: Sequence[PoolReportRow], pyth_prices: Dict[str, PythPrice], precision: int) -> None:
+    print(
+        "Pyth oracle prices (USD): "
+        + ", ".join(
+            f"{symbol} ${format_decimal(pyth_prices[name].price, precision)}" for symbol, name in PYTH_SYMBOL_MAP.items()
+        )
+    )
+    columns = ("pool", "token_balance", "wsol_balance", "token_wsol", "token_usd", "token_btc", "token_eth")
+    table = [_row_values(row, precision) for row in rows]
+    widths = {column: max([len(column)] + [len(values[column]) for values in table]) for column in columns}
+    print("  ".join(column.ljust(widths[column]) if column == "pool" else column.rjust(widths[column]) for column in columns))
+    for values in table:
+        if values["error"]:
+            print(f"{values['pool'].ljust(widths['pool'])}  error: {values['error']}")
+            continue
+        print(
+            "  ".join(
+                values[column].ljust(widths[column]) if column == "pool" else values[column].rjust(widths[column])
+                for column in columns
+            )
+        )
+
+
+def write_pool_rows(rows: Sequence[PoolReportRow], fmt: str, precision: int, out: Optional[TextIO] = None) -> None:
+    """Stream rows as JSON lines or CSV; amounts are decimal strings so no precision is lost."""
+    out = out or sys.stdout
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=("pool", *POOL_ROW_FIELDS, "error"))
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(_row_values(row, precision))
+        return
+    for row in rows:
+        values = _row_values(row, precision)
+        out.write(json.dumps({key: value or None for key, value in values.items()}) + "\n")
+
+
+def print_report(pyth_prices: Dict[str, PythPrice], pool_snapshot: PoolSnapshot, precision: int) -> None:
     sol_price = pyth_prices[PYTH_SYMBOL_MAP["SOL"]].price
     token_price_in_wsol = pool_snapshot.token_price_in_wsol
     token_price_usd = token_price_in_wsol * sol_price
@@ -259,8 +909,8 @@ def run(args: argparse.Namespace) -> int:
     for symbol, product_name in PYTH_SYMBOL_MAP.items():
         price = pyth_prices[product_name]
         print(
-            f"  {symbol}: ${format_decimal(price.price, args.precision)}"
-            f"  (status={price.status}, ±{format_decimal(price.confidence, args.precision)})"
+            f"  {symbol}: ${format_decimal(price.price, precision)}"
+            f"  (status={price.status}, ±{format_decimal(price.confidence, precision)})"
         )
     print()
 
@@ -273,29 +923,134 @@ def run(args: argparse.Namespace) -> int:
         f"  WSOL vault: {pool_snapshot.wsol_balance} SOL"
         f" (decimals={pool_snapshot.wsol_decimals})"
     )
-    print(f"  Derived token price: {format_decimal(token_price_in_wsol, args.precision)} WSOL")
-    print(f"  Token price in USD: ${format_decimal(token_price_usd, args.precision)}")
+    print(f"  Derived token price: {format_decimal(token_price_in_wsol, precision)} WSOL")
+    print(f"  Token price in USD: ${format_decimal(token_price_usd, precision)}")
     print()
 
     print("Token value via USD conversions:")
-    print(f"  In BTC: {format_decimal(token_in_btc, args.precision)} BTC")
-    print(f"  In ETH: {format_decimal(token_in_eth, args.precision)} ETH")
+    print(f"  In BTC: {format_decimal(token_in_btc, precision)} BTC")
+    print(f"  In ETH: {format_decimal(token_in_eth, precision)} ETH")
+
 
-    return 0
+async def run_async(args: argparse.Namespace) -> int:
+    pools = load_pool_configs(args.info)
+    if not pools:
+        print("No swap-info files found.", file=sys.stderr)
+        return 1
+    limiter = AsyncRpcLimiter(args.max_concurrency, args.timeout)
+    async with instrument(AsyncClient(args.url, timeout=args.timeout)) as client:
+        # The oracle walk and the pool reads are independent, so they overlap.
+        pyth_prices, (balances, errors) = await asyncio.gather(
+            fetch_pyth_prices_async(
+                client,
+                PYTH_SYMBOL_MAP.values(),
+                limiter,
+                chunk_size=args.chunk_size,
+                index_path=None if args.no_index else args.index,
+                index_ttl=args.index_ttl,
+                rebuild_index=args.rebuild_index,
+            ),
+            read_pool_balances_async(client, pools, limiter, chunk_size=args.chunk_size),
+        )
+
+    if len(pools) == 1 and not errors and args.format == "table":
+        print_report(pyth_prices, balances[pools[0].name].snapshot(), args.precision)
+        return 0
+    rows = derive_pool_rows(pools, balances, errors, pyth_prices)
+    if args.format == "table":
+        print_pool_table(rows, pyth_prices, args.precision)
+    else:
+        write_pool_rows(rows, args.format, args.precision)
+    return 1 if any(row.error for row in rows) else 0
+
+
+def run(args: argparse.Namespace) -> int:
+    if args.record:
+        from price_history import record
+
+        return asyncio.run(record(args))
+    if args.watch:
+        from price_watch import watch
+
+        pools = expand_info_paths(args.info)
+        if len(pools) != 1:
+            raise SystemExit("--watch follows a single pool; pass exactly one swap-info file")
+        return asyncio.run(watch(args, pools[0][0]))
+    return asyncio.run(run_async(args))
 
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Report token price information using Pyth oracle data")
     root = Path(__file__).resolve().parent
     parser.add_argument("--url", default="https://api.devnet.solana.com", help="Solana RPC endpoint")
-    parser.add_argument("--info", type=Path, default=root / "swap-info.json", help="Path to swap-info.json")
+    parser.add_argument(
+        "--info",
+        type=Path,
+        nargs="+",
+        default=[root / "swap-info.json"],
+        help="swap-info.json files or directories of them; all pools are priced in one pass",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("table", "json", "csv"),
+        default="table",
+        help="Pool report format; json emits one object per pool per line",
+    )
     parser.add_argument("--precision", type=int, default=6, help="Decimal places to display in reports")
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=MAX_MULTIPLE_ACCOUNTS,
+        help=f"Accounts per getMultipleAccounts request (1-{MAX_MULTIPLE_ACCOUNTS})",
+    )
+    parser.add_argument(
+        "--index",
+        type=Path,
+        default=root / "pyth-index.json",
+        help="Path to the cached symbol -> Pyth price account index",
+    )
+    parser.add_argument(
+        "--index-ttl",
+        type=float,
+        default=DEFAULT_INDEX_TTL,
+        help="Seconds before the cached index is rebuilt from the mapping account",
+    )
+    parser.add_argument("--rebuild-index", action="store_true", help="Ignore the cached index and walk the mapping again")
+    parser.add_argument("--no-index", action="store_true", help="Neither read nor write the cached index")
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=DEFAULT_MAX_CONCURRENCY,
+        help="Maximum number of RPC requests in flight at once",
+    )
+    parser.add_argument("--timeout", type=float, default=DEFAULT_RPC_TIMEOUT, help="Per-request RPC timeout in seconds")
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and report every oracle or vault update received over the websocket",
+    )
+    parser.add_argument("--ws-url", help="Websocket endpoint for --watch (default: derived from --url)")
+    parser.add_argument("--json", action="store_true", help="With --watch, emit one JSON record per update")
+    parser.add_argument("--max-updates", type=int, help="With --watch, stop after this many updates")
+    parser.add_argument(
+        "--record",
+        type=Path,
+        metavar="DIR",
+        help="Keep sampling oracle prices and vault balances into a price history directory (see price_history.py)",
+    )
+    parser.add_argument("--interval", type=float, default=1.0, help="With --record, seconds between samples")
+    parser.add_argument(
+        "--segment-mb", type=float, default=64, help="With --record, size of each history segment file in MiB"
+    )
+    parser.add_argument("--max-samples", type=int, help="With --record, stop after this many samples")
+    add_profile_arguments(parser)
     return parser
 
 
 def main(argv: list[str] | None = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
+    configure_profiling(args)
     return run(args)
 
 
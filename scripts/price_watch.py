@@ -0,0 +1,250 @@
+"""Streaming mode for price_report driven by websocket account subscriptions.
+
+The three Pyth price accounts and both pool vaults are subscribed to with
+``accountSubscribe``. Each notification is decoded locally (Pyth price layout
+or SPL token-account layout) and only the derived values that depend on the
+changed input are recomputed.
+
+Offline, ``rpc_mock.py`` stands in for the validator: it serves
+``accountSubscribe`` one port above its HTTP port and can random-walk the
+subscribed accounts.
+
+Usage example:
+  python price_report.py --watch --url http://solana-validator:8899 --info swap-info.json --json
+  python rpc_mock.py --port 8899 --walk-ms 200 &
+  python price_report.py --watch --url http://127.0.0.1:8899 --info mock-swap-info.json --max-updates 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import struct
+import sys
+from dataclasses import dataclass, field
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Dict, Set, TextIO, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.websocket_api import connect
+from solders.pubkey import Pubkey
+from solders.rpc.responses import AccountNotification
+
+from price_report import (
+    PYTH_ACCOUNT_PRICE,
+    PYTH_SYMBOL_MAP,
+    AsyncRpcLimiter,
+    PoolSnapshot,
+    PythPrice,
+    fetch_pyth_prices_with_index_async,
+    format_decimal,
+    load_swap_info,
+    parse_price_account,
+    read_pool_snapshot_async,
+)
+from pyth_decode import parse_header_view
+from rpc_profile import instrument, span
+
+# SPL token account layout: mint (32) | owner (32) | amount (u64) | ...
+TOKEN_ACCOUNT_AMOUNT_OFFSET = 64
+_U64 = struct.Struct("<Q")
+
+TOKEN_VAULT = "token_vault"
+WSOL_VAULT = "wsol_vault"
+
+# Derived values in dependency order: (name, inputs it is computed from).
+DERIVED: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("token_wsol", (TOKEN_VAULT, WSOL_VAULT)),
+    ("token_usd", ("token_wsol", "SOL")),
+    ("token_btc", ("token_usd", "BTC")),
+    ("token_eth", ("token_usd", "ETH")),
+)
+
+
+def decode_token_amount(data) -> int:
+    """Read the ``amount`` field of an SPL token account."""
+    return _U64.unpack_from(data, TOKEN_ACCOUNT_AMOUNT_OFFSET)[0]
+
+
+def ws_url_from_http(url: str) -> str:
+    """Derive the websocket endpoint from an HTTP RPC URL (8899 -> 8900 on a local validator)."""
+    parts = urlsplit(url)
+    scheme = "wss" if parts.scheme == "https" else "ws"
+    netloc = parts.netloc
+    if parts.port == 8899:
+        netloc = netloc.rsplit(":", 1)[0] + ":8900"
+    return urlunsplit((scheme, netloc, parts.path, parts.query, parts.fragment))
+
+
+@dataclass
+class WatchState:
+    prices: Dict[str, PythPrice]
+    token_amount: int
+    token_decimals: int
+    wsol_amount: int
+    wsol_decimals: int
+    derived: Dict[str, Decimal] = field(default_factory=dict)
+
+    @classmethod
+    def from_snapshot(cls, prices: Dict[str, PythPrice], snapshot: PoolSnapshot) -> "WatchState":
+        state = cls(
+            prices=prices,
+            token_amount=int(snapshot.token_balance.scaleb(snapshot.token_decimals)),
+            token_decimals=snapshot.token_decimals,
+            wsol_amount=int(snapshot.wsol_balance.scaleb(snapshot.wsol_decimals)),
+            wsol_decimals=snapshot.wsol_decimals,
+        )
+        state.recompute({TOKEN_VAULT, WSOL_VAULT, *PYTH_SYMBOL_MAP})
+        return state
+
+    @property
+    def snapshot(self) -> PoolSnapshot:
+        return PoolSnapshot(
+            token_balance=Decimal(self.token_amount).scaleb(-self.token_decimals),
+            token_decimals=self.token_decimals,
+            wsol_balance=Decimal(self.wsol_amount).scaleb(-self.wsol_decimals),
+            wsol_decimals=self.wsol_decimals,
+        )
+
+    def _compute(self, name: str) -> Decimal:
+        if name == "token_wsol":
+            return self.snapshot.token_price_in_wsol
+        if name == "token_usd":
+            return self.derived["token_wsol"] * self.prices[PYTH_SYMBOL_MAP["SOL"]].price
+        if name == "token_btc":
+            return self.derived["token_usd"] / self.prices[PYTH_SYMBOL_MAP["BTC"]].price
+        if name == "token_eth":
+            return self.derived["token_usd"] / self.prices[PYTH_SYMBOL_MAP["ETH"]].price
+        raise KeyError(name)
+
+    def recompute(self, changed_inputs: Set[str]) -> Dict[str, Decimal]:
+        """Recompute the derived values reachable from ``changed_inputs``; return those that changed."""
+        dirty = set(changed_inputs)
+        changed: Dict[str, Decimal] = {}
+        for name, inputs in DERIVED:
+            if dirty.isdisjoint(inputs):
+                continue
+            try:
+                value = self._compute(name)
+            except (ValueError, ArithmeticError):
+                # e.g. an empty vault; keep the last good value until the inputs recover.
+                continue
+            if self.derived.get(name) != value:
+                self.derived[name] = value
+                changed[name] = value
+                dirty.add(name)
+        return changed
+
+    def apply_price(self, shorthand: str, price: PythPrice) -> Dict[str, Decimal]:
+        previous = self.prices.get(price.symbol)
+        self.prices[price.symbol] = price
+        if previous is not None and previous.price == price.price:
+            return {}
+        return self.recompute({shorthand})
+
+    def apply_vault(self, vault: str, amount: int) -> Dict[str, Decimal]:
+        if vault == TOKEN_VAULT:
+            if amount == self.token_amount:
+                return {}
+            self.token_amount = amount
+        else:
+            if amount == self.wsol_amount:
+                return {}
+            self.wsol_amount = amount
+        return self.recompute({vault})
+
+
+class UpdateEmitter:
+    def __init__(self, precision: int, as_json: bool, out: TextIO = sys.stdout):
+        self.precision = precision
+        self.as_json = as_json
+        self.out = out
+
+    def emit(self, slot: int, source: str, state: WatchState, changed: Dict[str, Decimal]) -> None:
+        if self.as_json:
+            record = {
+                "slot": slot,
+                "source": source,
+                "changed": {name: str(value) for name, value in changed.items()},
+                "prices": {short: str(state.prices[name].price) for short, name in PYTH_SYMBOL_MAP.items()},
+                "token_vault": state.token_amount,
+                "wsol_vault": state.wsol_amount,
+                "derived": {name: str(value) for name, value in state.derived.items()},
+            }
+            self.out.write(json.dumps(record) + "\n")
+        else:
+            values = "  ".join(
+                f"{name}={format_decimal(value, self.precision)}{'*' if name in changed else ''}"
+                for name, value in state.derived.items()
+            )
+            self.out.write(f"[slot {slot}] {source:<11} {values}\n")
+        self.out.flush()
+
+
+def build_handlers(
+    state: WatchState, price_keys: Dict[str, str], swap_info: dict
+) -> Dict[str, Tuple[str, Callable[[memoryview], Dict[str, Decimal]]]]:
+    """Map each subscribed pubkey to ``(source name, handler)``."""
+    handlers: Dict[str, Tuple[str, Callable[[memoryview], Dict[str, Decimal]]]] = {}
+
+    for shorthand, product_name in PYTH_SYMBOL_MAP.items():
+        def on_price(data, shorthand=shorthand, product_name=product_name):
+            view, version, account_type = parse_header_view(data)
+            if account_type != PYTH_ACCOUNT_PRICE:
+                return {}
+            price, confidence, status = parse_price_account(view, version)
+            return state.apply_price(
+                shorthand, PythPrice(symbol=product_name, price=price, confidence=confidence, status=status)
+            )
+
+        handlers[price_keys[product_name]] = (shorthand, on_price)
+
+    handlers[swap_info["token_a_vault"]] = (TOKEN_VAULT, lambda data: state.apply_vault(TOKEN_VAULT, decode_token_amount(data)))
+    handlers[swap_info["token_b_vault"]] = (WSOL_VAULT, lambda data: state.apply_vault(WSOL_VAULT, decode_token_amount(data)))
+    return handlers
+
+
+async def watch(args: argparse.Namespace, info_path: Path) -> int:
+    limiter = AsyncRpcLimiter(args.max_concurrency, args.timeout)
+    swap_info = load_swap_info(info_path)
+    async with instrument(AsyncClient(args.url, timeout=args.timeout)) as client:
+        (prices, index), snapshot = await asyncio.gather(
+            fetch_pyth_prices_with_index_async(
+                client,
+                PYTH_SYMBOL_MAP.values(),
+                limiter,
+                chunk_size=args.chunk_size,
+                index_path=None if args.no_index else args.index,
+                index_ttl=args.index_ttl,
+                rebuild_index=args.rebuild_index,
+            ),
+            read_pool_snapshot_async(client, swap_info, limiter),
+        )
+
+    state = WatchState.from_snapshot(prices, snapshot)
+    price_keys = {symbol: entry.price_key for symbol, entry in index.entries.items()}
+    handlers = build_handlers(state, price_keys, swap_info)
+    emitter = UpdateEmitter(args.precision, args.json)
+    emitter.emit(0, "initial", state, dict(state.derived))
+
+    updates = 0
+    ws_url = args.ws_url or ws_url_from_http(args.url)
+    async with connect(ws_url) as ws:
+        for pubkey in handlers:
+            await ws.account_subscribe(Pubkey.from_string(pubkey), commitment="confirmed", encoding="base64")
+        async for messages in ws:
+            for message in messages:
+                if not isinstance(message, AccountNotification):
+                    continue
+                pubkey = str(ws.subscriptions[message.subscription].account)
+                source, handler = handlers[pubkey]
+                with span("decode.notifications"):
+                    changed = handler(memoryview(message.result.value.data))
+                emitter.emit(message.result.context.slot, source, state, changed)
+                updates += 1
+                if args.max_updates is not None and updates >= args.max_updates:
+                    return 0
+    return 0
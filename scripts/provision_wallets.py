@@ -0,0 +1,141 @@
+"""Generate many throwaway wallets into one keystore and optionally fund them.
+
+Usage example:
+  python provision_wallets.py --count 5000 --out wallets.ks
+  python provision_wallets.py --out wallets.ks --fund transfer --sol 0.05 --from-keypair ~/.config/solana/id.json
+  python provision_wallets.py --count 200 --out wallets.ks --fund airdrop --sol 1
+
+Keypairs from the keystore can then be passed as ``wallets.ks:<index>`` to any
+script that takes a keypair path.
+"""
+
+import argparse
+import os
+import time
+from typing import List, Optional, Sequence
+
+from common import (
+    AIRDROP_CONFIRM_TIMEOUT_SEC,
+    ConfirmationTracker,
+    RpcBatch,
+    TrackedSignature,
+    TransferRow,
+    add_sender_arguments,
+    estimate_transfer_batch_fee,
+    get_blockhash_provider,
+    get_client,
+    lamports_from_sol,
+    load_keypair,
+    open_keystore,
+    pack_transfer_batches,
+    report_send_stats,
+    send_transfer_batches,
+    sender_from_args,
+    track_airdrop,
+    write_transfer_results,
+)
+from compute_budget import add_compute_budget_arguments, tuner_from_args
+from keystore import generate_keystore
+from solana.constants import LAMPORTS_PER_SOL
+from solana.rpc.api import Client
+from solders.pubkey import Pubkey
+from solders.rpc.responses import RequestAirdropResp
+
+# requestAirdrop calls sent per JSON-RPC batch.
+DEFAULT_AIRDROP_BATCH = 50
+
+
+def fund_by_transfer(client: Client, args, pubkeys: Sequence[Pubkey], lamports: int) -> None:
+    from_keypair = load_keypair(args.from_keypair)
+    rows = [TransferRow(line=i, recipient=pubkey, lamports=lamports) for i, pubkey in enumerate(pubkeys)]
+    tuner = tuner_from_args(client, args)
+    batches = pack_transfer_batches(from_keypair, rows, reserve_compute_budget=tuner is not None)
+    provider = get_blockhash_provider(client)
+    total = lamports * len(rows)
+    fee = estimate_transfer_batch_fee(client, from_keypair, batches[0], provider=provider, tuner=tuner) * len(batches)
+    balance = client.get_balance(from_keypair.pubkey()).value or 0
+    print(
+        f"Пополнение переводами: {len(rows)} кошельков, {len(batches)} транзакций, "
+        f"{total} лампортов ({total / LAMPORTS_PER_SOL} SOL) + комиссия {fee} лампортов."
+    )
+    if balance < total + fee:
+        print(f"Недостаточно средств: баланс ({balance}) меньше суммы ({total}) + комиссии ({fee}).")
+        return
+
+    sender = sender_from_args(client, args)
+    with provider:
+        results = send_transfer_batches(
+            client, from_keypair, batches, ws_url=args.ws_url, provider=provider, sender=sender, tuner=tuner
+        )
+    report_send_stats(sender.stats())
+    if args.results:
+        write_transfer_results(args.results, results)
+    confirmed = sum(1 for result in results if result.status == "confirmed")
+    print(f"Пополнено кошельков: {confirmed}/{len(results)}.")
+
+
+def fund_by_airdrop(
+    client: Client, pubkeys: Sequence[Pubkey], lamports: int, batch_size: int, ws_url: Optional[str] = None
+) -> None:
+    tracker = ConfirmationTracker(client)
+    tracked: List[TrackedSignature] = []
+    failed = 0
+    print(f"Пополнение через airdrop: {len(pubkeys)} кошельков по {lamports} лампортов.")
+    for start in range(0, len(pubkeys), batch_size):
+        with RpcBatch(client, raise_errors=False) as batch:
+            pending = [batch.request_airdrop(pubkey, lamports) for pubkey in pubkeys[start:start + batch_size]]
+        for slot in pending:
+            resp = slot.get()
+            if isinstance(resp, RequestAirdropResp):
+                tracked.append(track_airdrop(tracker, resp.value))
+            else:
+                failed += 1
+                print(f"Ошибка airdrop: {resp}")
+    tracker.confirm(ws_url=ws_url, timeout_sec=AIRDROP_CONFIRM_TIMEOUT_SEC)
+    confirmed = sum(1 for item in tracked if item.status == "confirmed")
+    print(f"Пополнено кошельков: {confirmed}/{len(pubkeys)} (ошибок запроса: {failed}).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Provision a keystore of wallets and optionally fund them")
+    parser.add_argument("--out", required=True, help="Keystore file to create (or fund, without --count)")
+    parser.add_argument("--count", type=int, help="Number of keypairs to generate")
+    parser.add_argument("--workers", type=int, help="Generator processes (default: number of cores)")
+    parser.add_argument("--force", action="store_true", help="Overwrite an existing keystore")
+    parser.add_argument("--fund", choices=("transfer", "airdrop"), help="Fund every wallet in the keystore")
+    amt = parser.add_mutually_exclusive_group()
+    amt.add_argument("--sol", default="0.01", help="SOL per wallet (default 0.01)")
+    amt.add_argument("--lamports", type=int, help="Lamports per wallet")
+    parser.add_argument("--from-keypair", help="Funding keypair for --fund transfer (default: ~/.config/solana/id.json)")
+    parser.add_argument("--rpc", help="RPC URL (default: from SOLANA_RPC_URL or solana-validator:8899)")
+    parser.add_argument("--ws-url", help="Websocket URL; confirm via signatureSubscribe instead of polling")
+    parser.add_argument("--max-in-flight", type=int, default=8, help="Max unconfirmed funding transactions")
+    add_sender_arguments(parser)
+    add_compute_budget_arguments(parser)
+    parser.add_argument("--airdrop-batch", type=int, default=DEFAULT_AIRDROP_BATCH, help="Airdrop requests per RPC batch")
+    parser.add_argument("--results", help="--fund transfer: write per-wallet results CSV here")
+    args = parser.parse_args()
+
+    if args.count is not None:
+        if os.path.exists(args.out) and not args.force:
+            print(f"Файл {args.out} уже существует, используйте --force для перезаписи.")
+            return
+        start = time.perf_counter()
+        count = generate_keystore(args.out, args.count, workers=args.workers)
+        elapsed = time.perf_counter() - start
+        print(f"Создано кошельков: {count} за {elapsed:.1f} с ({count / elapsed:.0f} ключей/с) -> {args.out}")
+
+    if not args.fund:
+        return
+
+    pubkeys = open_keystore(args.out).pubkeys()
+    lamports = args.lamports if args.lamports is not None else lamports_from_sol(args.sol)
+    client = get_client(args.rpc)
+    if args.fund == "transfer":
+        fund_by_transfer(client, args, pubkeys, lamports)
+    else:
+        fund_by_airdrop(client, pubkeys, lamports, args.airdrop_batch, ws_url=args.ws_url)
+
+
+if __name__ == "__main__":
+    main()
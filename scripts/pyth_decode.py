@@ -0,0 +1,169 @@
+"""Zero-copy decoders for Pyth mapping, product and price accounts.
+
+The helpers here work on ``memoryview`` slices of the raw account buffer and
+hand out product keys as raw 32-byte values, so a key only becomes a
+``Pubkey`` (or ``str``) when a caller actually needs one.
+"""
+
+from __future__ import annotations
+
+import base64
+import struct
+from typing import Iterator, List, Optional, Tuple, Union
+
+from solders.pubkey import Pubkey
+
+import numpy as np
+
+PYTH_MAGIC = 0xA1B2C3D4
+ACCOUNT_HEADER_SIZE = 16
+KEY_SIZE = 32
+ZERO_KEY = b"\x00" * KEY_SIZE
+
+Buffer = Union[bytes, bytearray, memoryview]
+# Below this size copying a slice of ``bytes`` is cheaper than creating a ``memoryview`` of it.
+VIEW_TRIM_MIN_SIZE = 16 * 1024
+
+_HEADER = struct.Struct("<IIII")
+_MAPPING_HEADER = struct.Struct("<II32s")
+_KEY = struct.Struct("<32s")
+_SYMBOL = b"symbol"
+
+# One fixed-size record per product slot of a mapping account.
+MAPPING_KEY_DTYPE = np.dtype([("key", "V32")])
+
+
+def _parse_header(data: Buffer) -> Tuple[int, int, int]:
+    if len(data) < ACCOUNT_HEADER_SIZE:
+        raise ValueError("Account data too short for Pyth header")
+    magic, version, account_type, size = _HEADER.unpack_from(data, 0)
+    if magic != PYTH_MAGIC:
+        raise ValueError("Account data does not match Pyth magic constant")
+    if size > len(data):
+        raise ValueError("Pyth account size field larger than buffer")
+    return version, account_type, size
+
+
+def parse_header_view(data: Buffer) -> Tuple[memoryview, int, int]:
+    """Validate the Pyth header and return a view trimmed to the declared size."""
+    version, account_type, size = _parse_header(data)
+    return memoryview(data)[:size], version, account_type
+
+
+def decode_account_view(value, pubkey: object) -> Tuple[Buffer, int, int]:
+    """Like ``price_report.decode_account`` but without copying large account data.
+
+    Data that is already exactly ``size`` bytes comes back as the same object.
+    Small accounts are trimmed with a plain slice; only large ones (the
+    mapping account) are trimmed through a ``memoryview``.
+    """
+    if value is None:
+        raise ValueError(f"Account {pubkey} is unavailable")
+    raw = value.data
+    if not isinstance(raw, (bytes, bytearray, memoryview)):
+        data_b64, encoding = raw
+        if encoding != "base64":
+            raise ValueError(f"Unexpected encoding for {pubkey}: {encoding}")
+        raw = base64.b64decode(data_b64)
+    # Header checks inlined: this runs once per account on the report's hot path.
+    length = len(raw)
+    if length < ACCOUNT_HEADER_SIZE:
+        raise ValueError("Account data too short for Pyth header")
+    magic, version, account_type, size = _HEADER.unpack_from(raw, 0)
+    if magic != PYTH_MAGIC:
+        raise ValueError("Account data does not match Pyth magic constant")
+    if size > length:
+        raise ValueError("Pyth account size field larger than buffer")
+    if size == length:
+        return raw, version, account_type
+    if size < VIEW_TRIM_MIN_SIZE:
+        return raw[:size], version, account_type
+    return memoryview(raw)[:size], version, account_type
+
+
+def key_to_pubkey(raw: Buffer) -> Pubkey:
+    return Pubkey.from_bytes(bytes(raw))
+
+
+def key_to_str(raw: Optional[Buffer]) -> Optional[str]:
+    return None if raw is None else str(key_to_pubkey(raw))
+
+
+class MappingView:
+    """Lazy view over a Pyth mapping account."""
+
+    __slots__ = ("_view", "num_products", "next_key_raw")
+
+    KEYS_OFFSET = ACCOUNT_HEADER_SIZE + _MAPPING_HEADER.size
+
+    def __init__(self, data: Buffer):
+        view = memoryview(data)
+        num_products, _unused, next_key = _MAPPING_HEADER.unpack_from(view, ACCOUNT_HEADER_SIZE)
+        keys_end = self.KEYS_OFFSET + num_products * KEY_SIZE
+        if keys_end > len(view):
+            raise ValueError("Pyth mapping account truncated before the end of its product list")
+        self._view = view[self.KEYS_OFFSET:keys_end]
+        self.num_products = num_products
+        self.next_key_raw = None if next_key == ZERO_KEY else next_key
+
+    def raw_keys(self) -> Iterator[bytes]:
+        """Yield the non-empty product keys as raw 32-byte values."""
+        for (key,) in _KEY.iter_unpack(self._view):
+            if key != ZERO_KEY:
+                yield key
+
+    def pubkeys(self) -> Iterator[Pubkey]:
+        for key in self.raw_keys():
+            yield Pubkey.from_bytes(key)
+
+    def product_keys(self) -> List[str]:
+        """Same result as ``price_report.parse_mapping_account(...)[0]``."""
+        return [str(key) for key in self.pubkeys()]
+
+    @property
+    def next_key(self) -> Optional[str]:
+        return key_to_str(self.next_key_raw)
+
+    def keys_array(self) -> np.ndarray:
+        """Return the non-empty product keys as a NumPy array of ``V32`` records."""
+        keys = np.frombuffer(self._view, dtype=MAPPING_KEY_DTYPE, count=self.num_products)
+        words = np.frombuffer(self._view, dtype="<u8", count=self.num_products * 4).reshape(-1, 4)
+        return keys[words.any(axis=1)]
+
+
+def product_symbol(data: Buffer) -> Tuple[Optional[bytes], Optional[str]]:
+    """Return the raw first-price key and the ``symbol`` attribute of a product account.
+
+    Attributes are scanned in place and only the value of ``symbol`` is
+    decoded; the scan stops as soon as it is found.
+    """
+    view = memoryview(data)
+    (first_price,) = _KEY.unpack_from(view, ACCOUNT_HEADER_SIZE)
+    first_price_raw = None if first_price == ZERO_KEY else first_price
+
+    offset = ACCOUNT_HEADER_SIZE + KEY_SIZE
+    data_len = len(view)
+    while offset < data_len:
+        key_len = view[offset]
+        offset += 1
+        if key_len == 0:
+            break
+        key_end = offset + key_len
+        value_len = view[key_end]
+        value_start = key_end + 1
+        if view[offset:key_end] == _SYMBOL:
+            return first_price_raw, bytes(view[value_start:value_start + value_len]).decode("utf-8")
+        offset = value_start + value_len
+    return first_price_raw, None
+
+
+def price_product_key_raw(data: Buffer, version: int) -> Optional[bytes]:
+    """Return the raw product key stored in a price account."""
+    if version == 2:
+        offset = ACCOUNT_HEADER_SIZE + 96
+    elif version == 1:
+        offset = ACCOUNT_HEADER_SIZE + 32
+    else:
+        raise ValueError(f"Unsupported Pyth price account version {version}")
+    (product_key,) = _KEY.unpack_from(data, offset)
+    return None if product_key == ZERO_KEY else product_key
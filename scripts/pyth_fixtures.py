@@ -0,0 +1,182 @@
+"""Recorded and synthetic Pyth account blobs for offline decoding and benchmarks.
+
+``record`` dumps real mapping/product/price accounts from an RPC node into a
+JSON file (``{pubkey: base64 data}``); ``synthetic_pyth_accounts`` builds
+deterministic blobs with the same layout when no recording is at hand.
+
+Usage example:
+  python pyth_fixtures.py --url https://api.devnet.solana.com --out fixtures/pyth-devnet.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from solana.rpc.api import Client
+from solders.pubkey import Pubkey
+
+from price_report import PYTH_ACCOUNT_MAPPING, PYTH_ACCOUNT_PRICE, PYTH_ACCOUNT_PRODUCT, PYTH_MAPPING_DEVNET
+from pyth_decode import ACCOUNT_HEADER_SIZE, PYTH_MAGIC, ZERO_KEY, MappingView, product_symbol
+
+PRICE_ACCOUNT_SIZE = 3312
+# Aggregate price (i64), confidence (u64), status (u32) of a v2 price account.
+PRICE_AGGREGATE_OFFSET = 208
+MAPPING_CAPACITY = 640
+
+# (symbol, price, confidence) for the synthetic products the report looks for.
+DEFAULT_SYMBOLS: Tuple[Tuple[str, int, int], ...] = (
+    ("Crypto.SOL/USD", 14_512_345_678, 7_500_000),
+    ("Crypto.BTC/USD", 6_512_300_000_000, 2_100_000_000),
+    ("Crypto.ETH/USD", 345_600_000_000, 150_000_000),
+)
+
+
+def fixture_key(label: str) -> bytes:
+    """Deterministic 32-byte key derived from a label."""
+    return hashlib.sha256(label.encode("utf-8")).digest()
+
+
+def _header(account_type: int, size: int, version: int = 2) -> bytes:
+    return struct.pack("<IIII", PYTH_MAGIC, version, account_type, size)
+
+
+def build_mapping_account(product_keys: List[bytes], next_key: bytes = ZERO_KEY) -> bytes:
+    body = struct.pack("<II32s", len(product_keys), 0, next_key) + b"".join(product_keys)
+    size = ACCOUNT_HEADER_SIZE + len(body)
+    padding = b"\x00" * ((MAPPING_CAPACITY - len(product_keys)) * 32)
+    return _header(PYTH_ACCOUNT_MAPPING, size) + body + padding
+
+
+def build_product_account(price_key: bytes, attrs: Dict[str, str]) -> bytes:
+    encoded = b"".join(
+        bytes([len(key)]) + key.encode("utf-8") + bytes([len(value)]) + value.encode("utf-8")
+        for key, value in attrs.items()
+    )
+    body = price_key + encoded
+    size = ACCOUNT_HEADER_SIZE + len(body)
+    return _header(PYTH_ACCOUNT_PRODUCT, size) + body + b"\x00" * (512 - size)
+
+
+def build_price_account(
+    product_key: bytes, price: int, confidence: int, exponent: int = -8, status: int = 1, slot: int = 1
+) -> bytes:
+    buf = bytearray(PRICE_ACCOUNT_SIZE)
+    buf[0:ACCOUNT_HEADER_SIZE] = _header(PYTH_ACCOUNT_PRICE, PRICE_ACCOUNT_SIZE)
+    struct.pack_into("<IiII", buf, 16, 1, exponent, 1, 1)
+    struct.pack_into("<QQ", buf, 32, slot, slot)
+    buf[112:144] = product_key
+    struct.pack_into("<qQIIQ", buf, PRICE_AGGREGATE_OFFSET, price, confidence, status, 0, slot)
+    return bytes(buf)
+
+
+def synthetic_pyth_accounts(
+    num_products: int = 600, symbols: Iterable[Tuple[str, int, int]] = DEFAULT_SYMBOLS
+) -> Tuple[str, Dict[str, bytes]]:
+    """Return ``(mapping_key, {pubkey: data})`` for a mapping with ``num_products`` products.
+
+    The requested symbols are placed towards the end of the product list so a
+    traversal has to look at almost every product before it finishes.
+    """
+    symbols = list(symbols)
+    if not len(symbols) <= num_products <= MAPPING_CAPACITY:
+        raise ValueError(f"num_products must be between {len(symbols)} and {MAPPING_CAPACITY}")
+    accounts: Dict[str, bytes] = {}
+    product_keys: List[bytes] = []
+    placed = {num_products - 1 - i * 7: entry for i, entry in enumerate(symbols)}
+    for i in range(num_products):
+        product_key = fixture_key(f"product-{i}")
+        price_key = fixture_key(f"price-{i}")
+        if i in placed:
+            symbol, price, confidence = placed[i]
+        else:
+            symbol, price, confidence = f"Crypto.TEST{i}/USD", 1_000_000 + i, 1_000
+        base = symbol.split(".", 1)[-1].split("/", 1)[0]
+        attrs = {
+            "asset_type": "Crypto",
+            "base": base,
+            "description": f"{base}/USD",
+            "generic_symbol": f"{base}USD",
+            "quote_currency": "USD",
+            "symbol": symbol,
+        }
+        accounts[str(Pubkey.from_bytes(product_key))] = build_product_account(price_key, attrs)
+        accounts[str(Pubkey.from_bytes(price_key))] = build_price_account(product_key, price, confidence)
+        product_keys.append(product_key)
+    mapping_key = str(Pubkey.from_bytes(fixture_key("mapping")))
+    accounts[mapping_key] = build_mapping_account(product_keys)
+    return mapping_key, accounts
+
+
+def save_accounts(path: Path, mapping_key: str, accounts: Dict[str, bytes]) -> None:
+    payload = {
+        "mapping_key": mapping_key,
+        "accounts": {key: base64.b64encode(data).decode("ascii") for key, data in accounts.items()},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload))
+
+
+def load_accounts(path: Path) -> Tuple[str, Dict[str, bytes]]:
+    payload = json.loads(path.read_text())
+    accounts = {key: base64.b64decode(data) for key, data in payload["accounts"].items()}
+    return payload["mapping_key"], accounts
+
+
+def load_or_synthesize(path: Optional[Path]) -> Tuple[str, Dict[str, bytes]]:
+    if path is not None:
+        return load_accounts(path)
+    return synthetic_pyth_accounts()
+
+
+def record(client: Client, mapping_key: str, chunk_size: int = 100) -> Dict[str, bytes]:
+    """Fetch the mapping account, every product on it and every product's first price account."""
+    def fetch(keys: List[Pubkey]) -> List[Optional[bytes]]:
+        blobs: List[Optional[bytes]] = []
+        for start in range(0, len(keys), chunk_size):
+            resp = client.get_multiple_accounts(keys[start:start + chunk_size])
+            blobs.extend(None if value is None else bytes(value.data) for value in resp.value)
+        return blobs
+
+    accounts: Dict[str, bytes] = {}
+    mapping_data = client.get_account_info(Pubkey.from_string(mapping_key)).value.data
+    accounts[mapping_key] = bytes(mapping_data)
+    product_keys = list(MappingView(mapping_data).pubkeys())
+    price_keys: List[Pubkey] = []
+    for key, blob in zip(product_keys, fetch(product_keys)):
+        if blob is None:
+            continue
+        accounts[str(key)] = blob
+        first_price_raw, _symbol = product_symbol(blob)
+        if first_price_raw is not None:
+            price_keys.append(Pubkey.from_bytes(first_price_raw))
+    for key, blob in zip(price_keys, fetch(price_keys)):
+        if blob is not None:
+            accounts[str(key)] = blob
+    return accounts
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Record Pyth account blobs for offline use")
+    parser.add_argument("--url", default="https://api.devnet.solana.com", help="Solana RPC endpoint")
+    parser.add_argument("--mapping", default=PYTH_MAPPING_DEVNET, help="Pyth mapping account")
+    parser.add_argument("--out", type=Path, required=True, help="Where to write the recorded accounts")
+    parser.add_argument("--synthetic", action="store_true", help="Write synthetic accounts instead of recording")
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        mapping_key, accounts = synthetic_pyth_accounts()
+    else:
+        mapping_key, accounts = args.mapping, record(Client(args.url), args.mapping)
+    save_accounts(args.out, mapping_key, accounts)
+    print(f"Wrote {len(accounts)} accounts to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,682 @@
+"""Local JSON-RPC stand-in serving recorded (or synthetic) fixtures.
+
+It answers the calls the scripts make: account reads for the Pyth mapping,
+product and price accounts, ``my_dex`` pool discovery, token vault balances,
+blockhash, fee, sendTransaction, simulation, prioritization fees, signature
+statuses and airdrops. Single and batched requests are supported, and every HTTP round
+trip can be delayed by a configurable latency.
+
+Extra methods exist for tooling: ``mock_getCallCounts`` returns the
+number of calls per RPC method and ``mock_resetCallCounts`` clears them;
+``mock_setTokenAmount`` and ``mock_setPrice`` change a vault balance or a
+Pyth aggregate price.
+
+The CLI also serves ``accountSubscribe`` on a websocket one port above the
+HTTP port (8900 for 8899, as the validator does). Every account change,
+whether from the ``mock_set*`` methods or from the ``--walk-ms`` random walk
+over the subscribed vaults and price accounts, is pushed to its subscribers
+as a base64 ``accountNotification``.
+
+Usage example:
+  python rpc_mock.py --port 8899 --latency-ms 20
+  python price_report.py --url http://127.0.0.1:8899 --info mock-swap-info.json
+  python rpc_mock.py --port 8899 --walk-ms 200 &
+  python price_report.py --url http://127.0.0.1:8899 --info mock-swap-info.json --watch --max-updates 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import multiprocessing as mp
+import random
+import struct
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import base58
+import httpx
+from solders.hash import Hash
+from solders.message import from_bytes_versioned
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.transaction import Transaction, VersionedTransaction
+from websockets.asyncio.server import ServerConnection
+from websockets.asyncio.server import serve as serve_websocket
+from websockets.exceptions import ConnectionClosed
+
+from dex_pools import MY_DEX_PROGRAM_ID, POOL_FIELDS, POOL_STATE_DISCRIMINATOR
+from price_report import PYTH_ACCOUNT_PRICE, PYTH_MAPPING_DEVNET
+from pyth_fixtures import PRICE_AGGREGATE_OFFSET, fixture_key, load_or_synthesize
+
+SYSTEM_PROGRAM = "11111111111111111111111111111111"
+TOKEN_PROGRAM = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+PYTH_PROGRAM = "gSbePebfvPy7tRqimPoVecS2UsBvYv46ynrzWocc92s"
+TOKEN_ACCOUNT_SIZE = 165
+MINT_ACCOUNT_SIZE = 82
+LAMPORTS_PER_SIGNATURE = 5000
+BLOCKS_PER_BLOCKHASH = 150
+COMPUTE_BUDGET_PROGRAM = "ComputeBudget111111111111111111111111111111"
+# Compute units charged per instruction by ``simulateTransaction``, roughly what the real programs use.
+INSTRUCTION_UNITS = {SYSTEM_PROGRAM: 150, COMPUTE_BUDGET_PROGRAM: 150, TOKEN_PROGRAM: 2915}
+DEFAULT_INSTRUCTION_UNITS = 5000
+
+RPC_METHODS = frozenset({
+    "getAccountInfo",
+    "getMultipleAccounts",
+    "getMinimumBalanceForRentExemption",
+    "getProgramAccounts",
+    "getBalance",
+    "getTokenAccountBalance",
+    "getLatestBlockhash",
+    "getBlockHeight",
+    "getFeeForMessage",
+    "sendTransaction",
+    "requestAirdrop",
+    "getSignatureStatuses",
+    "simulateTransaction",
+    "getRecentPrioritizationFees",
+    "mock_getCallCounts",
+    "mock_resetCallCounts",
+    "mock_setTokenAmount",
+    "mock_setPrice",
+})
+# Largest relative step of one ``--walk-ms`` move.
+WALK_STEP = 0.001
+
+
+@dataclass
+class TokenVault:
+    mint: str
+    amount: int
+    decimals: int
+
+
+@dataclass
+class MockFixtures:
+    """Account data and token balances the stand-in serves."""
+
+    accounts: Dict[str, Tuple[bytes, str]] = field(default_factory=dict)
+    vaults: Dict[str, TokenVault] = field(default_factory=dict)
+    swap_info: Dict[str, Any] = field(default_factory=dict)
+
+    def add_account(self, pubkey: str, data: bytes, owner: str = SYSTEM_PROGRAM) -> None:
+        self.accounts[pubkey] = (data, owner)
+
+    def add_vault(self, pubkey: str, mint: str, owner: str, amount: int, decimals: int) -> None:
+        data = bytearray(TOKEN_ACCOUNT_SIZE)
+        data[0:32] = bytes(Pubkey.from_string(mint))
+        data[32:64] = bytes(Pubkey.from_string(owner))
+        struct.pack_into("<Q", data, 64, amount)
+        data[108] = 1  # AccountState::Initialized
+        self.add_account(pubkey, bytes(data), TOKEN_PROGRAM)
+        self.vaults[pubkey] = TokenVault(mint=mint, amount=amount, decimals=decimals)
+
+    def add_mint(self, pubkey: str, decimals: int, supply: int = 0) -> None:
+        data = bytearray(MINT_ACCOUNT_SIZE)
+        struct.pack_into("<Q", data, 36, supply)
+        data[44] = decimals
+        data[45] = 1  # is_initialized
+        self.add_account(pubkey, bytes(data), TOKEN_PROGRAM)
+
+    def add_pool(self, token_a_mint: str, token_b_mint: str, token_a_vault: str, token_b_vault: str, rate: int) -> str:
+        """A ``my_dex`` PoolState account at the pool PDA; returns its address."""
+        keys = [bytes(Pubkey.from_string(key)) for key in (token_a_mint, token_b_mint, token_a_vault, token_b_vault)]
+        pool, bump = Pubkey.find_program_address([b"pool", keys[0], keys[1]], MY_DEX_PROGRAM_ID)
+        data = POOL_STATE_DISCRIMINATOR + POOL_FIELDS.pack(*keys, rate, bump)
+        self.add_account(str(pool), data, str(MY_DEX_PROGRAM_ID))
+        return str(pool)
+
+
+def _memcmp_bytes(memcmp: Dict[str, Any]) -> bytes:
+    encoding = memcmp.get("encoding", "base58")
+    if encoding == "base58":
+        return base58.b58decode(memcmp["bytes"])
+    if encoding == "base64":
+        return base64.b64decode(memcmp["bytes"])
+    return bytes(memcmp["bytes"])
+
+
+def _fixture_pubkey(label: str) -> str:
+    return str(Pubkey.from_bytes(fixture_key(label)))
+
+
+def default_fixtures(pyth_path: Optional[Path] = None) -> MockFixtures:
+    """Pyth accounts (recorded, or synthetic when no path is given) plus a two-vault pool.
+
+    The mapping account is also served under ``PYTH_MAPPING_DEVNET`` so the
+    scripts find it without any configuration.
+    """
+    fixtures = MockFixtures()
+    mapping_key, accounts = load_or_synthesize(pyth_path)
+    for pubkey, data in accounts.items():
+        fixtures.add_account(pubkey, data, PYTH_PROGRAM)
+    fixtures.add_account(PYTH_MAPPING_DEVNET, accounts[mapping_key], PYTH_PROGRAM)
+
+    token_mint, wsol_mint = _fixture_pubkey("token-mint"), "So11111111111111111111111111111111111111112"
+    pool_authority = _fixture_pubkey("pool-authority")
+    token_vault, wsol_vault = _fixture_pubkey("token-vault"), _fixture_pubkey("wsol-vault")
+    fixtures.add_vault(token_vault, token_mint, pool_authority, 1_250_000 * 10**9, 9)
+    fixtures.add_vault(wsol_vault, wsol_mint, pool_authority, 8_750 * 10**9, 9)
+    fixtures.add_mint(token_mint, 9, 1_000_000_000 * 10**9)
+    fixtures.add_mint(wsol_mint, 9)
+    fixtures.add_pool(token_mint, wsol_mint, token_vault, wsol_vault, rate=2)
+    fixtures.swap_info = {
+        "custom_token_mint": token_mint,
+        "custom_token_decimals": 9,
+        "token_a_vault": token_vault,
+        "token_b_vault": wsol_vault,
+    }
+    return fixtures
+
+
+class MockRpcState:
+    def __init__(self, fixtures: MockFixtures, confirm_delay: float = 0.0, drop_rate: float = 0.0):
+        self.fixtures = fixtures
+        self.confirm_delay = confirm_delay
+        self.drop_rate = drop_rate
+        self.balances: Dict[str, int] = {}
+        self.signatures: Dict[str, float] = {}
+        self.calls: Counter = Counter()
+        self.http_requests = 0
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        # Called with the pubkey of every account that changes (with ``lock`` held).
+        self.listeners: List[Callable[[str], None]] = []
+
+    # -- helpers ---------------------------------------------------------------
+
+    @property
+    def slot(self) -> int:
+        return 1000 + int((time.monotonic() - self.started) / 0.4)
+
+    def _context(self, value: Any) -> Dict[str, Any]:
+        return {"context": {"slot": self.slot}, "value": value}
+
+    def _account(self, pubkey: str, data_slice: Optional[dict] = None) -> Optional[Dict[str, Any]]:
+        if pubkey in self.fixtures.accounts:
+            data, owner = self.fixtures.accounts[pubkey]
+            lamports = 1_000_000 + len(data) * 6960
+        elif pubkey in self.balances:
+            data, owner, lamports = b"", SYSTEM_PROGRAM, self.balances[pubkey]
+        else:
+            return None
+        if data_slice:
+            data = data[data_slice["offset"]:data_slice["offset"] + data_slice["length"]]
+        return {
+            "data": [base64.b64encode(data).decode("ascii"), "base64"],
+            "executable": False,
+            "lamports": lamports,
+            "owner": owner,
+            "rentEpoch": 0,
+            "space": len(data),
+        }
+
+    def _changed(self, pubkey: str) -> None:
+        for listener in self.listeners:
+            listener(pubkey)
+
+    def set_token_amount(self, pubkey: str, amount: int) -> None:
+        vault = self.fixtures.vaults.get(pubkey)
+        if vault is None:
+            raise ValueError(f"Invalid param: {pubkey} is not a token vault")
+        data, owner = self.fixtures.accounts[pubkey]
+        buf = bytearray(data)
+        struct.pack_into("<Q", buf, 64, amount)
+        self.fixtures.accounts[pubkey] = (bytes(buf), owner)
+        vault.amount = amount
+        self._changed(pubkey)
+
+    def price(self, pubkey: str) -> Optional[int]:
+        """Aggregate price of a Pyth price account, or None for any other account."""
+        data, owner = self.fixtures.accounts.get(pubkey, (b"", SYSTEM_PROGRAM))
+        if owner != PYTH_PROGRAM or len(data) < PRICE_AGGREGATE_OFFSET + 8:
+            return None
+        if struct.unpack_from("<I", data, 8)[0] != PYTH_ACCOUNT_PRICE:
+            return None
+        return struct.unpack_from("<q", data, PRICE_AGGREGATE_OFFSET)[0]
+
+    def set_price(self, pubkey: str, price: int) -> None:
+        if self.price(pubkey) is None:
+            raise ValueError(f"Invalid param: {pubkey} is not a Pyth price account")
+        data, owner = self.fixtures.accounts[pubkey]
+        buf = bytearray(data)
+        struct.pack_into("<q", buf, PRICE_AGGREGATE_OFFSET, price)
+        self.fixtures.accounts[pubkey] = (bytes(buf), owner)
+        self._changed(pubkey)
+
+    def nudge(self, pubkey: str, rng: random.Random) -> None:
+        """Move a vault balance or a Pyth price by up to ``WALK_STEP`` either way."""
+        factor = 1 + rng.uniform(-WALK_STEP, WALK_STEP)
+        vault = self.fixtures.vaults.get(pubkey)
+        if vault is not None:
+            self.set_token_amount(pubkey, max(1, round(vault.amount * factor)))
+            return
+        price = self.price(pubkey)
+        if price is not None:
+            self.set_price(pubkey, max(1, round(price * factor)))
+
+    def _record_signature(self, sig: str) -> str:
+        self.signatures.setdefault(sig, time.monotonic())
+        return sig
+
+    # -- RPC methods -------------------------------------------------------------
+
+    def getAccountInfo(self, pubkey, config=None):
+        return self._context(self._account(pubkey, (config or {}).get("dataSlice")))
+
+    def getMultipleAccounts(self, pubkeys, config=None):
+        data_slice = (config or {}).get("dataSlice")
+        return self._context([self._account(pubkey, data_slice) for pubkey in pubkeys])
+
+    def getProgramAccounts(self, program, config=None):
+        config = config or {}
+        matches = []
+        for pubkey, (data, owner) in self.fixtures.accounts.items():
+            if owner != program:
+                continue
+            for spec in config.get("filters") or []:
+                if "dataSize" in spec and len(data) != spec["dataSize"]:
+                    break
+                if "memcmp" in spec:
+                    offset, expected = spec["memcmp"]["offset"], _memcmp_bytes(spec["memcmp"])
+                    if data[offset:offset + len(expected)] != expected:
+                        break
+            else:
+                matches.append({"pubkey": pubkey, "account": self._account(pubkey, config.get("dataSlice"))})
+        return self._context(matches) if config.get("withContext") else matches
+
+    def getMinimumBalanceForRentExemption(self, size, config=None):
+        return (size + 128) * 6960
+
+    def getBalance(self, pubkey, config=None):
+        account = self._account(pubkey)
+        return self._context(0 if account is None else account["lamports"])
+
+    def getTokenAccountBalance(self, pubkey, config=None):
+        vault = self.fixtures.vaults.get(pubkey)
+        if vault is None:
+            raise ValueError(f"Invalid param: could not find account {pubkey}")
+        whole, frac = divmod(vault.amount, 10**vault.decimals)
+        ui_string = f"{whole}.{frac:0{vault.decimals}d}".rstrip("0").rstrip(".") if vault.decimals else str(whole)
+        return self._context(
+            {
+                "amount": str(vault.amount),
+                "decimals": vault.decimals,
+                "uiAmount": vault.amount / 10**vault.decimals,
+                "uiAmountString": ui_string,
+            }
+        )
+
+    def getLatestBlockhash(self, config=None):
+        slot = self.slot
+        blockhash = Hash.hash(struct.pack("<Q", slot // 4))
+        return self._context({"blockhash": str(blockhash), "lastValidBlockHeight": slot + BLOCKS_PER_BLOCKHASH})
+
+    def getBlockHeight(self, config=None):
+        return self.slot
+
+    def getFeeForMessage(self, message, config=None):
+        parsed = from_bytes_versioned(base64.b64decode(message))
+        limit, price = _compute_budget(parsed)
+        priority = -(-limit * price // 1_000_000)
+        return self._context(parsed.header.num_required_signatures * LAMPORTS_PER_SIGNATURE + priority)
+
+    def sendTransaction(self, tx, config=None):
+        raw = base64.b64decode(tx) if (config or {}).get("encoding", "base64") == "base64" else tx
+        try:
+            signature = Transaction.from_bytes(raw).signatures[0]
+        except Exception:
+            signature = VersionedTransaction.from_bytes(raw).signatures[0]
+        # A dropped send is acknowledged but never lands, like a packet lost on the way to the leader.
+        if self.drop_rate and random.random() < self.drop_rate:
+            return str(signature)
+        return self._record_signature(str(signature))
+
+    def requestAirdrop(self, pubkey, lamports, config=None):
+        self.balances[pubkey] = self.balances.get(pubkey, 0) + lamports
+        return self._record_signature(str(Signature.new_unique()))
+
+    def getSignatureStatuses(self, signatures, config=None):
+        now = time.monotonic()
+        statuses = []
+        for sig in signatures:
+            submitted = self.signatures.get(sig)
+            if submitted is None or now - submitted < self.confirm_delay:
+                statuses.append(None)
+            else:
+                statuses.append(
+                    {"slot": self.slot, "confirmations": 1, "err": None, "status": {"Ok": None},
+                     "confirmationStatus": "confirmed"}
+                )
+        return self._context(statuses)
+
+    def simulateTransaction(self, tx, config=None):
+        raw = base64.b64decode(tx) if (config or {}).get("encoding", "base64") == "base64" else tx
+        message = VersionedTransaction.from_bytes(raw).message
+        keys = message.account_keys
+        units = sum(
+            INSTRUCTION_UNITS.get(str(keys[ix.program_id_index]), DEFAULT_INSTRUCTION_UNITS)
+            for ix in message.instructions
+        )
+        return self._context(
+            {"err": None, "logs": [], "accounts": None, "unitsConsumed": units, "returnData": None}
+        )
+
+    def getRecentPrioritizationFees(self, addresses=None):
+        # Same accounts, same fee history: deterministic, with most slots paying nothing.
+        rng = random.Random(",".join(sorted(addresses or [])))
+        slot = self.slot
+        return [
+            {"slot": slot - i, "prioritizationFee": 0 if rng.random() < 0.4 else rng.randrange(1, 50_000)}
+            for i in range(150)
+        ]
+
+    def mock_getCallCounts(self):
+        return {"http_requests": self.http_requests, "calls": dict(self.calls)}
+
+    def mock_resetCallCounts(self):
+        self.calls.clear()
+        self.http_requests = 0
+        return True
+
+    def mock_setTokenAmount(self, pubkey, amount):
+        self.set_token_amount(pubkey, int(amount))
+        return True
+
+    def mock_setPrice(self, pubkey, price):
+        self.set_price(pubkey, int(price))
+        return True
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        method = request.get("method", "")
+        reply: Dict[str, Any] = {"jsonrpc": "2.0", "id": request.get("id")}
+        if method not in RPC_METHODS:
+            reply["error"] = {"code": -32601, "message": f"Method not found: {method}"}
+            return reply
+        with self.lock:
+            if not method.startswith("mock_"):
+                self.calls[method] += 1
+            try:
+                reply["result"] = getattr(self, method)(*request.get("params", []))
+            except (ValueError, KeyError, TypeError) as e:
+                reply["error"] = {"code": -32602, "message": str(e)}
+        return reply
+
+
+def _compute_budget(message) -> Tuple[int, int]:
+    """``(unit limit, micro-lamports per unit)`` set by the message's ComputeBudget instructions."""
+    limit, price = 200_000, 0
+    keys = message.account_keys
+    for ix in message.instructions:
+        if str(keys[ix.program_id_index]) != COMPUTE_BUDGET_PROGRAM:
+            continue
+        data = bytes(ix.data)
+        if data[0] == 2:
+            limit = struct.unpack_from("<I", data, 1)[0]
+        elif data[0] == 3:
+            price = struct.unpack_from("<Q", data, 1)[0]
+    return limit, price
+
+
+def make_handler(state: MockRpcState, latency: float, jitter: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out as separate writes; without this, Nagle plus
+        # delayed ACKs add ~40 ms to every round trip.
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_POST(self) -> None:
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if latency or jitter:
+                time.sleep(latency + random.uniform(0, jitter))
+            items = body if isinstance(body, list) else [body]
+            if not all(item.get("method", "").startswith("mock_") for item in items):
+                with state.lock:
+                    state.http_requests += 1
+            reply = [state.handle(item) for item in body] if isinstance(body, list) else state.handle(body)
+            payload = json.dumps(reply).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return Handler
+
+
+class AccountSubscriptions:
+    """``accountSubscribe``/``accountUnsubscribe`` over a websocket, fed by account changes in the state.
+
+    Runs its own event loop in a daemon thread; notifications always carry
+    base64 data, whatever encoding was asked for.
+    """
+
+    def __init__(self, state: MockRpcState, walk_interval: float = 0.0, seed: Optional[int] = None):
+        self.state = state
+        self.walk_interval = walk_interval
+        self.rng = random.Random(seed)
+        self.port: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: Dict[str, Dict[int, ServerConnection]] = {}
+        self._ids = itertools.count(1)
+        state.listeners.append(self._account_changed)
+
+    def _account_changed(self, pubkey: str) -> None:
+        if self._loop is not None and self._subscribers.get(pubkey):
+            self._loop.call_soon_threadsafe(self._notify, pubkey)
+
+    def _notify(self, pubkey: str) -> None:
+        subscribers = self._subscribers.get(pubkey)
+        if not subscribers:
+            return
+        with self.state.lock:
+            result = self.state._context(self.state._account(pubkey))
+        for subscription, connection in list(subscribers.items()):
+            params = {"result": result, "subscription": subscription}
+            message = json.dumps({"jsonrpc": "2.0", "method": "accountNotification", "params": params})
+            asyncio.ensure_future(self._send(connection, message))
+
+    @staticmethod
+    async def _send(connection: ServerConnection, message: str) -> None:
+        try:
+            await connection.send(message)
+        except ConnectionClosed:
+            pass
+
+    def _reply(self, connection: ServerConnection, request: Dict[str, Any], owned: List[Tuple[str, int]]) -> Dict:
+        method, params = request.get("method"), request.get("params") or []
+        reply: Dict[str, Any] = {"jsonrpc": "2.0", "id": request.get("id")}
+        if method == "accountSubscribe" and params:
+            subscription = next(self._ids)
+            self._subscribers.setdefault(params[0], {})[subscription] = connection
+            owned.append((params[0], subscription))
+            reply["result"] = subscription
+        elif method == "accountUnsubscribe" and params:
+            reply["result"] = any(
+                subscribers.pop(params[0], None) is not None for subscribers in self._subscribers.values()
+            )
+        else:
+            reply["error"] = {"code": -32601, "message": f"Method not found: {method}"}
+        return reply
+
+    async def _handle(self, connection: ServerConnection) -> None:
+        owned: List[Tuple[str, int]] = []
+        try:
+            async for raw in connection:
+                body = json.loads(raw)
+                if isinstance(body, list):
+                    reply: Any = [self._reply(connection, item, owned) for item in body]
+                else:
+                    reply = self._reply(connection, body, owned)
+                await connection.send(json.dumps(reply))
+        except ConnectionClosed:
+            pass
+        finally:
+            for pubkey, subscription in owned:
+                self._subscribers.get(pubkey, {}).pop(subscription, None)
+
+    async def _walk(self) -> None:
+        while True:
+            await asyncio.sleep(self.walk_interval)
+            watched = [pubkey for pubkey, subscribers in self._subscribers.items() if subscribers]
+            if watched:
+                with self.state.lock:
+                    self.state.nudge(self.rng.choice(watched), self.rng)
+
+    async def _serve(self, host: str, port: int, ready: threading.Event) -> None:
+        self._loop = asyncio.get_running_loop()
+        async with serve_websocket(self._handle, host, port) as server:
+            self.port = server.sockets[0].getsockname()[1]
+            ready.set()
+            if self.walk_interval > 0:
+                await self._walk()
+            else:
+                await asyncio.Future()
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> "AccountSubscriptions":
+        """Start serving in a daemon thread; ``self.port`` holds the bound port on return."""
+        ready = threading.Event()
+        threading.Thread(target=asyncio.run, args=(self._serve(host, port, ready),), daemon=True).start()
+        if not ready.wait(10):
+            raise RuntimeError(f"Websocket endpoint did not start on {host}:{port}")
+        return self
+
+
+def serve(
+    fixtures: MockFixtures,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    confirm_delay: float = 0.0,
+    drop_rate: float = 0.0,
+    ws_port: Optional[int] = None,
+    walk_interval: float = 0.0,
+) -> ThreadingHTTPServer:
+    """Build (but do not start) a server; ``server.server_port`` holds the bound port.
+
+    With ``ws_port`` the websocket endpoint is started right away and
+    ``server.ws_port`` holds its port.
+    """
+    state = MockRpcState(fixtures, confirm_delay=confirm_delay, drop_rate=drop_rate)
+    server = ThreadingHTTPServer((host, port), make_handler(state, latency, jitter))
+    server.daemon_threads = True
+    server.ws_port = None
+    if ws_port is not None:
+        server.ws_port = AccountSubscriptions(state, walk_interval).start(host, ws_port).port
+    return server
+
+
+def _serve_in_child(fixtures, latency, jitter, confirm_delay, drop_rate, port_conn) -> None:
+    server = serve(fixtures, latency=latency, jitter=jitter, confirm_delay=confirm_delay, drop_rate=drop_rate)
+    port_conn.send(server.server_port)
+    server.serve_forever()
+
+
+class MockRpcServer:
+    """Run the stand-in in a child process so it does not share the GIL (or tracemalloc) with the caller."""
+
+    def __init__(
+        self,
+        fixtures: Optional[MockFixtures] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        confirm_delay: float = 0.0,
+        drop_rate: float = 0.0,
+    ):
+        self.fixtures = fixtures or default_fixtures()
+        self.latency = latency
+        self.jitter = jitter
+        self.confirm_delay = confirm_delay
+        self.drop_rate = drop_rate
+        self.url: Optional[str] = None
+        self._process: Optional[mp.Process] = None
+
+    def start(self) -> "MockRpcServer":
+        parent, child = mp.Pipe()
+        self._process = mp.Process(
+            target=_serve_in_child,
+            args=(self.fixtures, self.latency, self.jitter, self.confirm_delay, self.drop_rate, child),
+            daemon=True,
+        )
+        self._process.start()
+        self.url = f"http://127.0.0.1:{parent.recv()}"
+        return self
+
+    def stop(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def _call(self, method: str) -> Any:
+        resp = httpx.post(self.url, json={"jsonrpc": "2.0", "id": 0, "method": method, "params": []})
+        return resp.json()["result"]
+
+    def call_counts(self) -> Dict[str, Any]:
+        return self._call("mock_getCallCounts")
+
+    def reset_call_counts(self) -> None:
+        self._call("mock_resetCallCounts")
+
+    def __enter__(self) -> "MockRpcServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve Pyth/pool fixtures over a local JSON-RPC endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--fixtures", type=Path, help="Recorded Pyth accounts from pyth_fixtures.py (default: synthetic)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every HTTP round trip")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra random delay, uniform in [0, jitter]")
+    parser.add_argument("--confirm-delay-ms", type=float, default=0.0, help="Time before a signature reports confirmed")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of sendTransaction calls silently dropped")
+    parser.add_argument("--swap-info-out", type=Path, default=Path("mock-swap-info.json"), help="Where to write the pool's swap-info")
+    parser.add_argument("--ws-port", type=int, help="accountSubscribe websocket port (default: --port + 1)")
+    parser.add_argument(
+        "--walk-ms", type=float, default=0.0, help="Move a random subscribed vault or price every N ms (default: off)"
+    )
+    args = parser.parse_args(argv)
+
+    fixtures = default_fixtures(args.fixtures)
+    args.swap_info_out.write_text(json.dumps(fixtures.swap_info, indent=2))
+    server = serve(
+        fixtures,
+        host=args.host,
+        port=args.port,
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        confirm_delay=args.confirm_delay_ms / 1000,
+        drop_rate=args.drop_rate,
+        ws_port=(args.port + 1 if args.port else 0) if args.ws_port is None else args.ws_port,
+        walk_interval=args.walk_ms / 1000,
+    )
+    print(
+        f"Mock RPC on http://{args.host}:{server.server_port}, ws://{args.host}:{server.ws_port} "
+        f"(swap info: {args.swap_info_out})"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,374 @@
+"""Opt-in profiling of RPC round trips and local hot paths.
+
+``enable()`` switches recording on and ``instrument(client)`` wraps the
+provider of a ``Client`` or ``AsyncClient`` so every JSON-RPC round trip is
+recorded per method: call count, latency histogram, request/response bytes
+and errors. ``span(name)`` times local work such as decoding and signing,
+and ``count_retry(method)`` counts retries made by the scripts' own backoff
+loops. While profiling is off all of these are no-ops.
+
+Scripts expose it as ``--profile`` (summary on stderr at exit) and
+``--profile-out`` (``.json`` for JSON, anything else for Prometheus text).
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import bisect
+import contextlib
+import inspect
+import json
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, TextIO, Tuple, TypeVar
+
+C = TypeVar("C")
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Label for JSON-RPC batch POSTs; the calls inside are also counted under their own methods.
+BATCH_METHOD = "batch"
+METRIC_PREFIX = "solana_scripts"
+
+
+@dataclass
+class MethodStats:
+    calls: int = 0
+    batched: int = 0
+    errors: int = 0
+    retries: int = 0
+    request_bytes: int = 0
+    response_bytes: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+    def bucket_counts(self) -> List[int]:
+        """Cumulative observation count per ``LATENCY_BUCKETS`` bound."""
+        ordered = sorted(self.latencies)
+        return [bisect.bisect_right(ordered, bound) for bound in LATENCY_BUCKETS]
+
+    def quantile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def to_json(self) -> Dict[str, Any]:
+        total = sum(self.latencies)
+        return {
+            "calls": self.calls,
+            "batched": self.batched,
+            "errors": self.errors,
+            "retries": self.retries,
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "latency_seconds": {
+                "count": len(self.latencies),
+                "sum": total,
+                "p50": self.quantile(0.5),
+                "p95": self.quantile(0.95),
+                "max": max(self.latencies, default=0.0),
+                "buckets": dict(zip(map(str, LATENCY_BUCKETS), self.bucket_counts())),
+            },
+        }
+
+
+@dataclass
+class SpanStats:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"count": self.count, "sum_seconds": self.total, "max_seconds": self.max}
+
+
+class Profiler:
+    def __init__(self) -> None:
+        self.enabled = False
+        self.started_at = time.perf_counter()
+        self.methods: Dict[str, MethodStats] = {}
+        self.spans: Dict[str, SpanStats] = {}
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = time.perf_counter()
+            self.methods.clear()
+            self.spans.clear()
+
+    def _method(self, method: str) -> MethodStats:
+        stats = self.methods.get(method)
+        if stats is None:
+            stats = self.methods[method] = MethodStats()
+        return stats
+
+    def record_request(
+        self, method: str, elapsed: float, request_bytes: int, response_bytes: int, errors: int = 0
+    ) -> None:
+        with self._lock:
+            stats = self._method(method)
+            stats.calls += 1
+            stats.errors += errors
+            stats.request_bytes += request_bytes
+            stats.response_bytes += response_bytes
+            stats.latencies.append(elapsed)
+
+    def record_batched(self, methods: Sequence[str]) -> None:
+        with self._lock:
+            for method in methods:
+                stats = self._method(method)
+                stats.calls += 1
+                stats.batched += 1
+
+    def record_retry(self, method: str) -> None:
+        with self._lock:
+            self._method(method).retries += 1
+
+    def record_span(self, name: str, elapsed: float) -> None:
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats()
+            stats.count += 1
+            stats.total += elapsed
+            stats.max = max(stats.max, elapsed)
+
+    def to_json(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "script": sys.argv[0],
+                "wall_seconds": time.perf_counter() - self.started_at,
+                "rpc": {method: stats.to_json() for method, stats in sorted(self.methods.items())},
+                "spans": {name: stats.to_json() for name, stats in sorted(self.spans.items())},
+            }
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str) -> str:
+            full = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} {kind}")
+            return full
+
+        with self._lock:
+            methods = sorted(self.methods.items())
+            spans = sorted(self.spans.items())
+
+            name = metric("rpc_request_duration_seconds", "histogram", "JSON-RPC round trip latency.")
+            for method, stats in methods:
+                if not stats.latencies:
+                    continue
+                for bound, count in zip(LATENCY_BUCKETS, stats.bucket_counts()):
+                    lines.append(f'{name}_bucket{{method="{method}",le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{method="{method}",le="+Inf"}} {len(stats.latencies)}')
+                lines.append(f'{name}_sum{{method="{method}"}} {sum(stats.latencies)}')
+                lines.append(f'{name}_count{{method="{method}"}} {len(stats.latencies)}')
+
+            counters = (
+                ("rpc_calls_total", "calls", "JSON-RPC calls, including those sent inside a batch."),
+                ("rpc_batched_calls_total", "batched", "JSON-RPC calls sent inside a batch."),
+                ("rpc_errors_total", "errors", "Transport failures and JSON-RPC error responses."),
+                ("rpc_retries_total", "retries", "Calls retried by the scripts' backoff loops."),
+                ("rpc_request_bytes_total", "request_bytes", "JSON-RPC request payload bytes."),
+                ("rpc_response_bytes_total", "response_bytes", "JSON-RPC response payload bytes."),
+            )
+            for metric_name, attr, help_text in counters:
+                name = metric(metric_name, "counter", help_text)
+                for method, stats in methods:
+                    lines.append(f'{name}{{method="{method}"}} {getattr(stats, attr)}')
+
+            name = metric("span_duration_seconds", "summary", "Time spent in profiled local hot paths.")
+            for span_name, stats in spans:
+                lines.append(f'{name}_sum{{span="{span_name}"}} {stats.total}')
+                lines.append(f'{name}_count{{span="{span_name}"}} {stats.count}')
+        return "\n".join(lines) + "\n"
+
+    def print_summary(self, out: TextIO = sys.stderr) -> None:
+        with self._lock:
+            wall = time.perf_counter() - self.started_at
+            methods = sorted(self.methods.items(), key=lambda item: -sum(item[1].latencies))
+            spans = sorted(self.spans.items(), key=lambda item: -item[1].total)
+
+        rpc_total = sum(sum(stats.latencies) for _method, stats in methods)
+        print(f"\nProfile: {wall:.3f}s wall, {rpc_total:.3f}s of RPC latency (summed over round trips)", file=out)
+        if methods:
+            print(
+                f"  {'method':<34}{'calls':>7}{'batched':>8}{'errors':>7}{'retries':>8}"
+                f"{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'total s':>9}{'sent KiB':>10}{'recv KiB':>10}",
+                file=out,
+            )
+        for method, stats in methods:
+            print(
+                f"  {method:<34}{stats.calls:>7}{stats.batched:>8}{stats.errors:>7}{stats.retries:>8}"
+                f"{stats.quantile(0.5) * 1000:>9.1f}{stats.quantile(0.95) * 1000:>9.1f}"
+                f"{max(stats.latencies, default=0.0) * 1000:>9.1f}{sum(stats.latencies):>9.3f}"
+                f"{stats.request_bytes / 1024:>10.1f}{stats.response_bytes / 1024:>10.1f}",
+                file=out,
+            )
+        if spans:
+            print(f"  {'span':<34}{'count':>7}{'mean ms':>10}{'max ms':>9}{'total s':>9}", file=out)
+        for name, stats in spans:
+            print(
+                f"  {name:<34}{stats.count:>7}{stats.total / stats.count * 1000:>10.3f}"
+                f"{stats.max * 1000:>9.3f}{stats.total:>9.3f}",
+                file=out,
+            )
+
+    def export(self, path: str) -> None:
+        text = json.dumps(self.to_json(), indent=2) if path.endswith(".json") else self.to_prometheus()
+        with open(path, "w") as f:
+            f.write(text)
+
+
+PROFILER = Profiler()
+_NULL_SPAN = contextlib.nullcontext()
+# solders request body type -> JSON-RPC method name.
+_METHOD_NAMES: Dict[type, str] = {}
+
+
+def enable() -> Profiler:
+    PROFILER.enabled = True
+    return PROFILER
+
+
+def is_enabled() -> bool:
+    return PROFILER.enabled
+
+
+@contextlib.contextmanager
+def _timed_span(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        PROFILER.record_span(name, time.perf_counter() - start)
+
+
+def span(name: str):
+    """Context manager timing the enclosed block under ``name`` while profiling."""
+    return _timed_span(name) if PROFILER.enabled else _NULL_SPAN
+
+
+def count_retry(method: str) -> None:
+    if PROFILER.enabled:
+        PROFILER.record_retry(method)
+
+
+def _describe(body: Any) -> Tuple[str, int]:
+    """``(method, payload bytes)`` of a solders request body."""
+    payload = body.to_json()
+    method = _METHOD_NAMES.get(type(body))
+    if method is None:
+        method = _METHOD_NAMES[type(body)] = json.loads(payload)["method"]
+    return method, len(payload)
+
+
+def _response_errors(raw: str) -> int:
+    # Account data is base64 and never contains quotes, so this only matches JSON-RPC error members.
+    return raw.count('"error"')
+
+
+class _Round:
+    """Bookkeeping for one instrumented HTTP round trip."""
+
+    def __init__(self, bodies: Sequence[Any], batch: bool):
+        described = [_describe(body) for body in bodies]
+        self.methods = [method for method, _size in described]
+        self.method = BATCH_METHOD if batch else self.methods[0]
+        self.batch = batch
+        self.request_bytes = sum(size for _method, size in described)
+        self.start = time.perf_counter()
+
+    def done(self, raw: Optional[str]) -> None:
+        elapsed = time.perf_counter() - self.start
+        errors = 1 if raw is None else _response_errors(raw)
+        PROFILER.record_request(self.method, elapsed, self.request_bytes, len(raw or ""), errors)
+        if self.batch:
+            PROFILER.record_batched(self.methods)
+
+
+def instrument(client: C) -> C:
+    """Record every round trip ``client`` makes; returns ``client`` unchanged when profiling is off."""
+    provider = client._provider  # type: ignore[attr-defined]
+    if not PROFILER.enabled or getattr(provider, "_profiled", False):
+        return client
+    single, batch = provider.make_request_unparsed, provider.make_batch_request_unparsed
+
+    if inspect.iscoroutinefunction(single):
+        async def make_request_unparsed(body):
+            round_trip = _Round((body,), batch=False)
+            try:
+                raw = await single(body)
+            except BaseException:
+                round_trip.done(None)
+                raise
+            round_trip.done(raw)
+            return raw
+
+        async def make_batch_request_unparsed(reqs):
+            round_trip = _Round(reqs, batch=True)
+            try:
+                raw = await batch(reqs)
+            except BaseException:
+                round_trip.done(None)
+                raise
+            round_trip.done(raw)
+            return raw
+    else:
+        def make_request_unparsed(body):
+            round_trip = _Round((body,), batch=False)
+            try:
+                raw = single(body)
+            except BaseException:
+                round_trip.done(None)
+                raise
+            round_trip.done(raw)
+            return raw
+
+        def make_batch_request_unparsed(reqs):
+            round_trip = _Round(reqs, batch=True)
+            try:
+                raw = batch(reqs)
+            except BaseException:
+                round_trip.done(None)
+                raise
+            round_trip.done(raw)
+            return raw
+
+    # The provider's make_request/make_batch_request look these up on the instance.
+    provider.make_request_unparsed = make_request_unparsed
+    provider.make_batch_request_unparsed = make_batch_request_unparsed
+    provider._profiled = True
+    return client
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile", action="store_true", help="Record RPC latencies and hot-path timings; print a summary at exit"
+    )
+    parser.add_argument(
+        "--profile-out", help="With --profile, also export metrics here (.json for JSON, otherwise Prometheus text)"
+    )
+
+
+def _report(out_path: Optional[str]) -> None:
+    PROFILER.print_summary()
+    if out_path:
+        PROFILER.export(out_path)
+        print(f"Profile written to {out_path}", file=sys.stderr)
+
+
+def configure_profiling(args: argparse.Namespace) -> None:
+    """Enable profiling if ``--profile`` was given and report at interpreter exit.
+
+    Call before any client is created so ``get_client`` instruments it.
+    """
+    if not getattr(args, "profile", False):
+        return
+    enable()
+    PROFILER.reset()
+    atexit.register(_report, getattr(args, "profile_out", None))
@@ -0,0 +1,382 @@
+"""Scan SOL and SPL token balances of many addresses with getMultipleAccounts.
+
+Addresses come from keystores, text or CSV files (first column) or the
+command line. Every 100 addresses cost one getMultipleAccounts call with a
+109-byte ``dataSlice`` (an SPL token account up to its ``state`` byte), and
+several calls share one JSON-RPC batch POST. Mint decimals are read the same
+way, one byte at offset 44, once per mint. Account data is decoded locally
+from the base64 payload; nothing goes through ``jsonParsed``.
+
+Results stream as CSV or JSON lines. ``--diff PREV`` prints only the
+addresses whose balances changed since an earlier scan (``--out`` of a
+previous run), and ``--interval`` repeats the sweep, diffing each one
+against the sweep before.
+
+Usage example:
+  python scan_balances.py wallets.ks vaults.txt --out scan.csv
+  python scan_balances.py wallets.ks vaults.txt --diff scan.csv --out scan.csv
+  python scan_balances.py wallets.ks --interval 30 --format json
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, TextIO
+
+from scriptd import delegate
+
+# Hand the command to a running scriptd daemon before the slow imports below.
+if __name__ == "__main__":
+    delegate("scan_balances", sys.argv[1:])
+
+from solana.rpc.api import Client
+from solana.rpc.types import DataSliceOpts
+from solders.pubkey import Pubkey
+from spl.token.constants import TOKEN_2022_PROGRAM_ID, TOKEN_PROGRAM_ID
+
+from common import MAX_MULTIPLE_ACCOUNTS, RpcBatch, get_client, open_keystore
+from keystore import is_keystore
+from price_report import MINT_DECIMALS_OFFSET, decode_token_account
+from rpc_profile import add_profile_arguments, configure_profiling, span
+
+TOKEN_PROGRAMS = frozenset({TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID})
+# getMultipleAccounts calls sent per JSON-RPC batch POST.
+DEFAULT_CHUNKS_PER_REQUEST = 10
+# mint (32) | owner (32) | amount (8) | delegate (36) | state (1): ends at the state byte, which is
+# non-zero for every initialized token account. A mint is only 82 bytes (zero-padded in Token-2022),
+# so it never passes as a holding.
+TOKEN_ACCOUNT_STATE_OFFSET = 108
+TOKEN_SLICE = DataSliceOpts(offset=0, length=TOKEN_ACCOUNT_STATE_OFFSET + 1)
+DECIMALS_SLICE = DataSliceOpts(offset=MINT_DECIMALS_OFFSET, length=1)
+
+HOLDING_FIELDS = ("address", "lamports", "mint", "amount", "decimals", "ui_amount")
+CHANGE_FIELDS = (
+    "address",
+    "change",
+    "mint",
+    "lamports_before",
+    "lamports_after",
+    "lamports_delta",
+    "amount_before",
+    "amount_after",
+    "amount_delta",
+    "decimals",
+)
+
+
+@dataclass
+class Holding:
+    address: str
+    lamports: int
+    mint: str = ""
+    amount: Optional[int] = None
+    decimals: Optional[int] = None
+
+    @property
+    def ui_amount(self) -> str:
+        if self.amount is None or self.decimals is None:
+            return ""
+        return str(Decimal(self.amount) / Decimal(10) ** self.decimals)
+
+    def values(self) -> Dict[str, object]:
+        return {
+            "address": self.address,
+            "lamports": self.lamports,
+            "mint": self.mint,
+            "amount": self.amount,
+            "decimals": self.decimals,
+            "ui_amount": self.ui_amount,
+        }
+
+
+@dataclass
+class HoldingChange:
+    address: str
+    change: str  # "changed", "new" or "gone"
+    before: Optional[Holding]
+    after: Optional[Holding]
+
+    def values(self) -> Dict[str, object]:
+        before, after = self.before, self.after
+        lamports_before = None if before is None else before.lamports
+        lamports_after = None if after is None else after.lamports
+        amount_before = None if before is None else before.amount
+        amount_after = None if after is None else after.amount
+        amount_delta = None
+        if amount_before is not None or amount_after is not None:
+            amount_delta = (amount_after or 0) - (amount_before or 0)
+        return {
+            "address": self.address,
+            "change": self.change,
+            "mint": (after or before).mint,
+            "lamports_before": lamports_before,
+            "lamports_after": lamports_after,
+            "lamports_delta": (lamports_after or 0) - (lamports_before or 0),
+            "amount_before": amount_before,
+            "amount_after": amount_after,
+            "amount_delta": amount_delta,
+            "decimals": (after or before).decimals,
+        }
+
+
+def _parse_address(text: str) -> Optional[Pubkey]:
+    try:
+        return Pubkey.from_string(text)
+    except ValueError:
+        return None
+
+
+def load_addresses(sources: Sequence[str]) -> List[Pubkey]:
+    """Every address in ``sources`` (keystores, address files, or literal addresses), first occurrence kept."""
+    seen: Dict[Pubkey, None] = {}
+    for source in sources:
+        path = os.path.expanduser(source)
+        if is_keystore(path):
+            seen.update(dict.fromkeys(open_keystore(path).pubkeys()))
+            continue
+        if not os.path.isfile(path):
+            pubkey = _parse_address(source)
+            if pubkey is None:
+                raise ValueError(f"Not a file, keystore or address: {source}")
+            seen[pubkey] = None
+            continue
+        with open(path, newline="") as f:
+            for line, record in enumerate(csv.reader(f), start=1):
+                if not record or not record[0].strip() or record[0].lstrip().startswith("#"):
+                    continue
+                pubkey = _parse_address(record[0].strip())
+                if pubkey is None:
+                    if line == 1:
+                        continue  # header row
+                    raise ValueError(f"{source}:{line}: invalid address {record[0].strip()!r}")
+                seen[pubkey] = None
+    return list(seen)
+
+
+def _multiple_accounts(
+    client: Client, pubkeys: Sequence[Pubkey], data_slice: DataSliceOpts, chunk_size: int
+) -> list:
+    """Accounts (``None`` when missing) for ``pubkeys``, ``chunk_size`` keys per call, all in one POST."""
+    with RpcBatch(client) as batch:
+        chunks = [
+            batch.get_multiple_accounts(list(pubkeys[start:start + chunk_size]), data_slice=data_slice)
+            for start in range(0, len(pubkeys), chunk_size)
+        ]
+    return [account for chunk in chunks for account in chunk.get().value]
+
+
+class BalanceScanner:
+    """Fetch holdings in groups of ``chunk_size * chunks_per_request`` addresses per POST.
+
+    Mint decimals are cached across sweeps, so repeated scans only pay for
+    mints they have not seen before.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        chunk_size: int = MAX_MULTIPLE_ACCOUNTS,
+        chunks_per_request: int = DEFAULT_CHUNKS_PER_REQUEST,
+    ):
+        self.client = client
+        self.chunk_size = chunk_size
+        self.chunks_per_request = chunks_per_request
+        self.decimals: Dict[str, Optional[int]] = {}
+
+    def _load_decimals(self, mints: Iterable[str]) -> None:
+        missing = [mint for mint in dict.fromkeys(mints) if mint not in self.decimals]
+        if not missing:
+            return
+        accounts = _multiple_accounts(
+            self.client, [Pubkey.from_string(mint) for mint in missing], DECIMALS_SLICE, self.chunk_size
+        )
+        for mint, account in zip(missing, accounts):
+            data = None if account is None else account.data
+            self.decimals[mint] = data[0] if data else None
+
+    def scan(self, pubkeys: Sequence[Pubkey]) -> Iterator[Holding]:
+        """Yield one ``Holding`` per address, in order, one POST's worth at a time."""
+        group = self.chunk_size * self.chunks_per_request
+        for start in range(0, len(pubkeys), group):
+            keys = pubkeys[start:start + group]
+            accounts = _multiple_accounts(self.client, keys, TOKEN_SLICE, self.chunk_size)
+            with span("decode.balances"):
+                holdings = [_decode_holding(pubkey, account) for pubkey, account in zip(keys, accounts)]
+            self._load_decimals(holding.mint for holding in holdings if holding.mint)
+            for holding in holdings:
+                if holding.mint:
+                    holding.decimals = self.decimals.get(holding.mint)
+                yield holding
+
+
+def _decode_holding(pubkey: Pubkey, account) -> Holding:
+    if account is None:
+        return Holding(address=str(pubkey), lamports=0)
+    holding = Holding(address=str(pubkey), lamports=account.lamports)
+    data = account.data
+    if account.owner in TOKEN_PROGRAMS and len(data) >= TOKEN_SLICE.length and data[TOKEN_ACCOUNT_STATE_OFFSET]:
+        holding.mint, holding.amount = decode_token_account(data)
+    return holding
+
+
+def _optional_int(value: object) -> Optional[int]:
+    return None if value in (None, "") else int(value)
+
+
+def _holding_from_values(values: Dict[str, object]) -> Holding:
+    return Holding(
+        address=str(values["address"]),
+        lamports=int(values["lamports"]),
+        mint=str(values.get("mint") or ""),
+        amount=_optional_int(values.get("amount")),
+        decimals=_optional_int(values.get("decimals")),
+    )
+
+
+def read_scan(path: Path) -> Dict[str, Holding]:
+    """Holdings of an earlier ``--out`` file, CSV or JSON lines (detected from the first character)."""
+    with open(path, newline="") as f:
+        text = f.read()
+    if text.lstrip().startswith("{"):
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        rows = list(csv.DictReader(text.splitlines()))
+    holdings = (_holding_from_values(row) for row in rows)
+    return {holding.address: holding for holding in holdings}
+
+
+def diff_holdings(previous: Dict[str, Holding], current: Iterable[Holding]) -> Iterator[HoldingChange]:
+    """Changes from ``previous`` to ``current``, streamed as ``current`` is consumed; vanished addresses last."""
+    seen = set()
+    for holding in current:
+        seen.add(holding.address)
+        before = previous.get(holding.address)
+        if before is None:
+            yield HoldingChange(holding.address, "new", None, holding)
+        elif (before.lamports, before.mint, before.amount) != (holding.lamports, holding.mint, holding.amount):
+            yield HoldingChange(holding.address, "changed", before, holding)
+    for address, before in previous.items():
+        if address not in seen:
+            yield HoldingChange(address, "gone", before, None)
+
+
+class RowWriter:
+    """Stream dict rows as CSV (header first) or JSON lines, flushing after every row."""
+
+    def __init__(self, out: TextIO, fmt: str, fields: Sequence[str]):
+        self.out = out
+        self.fmt = fmt
+        self._csv = csv.DictWriter(out, fieldnames=fields) if fmt == "csv" else None
+        if self._csv is not None:
+            self._csv.writeheader()
+
+    def write(self, values: Dict[str, object]) -> None:
+        if self._csv is not None:
+            self._csv.writerow({key: "" if value is None else value for key, value in values.items()})
+        else:
+            self.out.write(json.dumps(values) + "\n")
+        self.out.flush()
+
+
+def _format_for(path: Path, fallback: str) -> str:
+    suffix = path.suffix.lower()
+    if suffix in (".json", ".jsonl"):
+        return "json"
+    if suffix == ".csv":
+        return "csv"
+    return fallback
+
+
+def sweep(
+    scanner: BalanceScanner,
+    pubkeys: Sequence[Pubkey],
+    fmt: str,
+    previous: Optional[Dict[str, Holding]],
+    out_path: Optional[Path],
+    out: Optional[TextIO] = None,
+) -> Dict[str, Holding]:
+    """Scan once; print every holding, or only changes when ``previous`` is given. Returns the scan."""
+    out = out or sys.stdout
+    holdings: Dict[str, Holding] = {}
+
+    def collect() -> Iterator[Holding]:
+        for holding in scanner.scan(pubkeys):
+            holdings[holding.address] = holding
+            yield holding
+
+    if previous is None:
+        writer = RowWriter(out, fmt, HOLDING_FIELDS)
+        for holding in collect():
+            writer.write(holding.values())
+    else:
+        writer = RowWriter(out, fmt, CHANGE_FIELDS)
+        for change in diff_holdings(previous, collect()):
+            writer.write(change.values())
+
+    if out_path is not None:
+        # Write next to the target and rename, so ``--diff X --out X`` never reads a half-written file.
+        out_path = out_path.expanduser()
+        fd, tmp = tempfile.mkstemp(dir=out_path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", newline="") as f:
+            file_writer = RowWriter(f, _format_for(out_path, fmt), HOLDING_FIELDS)
+            for holding in holdings.values():
+                file_writer.write(holding.values())
+        os.replace(tmp, out_path)
+    return holdings
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Scan SOL and SPL token balances of many addresses")
+    parser.add_argument("sources", nargs="+", help="Keystores, address files (one per line / first CSV column) or addresses")
+    parser.add_argument("--rpc", help="RPC URL (default: from SOLANA_RPC_URL or solana-validator:8899)")
+    parser.add_argument("--format", choices=("csv", "json"), default="csv", help="Output format on stdout")
+    parser.add_argument("--out", type=Path, help="Also write the full scan here (.csv or .json), e.g. for a later --diff")
+    parser.add_argument("--diff", type=Path, help="Earlier --out file; print only balances that changed since then")
+    parser.add_argument("--interval", type=float, help="Repeat the scan every N seconds, printing changes only")
+    parser.add_argument(
+        "--chunks-per-request",
+        type=int,
+        default=DEFAULT_CHUNKS_PER_REQUEST,
+        help=f"getMultipleAccounts calls ({MAX_MULTIPLE_ACCOUNTS} addresses each) per JSON-RPC batch POST",
+    )
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    configure_profiling(args)
+
+    try:
+        pubkeys = load_addresses(args.sources)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    scanner = BalanceScanner(get_client(args.rpc), chunks_per_request=args.chunks_per_request)
+    previous = read_scan(args.diff) if args.diff else None
+
+    start = time.perf_counter()
+    previous = sweep(scanner, pubkeys, args.format, previous, args.out)
+    print(f"Scanned {len(pubkeys)} addresses in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    if args.interval is None:
+        return 0
+
+    try:
+        while True:
+            time.sleep(args.interval)
+            try:
+                previous = sweep(scanner, pubkeys, args.format, previous, args.out)
+            except Exception as e:
+                # One failed sweep should not end the monitor; the next one diffs against the last good scan.
+                print(f"Scan failed: {e}", file=sys.stderr)
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,308 @@
+"""Optional resident daemon that keeps the script CLIs warm.
+
+Every ``python transfer.py`` pays for importing solana, solders and
+pythclient, opening an RPC connection, parsing the keypair and fetching a
+blockhash before it does any real work. ``scriptd.py serve`` does all of
+that once and then runs commands on behalf of the CLIs. It keeps:
+
+* the pooled keep-alive clients from ``common.get_client``;
+* one ``BlockhashProvider`` per client, refreshed in the background, and
+  the ``FeeCache`` tied to it;
+* parsed keypairs and Pyth indexes, reloaded only when their files change.
+
+The CLIs hand their arguments over a Unix socket before their heavy imports
+(``delegate``, which needs nothing but the standard library) and print what
+the daemon streams back. With no daemon listening they run in-process as
+before. Commands run one at a time, in the caller's working directory.
+Long-running modes (``--watch``, ``--record``, ``--interval``) and
+``--profile`` always run in-process. Set ``SOLANA_SCRIPTS_NO_DAEMON=1`` to
+bypass a running daemon.
+
+Usage example:
+  python scriptd.py serve &
+  python transfer.py --from-keypair id.json --to <PUBKEY> --sol 0.1
+  python scriptd.py status
+  python scriptd.py stop
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import socket
+import socketserver
+import struct
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from typing import Any, Dict, Optional, Sequence
+
+SOCKET_ENV = "SOLANA_SCRIPTS_SOCKET"
+NO_DAEMON_ENV = "SOLANA_SCRIPTS_NO_DAEMON"
+# Environment the daemon must share with the caller for a command to mean the same thing.
+FORWARDED_ENV = ("SOLANA_RPC_URL",)
+# Commands the daemon can run: CLI name -> module exposing ``main(argv)``.
+SCRIPTS = {
+    "transfer": "transfer",
+    "airdrop": "airdrop",
+    "drain_wallet": "drain_wallet",
+    "price_report": "price_report",
+    "scan_balances": "scan_balances",
+}
+# Flags that keep a command in-process: long-running modes would hold the daemon, and the
+# profiler reports per process.
+IN_PROCESS_FLAGS = frozenset({"--watch", "--record", "--interval", "--profile", "--profile-out"})
+
+
+def socket_path() -> str:
+    path = os.environ.get(SOCKET_ENV)
+    if path:
+        return path
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(base, f"solana-scripts-{os.getuid()}.sock")
+
+
+def _send(sock: socket.socket, message: Dict[str, Any]) -> None:
+    sock.sendall(json.dumps(message).encode() + b"\n")
+
+
+# -- client side (standard library only) ----------------------------------------
+
+
+def delegate(script: str, argv: Sequence[str]) -> None:
+    """Run ``script`` in a listening daemon and exit with its status; return to run in-process instead.
+
+    The command only falls back to in-process execution if the daemon never
+    accepted it, so a transfer is never sent twice.
+    """
+    if os.environ.get(NO_DAEMON_ENV) or any(arg.split("=", 1)[0] in IN_PROCESS_FLAGS for arg in argv):
+        return
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path())
+    except OSError:
+        sock.close()
+        return
+    accepted = False
+    with sock, sock.makefile("rb") as replies:
+        try:
+            _send(sock, {
+                "script": script,
+                "argv": list(argv),
+                "cwd": os.getcwd(),
+                "env": {name: os.environ.get(name) for name in FORWARDED_ENV},
+            })
+            for line in replies:
+                message = json.loads(line)
+                if "fallback" in message:
+                    return
+                if "accepted" in message:
+                    accepted = True
+                elif "stdout" in message:
+                    sys.stdout.write(message["stdout"])
+                    sys.stdout.flush()
+                elif "stderr" in message:
+                    sys.stderr.write(message["stderr"])
+                    sys.stderr.flush()
+                elif "exit" in message:
+                    raise SystemExit(message["exit"])
+        except OSError:
+            if not accepted:
+                return
+    if not accepted:
+        return
+    sys.stderr.write("scriptd: connection lost while the command was running; check its outcome before retrying\n")
+    raise SystemExit(1)
+
+
+# -- daemon side -------------------------------------------------------------------
+
+
+class _SocketStream(io.TextIOBase):
+    """Text stream that forwards every write to the client as a ``stdout``/``stderr`` message."""
+
+    def __init__(self, sock: socket.socket, kind: str):
+        self.sock = sock
+        self.kind = kind
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if text:
+            _send(self.sock, {self.kind: text})
+        return len(text)
+
+    def isatty(self) -> bool:
+        return False
+
+
+class ScriptDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, rpc_url: Optional[str] = None):
+        self.path = path
+        self.rpc_url = rpc_url
+        self.started = time.time()
+        self.commands = 0
+        # stdout, argv handling and the working directory are process-wide, so commands run one at a time.
+        self.run_lock = threading.Lock()
+        self.env = {name: os.environ.get(name) for name in FORWARDED_ENV}
+        self.modules: Dict[str, Any] = {}
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o600)
+
+    def warm(self) -> None:
+        """Import every script and start the shared blockhash refresher for the default client."""
+        for name, module in SCRIPTS.items():
+            self.modules[name] = importlib.import_module(module)
+        from common import get_blockhash_provider, get_client, get_fee_cache
+
+        client = get_client(self.rpc_url)
+        get_blockhash_provider(client).start()
+        get_fee_cache(client)
+
+    def run(self, sock: socket.socket, request: Dict[str, Any]) -> int:
+        module = self.modules[request["script"]]
+        stdout, stderr = _SocketStream(sock, "stdout"), _SocketStream(sock, "stderr")
+        with self.run_lock:
+            self.commands += 1
+            cwd, argv = os.getcwd(), sys.argv
+            try:
+                os.chdir(request["cwd"])
+                # argparse takes the program name in usage and error messages from sys.argv[0].
+                sys.argv = [module.__file__, *request["argv"]]
+                with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                    try:
+                        code = module.main(request["argv"])
+                    except SystemExit as e:
+                        code = e.code
+                    except (BrokenPipeError, ConnectionResetError):
+                        raise
+                    except Exception:
+                        traceback.print_exc()
+                        code = 1
+            finally:
+                os.chdir(cwd)
+                sys.argv = argv
+        if code is None:
+            return 0
+        if isinstance(code, int):
+            return code
+        # sys.exit("message") prints the message and exits with status 1.
+        _send(sock, {"stderr": f"{code}\n"})
+        return 1
+
+    def status(self) -> Dict[str, Any]:
+        return {"pid": os.getpid(), "uptime": round(time.time() - self.started, 1), "commands": self.commands}
+
+
+def _peer_uid(sock: socket.socket) -> Optional[int]:
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    return struct.unpack("3i", creds)[1]
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: ScriptDaemon
+
+    def handle(self) -> None:
+        sock = self.request
+        uid = _peer_uid(sock)
+        if uid is not None and uid != os.getuid():
+            return
+        line = self.rfile.readline()
+        if not line:
+            return
+        request = json.loads(line)
+        control = request.get("control")
+        if control == "status":
+            _send(sock, self.server.status())
+            return
+        if control == "stop":
+            _send(sock, {"stopping": True})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        if request.get("script") not in self.server.modules:
+            _send(sock, {"fallback": f"unknown script {request.get('script')!r}"})
+            return
+        if request.get("env") != self.server.env:
+            _send(sock, {"fallback": "environment differs from the daemon's"})
+            return
+        _send(sock, {"accepted": True})
+        try:
+            code = self.server.run(sock, request)
+            _send(sock, {"exit": code})
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def _control(command: str) -> Optional[Dict[str, Any]]:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path())
+    except OSError:
+        sock.close()
+        return None
+    with sock, sock.makefile("rb") as replies:
+        _send(sock, {"control": command})
+        line = replies.readline()
+    return json.loads(line) if line else None
+
+
+def serve(path: str, rpc_url: Optional[str] = None) -> int:
+    if _control("status") is not None:
+        print(f"A daemon is already listening on {path}", file=sys.stderr)
+        return 1
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)  # stale socket left by a daemon that did not shut down cleanly
+    old_umask = os.umask(0o177)
+    try:
+        server = ScriptDaemon(path, rpc_url)
+    finally:
+        os.umask(old_umask)
+    start = time.perf_counter()
+    server.warm()
+    print(f"scriptd listening on {path} (warmed up in {time.perf_counter() - start:.2f}s)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Resident daemon that runs the script CLIs warm")
+    parser.add_argument("command", choices=("serve", "status", "stop"))
+    parser.add_argument("--socket", help=f"Unix socket path (default: ${SOCKET_ENV} or {socket_path()})")
+    parser.add_argument("--rpc", help="RPC URL to warm up (default: from SOLANA_RPC_URL or solana-validator:8899)")
+    args = parser.parse_args(argv)
+    if args.socket:
+        os.environ[SOCKET_ENV] = args.socket
+
+    if args.command == "serve":
+        return serve(socket_path(), args.rpc)
+    reply = _control(args.command)
+    if reply is None:
+        print(f"No daemon listening on {socket_path()}")
+        return 1
+    if args.command == "status":
+        print(f"pid {reply['pid']}, up {reply['uptime']}s, {reply['commands']} commands run")
+    else:
+        print("Daemon stopping")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
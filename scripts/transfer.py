@@ -1,30 +1,105 @@
+import sys
+
+from scriptd import delegate
+
+# Hand the command to a running scriptd daemon before the slow imports below.
+if __name__ == "__main__":
+    delegate("transfer", sys.argv[1:])
+
 import argparse
 
 from common import (
+    ConfirmationTracker,
+    add_sender_arguments,
     estimate_simple_transfer_fee,
+    estimate_transfer_batch_fee,
+    get_blockhash_provider,
     get_client,
+    get_fee_cache,
     lamports_from_sol,
     load_keypair,
+    pack_transfer_batches,
     parse_pubkey,
     print_balances,
+    read_transfer_csv,
+    report_confirmation,
+    report_send_stats,
+    send_transfer_batches,
     send_transfer_transaction,
-    wait_for_confirmation,
+    sender_from_args,
+    write_transfer_results,
 )
+from compute_budget import add_compute_budget_arguments, tuner_from_args
+from rpc_profile import add_profile_arguments, configure_profiling
 from solana.constants import LAMPORTS_PER_SOL
 
 
-def main():
+def run_batch(args, client, from_keypair):
+    rows = read_transfer_csv(args.batch, amounts_in_lamports=args.csv_lamports)
+    if not rows:
+        print("В файле нет ни одного перевода.")
+        return
+
+    provider = get_blockhash_provider(client)
+    tuner = tuner_from_args(client, args)
+    batches = pack_transfer_batches(from_keypair, rows, reserve_compute_budget=tuner is not None)
+    total = sum(row.lamports for row in rows)
+    fee = estimate_transfer_batch_fee(client, from_keypair, batches[0], provider=provider, tuner=tuner) * len(batches)
+
+    balance_resp = client.get_balance(from_keypair.pubkey())
+    balance = balance_resp.value if balance_resp.value is not None else 0
+    print(
+        f"Текущий баланс отправителя ({from_keypair.pubkey()}): {balance} лампортов ({balance / LAMPORTS_PER_SOL} SOL)"
+    )
+    print(
+        f"Получателей: {len(rows)}, транзакций: {len(batches)}. "
+        f"К переводу: {total} лампортов ({total / LAMPORTS_PER_SOL} SOL), комиссия: {fee} лампортов."
+    )
+    if balance < total + fee:
+        print(f"Недостаточно средств: баланс ({balance}) меньше суммы ({total}) + комиссии ({fee}).")
+        return
+
+    sender = sender_from_args(client, args)
+    with provider:
+        results = send_transfer_batches(
+            client, from_keypair, batches, ws_url=args.ws_url, provider=provider, sender=sender, tuner=tuner
+        )
+    report_send_stats(sender.stats())
+    results_path = args.results or f"{args.batch}.results.csv"
+    write_transfer_results(results_path, results)
+
+    confirmed = sum(1 for result in results if result.status == "confirmed")
+    print(f"Подтверждено переводов: {confirmed}/{len(results)}. Результаты: {results_path}")
+
+
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Transfer lamports between addresses")
     parser.add_argument("--from-keypair", required=True, help="Path to sender's keypair file")
-    parser.add_argument("--to", required=True, help="Recipient's public key")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--to", help="Recipient's public key")
+    target.add_argument("--batch", help="CSV file with recipient,amount rows (amount in SOL)")
     amt = parser.add_mutually_exclusive_group()
     amt.add_argument("--sol", help="Amount in SOL (decimal)", default="1")
     amt.add_argument("--lamports", type=int, help="Amount in lamports (integer)")
     parser.add_argument("--rpc", help="RPC URL")
-    args = parser.parse_args()
+    parser.add_argument("--ws-url", help="Websocket URL; confirm via signatureSubscribe instead of polling")
+    parser.add_argument("--csv-lamports", action="store_true", help="Amounts in the --batch CSV are lamports")
+    parser.add_argument("--results", help="Where to write per-row results (default: <batch>.results.csv)")
+    parser.add_argument("--max-in-flight", type=int, default=8, help="Batch transactions pending at once")
+    add_sender_arguments(parser)
+    add_compute_budget_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    configure_profiling(args)
 
     client = get_client(args.rpc)
     from_keypair = load_keypair(args.from_keypair)
+    if args.batch:
+        run_batch(args, client, from_keypair)
+        return
+
+    provider = get_blockhash_provider(client)
+    tuner = tuner_from_args(client, args)
     to_pub = parse_pubkey(args.to)
     lamports = args.lamports if args.lamports is not None else lamports_from_sol(args.sol)
 
@@ -38,7 +113,9 @@ def main():
         f"Текущий баланс отправителя ({from_keypair.pubkey()}): {balance} лампортов ({balance / LAMPORTS_PER_SOL} SOL)"
     )
 
-    fee = estimate_simple_transfer_fee(client, from_keypair.pubkey(), to_pub)
+    fee = estimate_simple_transfer_fee(
+        client, from_keypair.pubkey(), to_pub, provider=provider, fee_cache=get_fee_cache(client), tuner=tuner
+    )
     if balance < lamports + fee:
         print(f"Недостаточно средств: баланс ({balance}) меньше суммы ({lamports}) + комиссии ({fee}).")
         return
@@ -47,13 +124,16 @@ def main():
         f"Оцениваемая комиссия: {fee} лампортов. К переводу: {lamports} лампортов ({lamports / LAMPORTS_PER_SOL} SOL)."
     )
 
-    sig = send_transfer_transaction(client, from_keypair, to_pub, lamports)
+    latest = provider.get()
+    sig = send_transfer_transaction(client, from_keypair, to_pub, lamports, blockhash=latest.blockhash, tuner=tuner)
     if sig is None:
         return
 
     print(f"Signature: {sig}")
-    ok = wait_for_confirmation(client, sig)
-    print("Статус:", "✅ подтверждено" if ok else "⏳ не подтверждено (проверь позже)")
+    tracker = ConfirmationTracker(client)
+    tracked = tracker.add(sig, latest.last_valid_block_height)
+    tracker.confirm(ws_url=args.ws_url)
+    report_confirmation(tracked)
 
     print_balances(client, from_keypair.pubkey(), to_pub)
 